@@ -0,0 +1,457 @@
+"""
+library api of analyzers (for notebook and other scripts). ex)
+    from analyzeTool import analysis_api
+    frame = analysis_api.load_top('/var/log/statlog/top_*.log', '2021/01/01 09:00:00', '2021/01/01 18:00:00')
+    frame = analysis_api.query('vmstat', paths).between(start, end).select('us', 'wa').resample(60, 'max').collect()
+    frame.columns['wa'], frame.times, frame.to_dict() (ex. pandas.DataFrame(frame.to_dict()))
+logs are parsed by the same functions as each analyzer. query is lazy and evaluated by collect():
+    time filter (between) is passed to the analyzer, and selection (select, match), row filter (where) and
+    aggregation (resample) are applied to each row as soon as the analyzer appends it, so rows of all columns
+    are not held in memory. the analyzer still creates the whole row, and only the selected and filtered columns
+    are converted. date time of the row is the seconds which the analyzer appends to its times list.
+result is columnar (Frame): times (seconds from 1970/01/01 on the log's wall clock) and values per column.
+"""
+import copy
+import datetime as dt
+import re
+from typing import List, Dict, Optional, Callable, Union, Tuple, Iterable, Pattern
+
+from analyzeTool.analysis_util import find_log_files, iterate_log_lines, convert_date_time, \
+    convert_seconds_to_date_time, format_seconds, write_csv_file
+from analyzeTool import vmstat_analysis, free_analysis, iostat_cpu_analysis, iostat_analysis, iostat_dev_analysis, \
+    df_analysis, top_analysis, collector_analysis
+
+# Constant Value
+AGGREGATIONS: Dict[str, Callable[[List[float]], float]] = {
+    'avg': lambda values: sum(values) / len(values),
+    'max': max,
+    'min': min,
+    'sum': sum,
+    'last': lambda values: values[-1],
+}
+TIME_LABEL = 'time'
+
+
+class DiscardedList(list):
+    """
+    Description:
+        list which ignores append. passed to analyzer for output which is not used.
+    """
+
+    def append(self, value):
+        pass
+
+
+class LastValueList(list):
+    """
+    Description:
+        list which keeps only the last appended value. passed to analyzer as times list of FrameBuilder.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.last = None
+
+    def append(self, value):
+        self.last = value
+
+
+class Frame:
+    """
+    Description:
+        columnar result of query. missing value is None.
+    """
+
+    def __init__(self, times: List[int], columns: Dict[str, List[Optional[float]]]):
+        self.times = times
+        self.columns = columns
+
+    @property
+    def names(self) -> List[str]:
+        return list(self.columns.keys())
+
+    def __len__(self) -> int:
+        return len(self.times)
+
+    def __getitem__(self, name: str) -> List[Optional[float]]:
+        return self.columns[name]
+
+    def to_dict(self) -> Dict[str, List]:
+        result: Dict[str, List] = {TIME_LABEL: [convert_seconds_to_date_time(seconds) for seconds in self.times]}
+        result.update(self.columns)
+        return result
+
+    def to_array2d(self) -> List[List]:
+        """
+        Description:
+            convert to 2d array of analyzers (row: date time, column: value). row 0 is date time. missing value is ''.
+        """
+        columns = list(self.columns.values())
+        return [[format_seconds(seconds)] + ['' if column[row] is None else column[row] for column in columns]
+                for row, seconds in enumerate(self.times)]
+
+    def write_csv(self, filename: str, output_dir: Optional[str] = None):
+        write_csv_file(filename, [''] + self.names, self.to_array2d(), output_dir=output_dir)
+
+
+class FrameBuilder:
+    """
+    Description:
+        row sink passed to analyzer as 2d array (or sparse records). analyzers only append rows
+        (df updates the values of the last record), so the last row is kept pending, and the row is selected,
+        filtered and aggregated when the next row is appended. rows must be in ascending order of date time.
+        analyzers append seconds to times list just before the row, so record_times is passed as times list
+        and the seconds are used for the row (date time string of the row is not parsed).
+    """
+
+    def __init__(self, get_names: Callable[[], List[str]], selected_names: Optional[List[str]],
+                 name_pattern: Optional[Pattern], conditions: List[Tuple[str, Callable[[float], bool]]],
+                 bucket_seconds: Optional[int], aggregation: str):
+        self.get_names = get_names
+        self.selected_names = selected_names
+        self.name_pattern = name_pattern
+        self.conditions = conditions
+        self.bucket_seconds = bucket_seconds
+        self.aggregate = AGGREGATIONS[aggregation]
+        self.names: List[str] = []
+        self.read_indexes: List[Tuple[int, str]] = []  # (index of analyzer column, name) of output and condition
+        self.output_names: Dict[str, int] = {}  # name -> index of analyzer column
+        self.record_times = LastValueList()
+        self.pending_record = None
+        self.pending_seconds: Optional[int] = None
+        self.bucket: Optional[int] = None
+        self.bucket_values: Dict[str, List[float]] = {}
+        self.times: List[int] = []
+        self.columns: Dict[str, List[Optional[float]]] = {}
+
+    def __getitem__(self, index: int):
+        if index != -1 or self.pending_record is None:
+            raise IndexError(index)
+        return self.pending_record
+
+    def append(self, record):
+        if self.pending_record is not None:
+            self.add_record(self.pending_record, self.pending_seconds)
+        self.pending_record = record
+        self.pending_seconds = self.record_times.last
+        self.record_times.last = None
+
+    def is_selected(self, name: str) -> bool:
+        if self.selected_names is not None and name not in self.selected_names:
+            return False
+        return self.name_pattern is None or self.name_pattern.search(name) is not None
+
+    def update_names(self):
+        # columns are added by analyzer on the way (new device, process, ...)
+        condition_names = {name for name, _ in self.conditions}
+        for index, name in enumerate(self.get_names()[len(self.names):], len(self.names)):
+            self.names.append(name)
+            if self.is_selected(name):
+                self.output_names[name] = index
+            if name in self.output_names or name in condition_names:
+                self.read_indexes.append((index, name))
+
+    def add_record(self, record, seconds: int):
+        is_sparse = isinstance(record, tuple)  # sparse record is (date time, map of column index and value)
+        values = record[1] if is_sparse else record
+        width = (max(values) + 1 if values else 0) if is_sparse else len(record) - 1
+        if width > len(self.names):
+            self.update_names()
+        row: Dict[str, float] = {}
+        for index, name in self.read_indexes:
+            if is_sparse:
+                value = values.get(index, '')
+            else:
+                value = record[index + 1] if index < width else ''
+            if value != '' and value is not None:
+                row[name] = float(value)
+        for name, condition in self.conditions:
+            if name not in row or not condition(row[name]):
+                return
+        if self.conditions:
+            row = {name: value for name, value in row.items() if name in self.output_names}
+        if self.bucket_seconds is None:
+            self.add_row(seconds, row)
+            return
+        bucket = seconds // self.bucket_seconds
+        if bucket != self.bucket:
+            self.flush_bucket()
+            self.bucket = bucket
+        for name, value in row.items():
+            self.bucket_values.setdefault(name, []).append(value)
+
+    def flush_bucket(self):
+        if self.bucket is None:
+            return
+        self.add_row(self.bucket * self.bucket_seconds,
+                     {name: self.aggregate(values) for name, values in self.bucket_values.items()})
+        self.bucket_values = {}
+
+    def add_row(self, seconds: int, row: Dict[str, float]):
+        for name in row:
+            if name not in self.columns:
+                self.columns[name] = [None] * len(self.times)
+        self.times.append(seconds)
+        for name, column in self.columns.items():
+            column.append(row.get(name))
+
+    def build(self) -> Frame:
+        if self.pending_record is not None:
+            self.add_record(self.pending_record, self.pending_seconds)
+            self.pending_record = None
+            self.pending_seconds = None
+        self.flush_bucket()
+        self.bucket = None
+        # columns in order of analyzer (order of appearance)
+        order = sorted((index, name) for name, index in self.output_names.items() if name in self.columns)
+        return Frame(self.times, {name: self.columns[name] for _, name in order})
+
+
+def parse_vmstat(file_paths: List[str], filter_start_time: Optional, filter_end_time: Optional,
+                 create_builder: Callable, options: Dict) -> FrameBuilder:
+    labels: List[str] = []
+    builder = create_builder(lambda: labels)
+    vmstat_analysis.analyze_vmstat_log_lines(iterate_log_lines(file_paths), filter_start_time, filter_end_time,
+                                             labels, builder.record_times, builder)
+    return builder
+
+
+def parse_free(file_paths: List[str], filter_start_time: Optional, filter_end_time: Optional,
+               create_builder: Callable, options: Dict) -> FrameBuilder:
+    names = free_analysis.analyze_free_params('')
+    builder = create_builder(lambda: names)
+    free_analysis.analyze_free_log_lines(iterate_log_lines(file_paths), filter_start_time, filter_end_time,
+                                         builder.record_times, builder, {})
+    return builder
+
+
+def parse_iostat_cpu(file_paths: List[str], filter_start_time: Optional, filter_end_time: Optional,
+                     create_builder: Callable, options: Dict) -> FrameBuilder:
+    cpu_labels: List[str] = []
+    builder = create_builder(lambda: cpu_labels + [iostat_cpu_analysis.CPU_USE_LABEL])
+    iostat_cpu_analysis.analyze_iostat_cpu_log_lines(iterate_log_lines(file_paths), filter_start_time,
+                                                     filter_end_time, cpu_labels, builder.record_times, builder)
+    return builder
+
+
+def parse_iostat(file_paths: List[str], filter_start_time: Optional, filter_end_time: Optional,
+                 create_builder: Callable, options: Dict) -> FrameBuilder:
+    # options: metric 'read' (r/s, default) or 'write' (w/s), group_by_disk
+    names: List[str] = []
+    builder = create_builder(lambda: names)
+    is_write = options.get('metric', 'read') == 'write'
+    iostat_analysis.analyze_iostat_log_lines(iterate_log_lines(file_paths), filter_start_time, filter_end_time,
+                                             names, builder.record_times, DiscardedList() if is_write else builder,
+                                             builder if is_write else DiscardedList(),
+                                             options.get('group_by_disk', False))
+    return builder
+
+
+def parse_iostat_dev(file_paths: List[str], filter_start_time: Optional, filter_end_time: Optional,
+                     create_builder: Callable, options: Dict) -> FrameBuilder:
+    # options: metric 'tps' (default), 'read_kb' or 'write_kb', group_by_disk
+    names: List[str] = []
+    builder = create_builder(lambda: names)
+    metric = options.get('metric', 'tps')
+    records = [builder if metric == name else DiscardedList() for name in ['tps', 'read_kb', 'write_kb']]
+    iostat_dev_analysis.analyze_iostat_dev_log_lines(iterate_log_lines(file_paths), filter_start_time,
+                                                     filter_end_time, names, builder.record_times, *records,
+                                                     options.get('group_by_disk', False))
+    return builder
+
+
+def parse_df(file_paths: List[str], filter_start_time: Optional, filter_end_time: Optional,
+             create_builder: Callable, options: Dict) -> FrameBuilder:
+    # options: filesystem_filter (regex)
+    filesystems: List[str] = []
+    builder = create_builder(lambda: filesystems)
+    filesystem_filter = re.compile(options.get('filesystem_filter', df_analysis.DEFAULT_FILESYSTEM_FILTER))
+    df_analysis.analyze_df_log_lines(iterate_log_lines(file_paths), filter_start_time, filter_end_time,
+                                     filesystem_filter, filesystems, {}, {}, builder.record_times, builder)
+    return builder
+
+
+def parse_top(file_paths: List[str], filter_start_time: Optional, filter_end_time: Optional,
+              create_builder: Callable, options: Dict) -> FrameBuilder:
+    # options: metric 'cpu' (default) or 'mem', proc (proc_yyyymmdd.log of getstatlog.py --process)
+    mem_pids: List[str] = []
+    cpu_pids: List[str] = []
+    is_mem = options.get('metric', 'cpu') == 'mem'
+    builder = create_builder(lambda: mem_pids if is_mem else cpu_pids)
+    mem_array2d = builder if is_mem else DiscardedList()
+    cpu_array2d = DiscardedList() if is_mem else builder
+    if options.get('proc', False):
+        top_analysis.analyze_proc_log_lines(iterate_log_lines(file_paths), filter_start_time, filter_end_time,
+                                            mem_pids, cpu_pids, builder.record_times, mem_array2d, cpu_array2d)
+    else:
+        top_analysis.analyze_top_log_files(file_paths, filter_start_time, filter_end_time, mem_pids, cpu_pids,
+                                           builder.record_times, mem_array2d, cpu_array2d)
+    return builder
+
+
+def parse_collector(file_paths: List[str], filter_start_time: Optional, filter_end_time: Optional,
+                    create_builder: Callable, options: Dict) -> FrameBuilder:
+    names = collector_analysis.OUTPUT_HEADER[1:]
+    builder = create_builder(lambda: names)
+    collector_analysis.analyze_collector_log_lines(iterate_log_lines(file_paths), filter_start_time,
+                                                   filter_end_time, builder.record_times, builder)
+    return builder
+
+
+SOURCES: Dict[str, Callable] = {
+    'vmstat': parse_vmstat,
+    'free': parse_free,
+    'iostat_cpu': parse_iostat_cpu,
+    'iostat': parse_iostat,
+    'iostat_dev': parse_iostat_dev,
+    'df': parse_df,
+    'top': parse_top,
+    'collector': parse_collector,
+}
+
+
+def convert_filter_time(filter_time: Union[str, dt.datetime, None]) -> Optional[dt.datetime]:
+    if filter_time is None or isinstance(filter_time, dt.datetime):
+        return filter_time
+    return convert_date_time(filter_time)
+
+
+class Query:
+    """
+    Description:
+        lazy query of one log type. each method returns a new query, and logs are parsed by collect().
+    """
+
+    def __init__(self, source: str, paths: Union[str, Iterable[str]], options: Dict):
+        if source not in SOURCES:
+            raise ValueError('unknown source: {} (source: {})'.format(source, ', '.join(SOURCES)))
+        self.source = source
+        self.file_paths = find_log_files(paths) if isinstance(paths, str) else list(paths)
+        self.options = options
+        self.filter_start_time: Optional[dt.datetime] = None
+        self.filter_end_time: Optional[dt.datetime] = None
+        self.selected_names: Optional[List[str]] = None
+        self.name_pattern: Optional[Pattern] = None
+        self.conditions: List[Tuple[str, Callable[[float], bool]]] = []
+        self.bucket_seconds: Optional[int] = None
+        self.aggregation = 'avg'
+
+    def copy(self) -> 'Query':
+        query = copy.copy(self)
+        query.conditions = list(self.conditions)
+        return query
+
+    def between(self, start: Union[str, dt.datetime, None] = None,
+                end: Union[str, dt.datetime, None] = None) -> 'Query':
+        """
+        :param start: 'YYYY/mm/dd HH:MM:SS' or datetime. None is no filter.
+        :param end: 'YYYY/mm/dd HH:MM:SS' or datetime. None is no filter.
+        """
+        query = self.copy()
+        query.filter_start_time = convert_filter_time(start)
+        query.filter_end_time = convert_filter_time(end)
+        return query
+
+    def select(self, *names: str) -> 'Query':
+        query = self.copy()
+        query.selected_names = list(names)
+        return query
+
+    def match(self, name_pattern: str) -> 'Query':
+        """
+        :param name_pattern: regex of column names to select (ex. device name, process name)
+        """
+        query = self.copy()
+        query.name_pattern = re.compile(name_pattern)
+        return query
+
+    def where(self, name: str, condition: Callable[[float], bool]) -> 'Query':
+        """
+        :param name: column name. row without the value is excluded.
+        :param condition: row is kept when true. ex) lambda value: value > 10
+        """
+        query = self.copy()
+        query.conditions.append((name, condition))
+        return query
+
+    def resample(self, bucket_seconds: int, aggregation: str = 'avg') -> 'Query':
+        """
+        :param bucket_seconds: bucket size [sec]. time of row is the bucket start.
+        :param aggregation: avg, max, min, sum or last
+        """
+        if aggregation not in AGGREGATIONS:
+            raise ValueError('unknown aggregation: {} (aggregation: {})'.format(aggregation, ', '.join(AGGREGATIONS)))
+        query = self.copy()
+        query.bucket_seconds = bucket_seconds
+        query.aggregation = aggregation
+        return query
+
+    def create_builder(self, get_names: Callable[[], List[str]]) -> FrameBuilder:
+        return FrameBuilder(get_names, self.selected_names, self.name_pattern, self.conditions, self.bucket_seconds,
+                            self.aggregation)
+
+    def collect(self) -> Frame:
+        builder = SOURCES[self.source](self.file_paths, self.filter_start_time, self.filter_end_time,
+                                       self.create_builder, self.options)
+        return builder.build()
+
+
+def query(source: str, paths: Union[str, Iterable[str]], **options) -> Query:
+    """
+    Description:
+        create lazy query.
+    :param source: vmstat, free, iostat_cpu, iostat, iostat_dev, df, top or collector
+    :param paths: log file paths, or glob pattern (compressed files of the pattern are included)
+    :param options: options of source (metric, group_by_disk, filesystem_filter, proc)
+    :return: query
+    """
+    return Query(source, paths, options)
+
+
+def load(source: str, paths: Union[str, Iterable[str]], start: Union[str, dt.datetime, None] = None,
+         end: Union[str, dt.datetime, None] = None, columns: Optional[List[str]] = None,
+         bucket_seconds: Optional[int] = None, aggregation: str = 'avg', **options) -> Frame:
+    result = query(source, paths, **options).between(start, end)
+    if columns is not None:
+        result = result.select(*columns)
+    if bucket_seconds is not None:
+        result = result.resample(bucket_seconds, aggregation)
+    return result.collect()
+
+
+def load_vmstat(paths, start=None, end=None, columns=None, bucket_seconds=None, aggregation='avg') -> Frame:
+    return load('vmstat', paths, start, end, columns, bucket_seconds, aggregation)
+
+
+def load_free(paths, start=None, end=None, columns=None, bucket_seconds=None, aggregation='avg') -> Frame:
+    return load('free', paths, start, end, columns, bucket_seconds, aggregation)
+
+
+def load_iostat_cpu(paths, start=None, end=None, columns=None, bucket_seconds=None, aggregation='avg') -> Frame:
+    return load('iostat_cpu', paths, start, end, columns, bucket_seconds, aggregation)
+
+
+def load_iostat(paths, start=None, end=None, columns=None, bucket_seconds=None, aggregation='avg',
+                metric='read', group_by_disk=False) -> Frame:
+    return load('iostat', paths, start, end, columns, bucket_seconds, aggregation, metric=metric,
+                group_by_disk=group_by_disk)
+
+
+def load_iostat_dev(paths, start=None, end=None, columns=None, bucket_seconds=None, aggregation='avg',
+                    metric='tps', group_by_disk=False) -> Frame:
+    return load('iostat_dev', paths, start, end, columns, bucket_seconds, aggregation, metric=metric,
+                group_by_disk=group_by_disk)
+
+
+def load_df(paths, start=None, end=None, columns=None, bucket_seconds=None, aggregation='avg',
+            filesystem_filter=df_analysis.DEFAULT_FILESYSTEM_FILTER) -> Frame:
+    return load('df', paths, start, end, columns, bucket_seconds, aggregation, filesystem_filter=filesystem_filter)
+
+
+def load_top(paths, start=None, end=None, columns=None, bucket_seconds=None, aggregation='avg', metric='cpu',
+             proc=False) -> Frame:
+    return load('top', paths, start, end, columns, bucket_seconds, aggregation, metric=metric, proc=proc)
+
+
+def load_collector(paths, start=None, end=None, columns=None, bucket_seconds=None, aggregation='avg') -> Frame:
+    return load('collector', paths, start, end, columns, bucket_seconds, aggregation)
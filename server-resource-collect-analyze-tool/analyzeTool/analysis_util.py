@@ -1,29 +1,465 @@
+import atexit
+import cProfile
 import csv
 import datetime as dt
-from typing import List, Optional
+import glob
+import gzip
+import io
+import json
+import os
+import time
+import tracemalloc
+from contextlib import contextmanager
+from operator import itemgetter
+from typing import List, Optional, Iterator, Dict, Tuple, BinaryIO, TextIO, Iterable
+
+try:
+    import zstandard  # optional: needed only for .zst logs
+except ImportError:
+    zstandard = None
 
 DATETIME_FORMAT = '%Y/%m/%d %H:%M:%S'
+MIN_CHUNK_SIZE = 1024 * 1024  # 1MB
+READ_BUFFER_SIZE = 1024 * 1024  # 1MB
+GZIP_EXTENSION = '.gz'
+ZSTD_EXTENSION = '.zst'
+COMPRESSED_EXTENSIONS = (GZIP_EXTENSION, ZSTD_EXTENSION)
+SECONDS_PER_DAY = 86400
+EPOCH_DATE_TIME = dt.datetime(1970, 1, 1)
+JSONL_TYPE_FORMAT = '"type":"{}"'  # record type written by collector (compact JSON)
+OUTPUT_DIR = '../output/'
+WRITE_BUFFER_SIZE = 1024 * 1024  # 1MB
+GZIP_COMPRESS_LEVEL = 6  # default of gzip command (9 of gzip module is much slower for little gain)
+OUTPUT_DIR_OPTION = '--outputDir'
+GZIP_OPTION = '--gzip'
+FLOAT_FORMAT_OPTION = '--floatFormat'
+output_options: Dict = {'dir': OUTPUT_DIR, 'is_gzip': False, 'float_format': None}  # set by set_output_options
+PROFILE_OPTION = '--profile'
+PROFILE_STATS_OPTION = '--profileStats'
+PROFILE_PHASES = ['read', 'parse', 'summarize', 'write', 'render']  # order of profile result
+BYTES_PER_MB = 1024 * 1024
+profile_state: Dict = {'is_enabled': False, 'start': (0.0, 0.0), 'stack': [], 'profiler': None, 'stats_path': None}
+phase_results: Dict[str, List] = {}  # key: phase, value: [count, wall seconds, cpu seconds, peak bytes]
+date_string_cache: Dict[int, str] = {}  # key: days from epoch, value: 'YYYY/mm/dd'
+
+
+def set_profile_options(args: List[str]):
+    """
+    Description:
+        start profiling when --profile (or --profileStats FILE) is specified. wall time, cpu time and
+        allocation peak (tracemalloc) of each phase are printed at exit, and cProfile stats are dumped to FILE
+        with --profileStats. times include the overhead of tracemalloc.
+    :param args: command line arguments
+    :return: void
+    """
+    if PROFILE_OPTION not in args and PROFILE_STATS_OPTION not in args:
+        return
+    profile_state['is_enabled'] = True
+    profile_state['start'] = (time.perf_counter(), get_cpu_seconds())
+    tracemalloc.start()
+    profile_state['stats_path'] = get_option_value(PROFILE_STATS_OPTION, args)
+    if profile_state['stats_path'] is not None:
+        profile_state['profiler'] = cProfile.Profile()
+        profile_state['profiler'].enable()
+    atexit.register(print_profile_result)
+
+
+def get_cpu_seconds() -> float:
+    # cpu time of this process and finished child processes (worker processes of --parallel)
+    times = os.times()
+    return times.user + times.system + times.children_user + times.children_system
+
+
+@contextmanager
+def profile_phase(phase: str):
+    """
+    Description:
+        record wall time, cpu time and allocation peak of phase (usable as decorator too).
+        time of nested phase is excluded from the outer phase (ex. read in parse), and allocation peak is
+        recorded by the outermost phase only.
+    :param phase: phase name (PROFILE_PHASES).
+    :return: context manager
+    """
+    if not profile_state['is_enabled']:
+        yield
+        return
+    stack: List[List[float]] = profile_state['stack']
+    is_outermost = not stack
+    if is_outermost:
+        tracemalloc.reset_peak()
+    nested_seconds = [0.0, 0.0]  # wall and cpu seconds of nested phases
+    stack.append(nested_seconds)
+    start_wall, start_cpu = time.perf_counter(), get_cpu_seconds()
+    try:
+        yield
+    finally:
+        wall = time.perf_counter() - start_wall
+        cpu = get_cpu_seconds() - start_cpu
+        stack.pop()
+        if stack:
+            stack[-1][0] += wall
+            stack[-1][1] += cpu
+        result = phase_results.setdefault(phase, [0, 0.0, 0.0, None])
+        result[0] += 1
+        result[1] += wall - nested_seconds[0]
+        result[2] += cpu - nested_seconds[1]
+        if is_outermost:
+            result[3] = max(result[3] or 0, tracemalloc.get_traced_memory()[1])
+
+
+def print_profile_result():
+    """
+    Description:
+        print wall time, cpu time and allocation peak per phase. other is the time out of phases
+        (imports, waiting graph window, ...). cProfile stats are dumped when --profileStats is specified.
+    :return: void
+    """
+    total_wall = time.perf_counter() - profile_state['start'][0]
+    total_cpu = get_cpu_seconds() - profile_state['start'][1]
+    phases = [phase for phase in PROFILE_PHASES if phase in phase_results] + \
+             [phase for phase in phase_results if phase not in PROFILE_PHASES]
+    rows = [[phase] + phase_results[phase] for phase in phases]
+    rows.append(['other', '', total_wall - sum(row[2] for row in rows), total_cpu - sum(row[3] for row in rows), None])
+    print('{:10s} {:>6s} {:>10s} {:>10s} {:>7s} {:>16s}'.format('phase', 'calls', 'wall [s]', 'cpu [s]', 'wall %',
+                                                               'peak alloc [MB]'))
+    for phase, count, wall, cpu, peak in rows:
+        print('{:10s} {:>6} {:10.3f} {:10.3f} {:6.1f}% {:>16s}'.format(
+            phase, count, wall, cpu, wall * 100 / total_wall if total_wall > 0 else 0.0,
+            '{:.1f}'.format(peak / BYTES_PER_MB) if peak is not None else '-'))
+    print('{:10s} {:>6s} {:10.3f} {:10.3f}'.format('total', '', total_wall, total_cpu))
+    if profile_state['profiler'] is not None:
+        profile_state['profiler'].disable()
+        profile_state['profiler'].dump_stats(profile_state['stats_path'])
+        print('cProfile stats: {} (python -m pstats {})'.format(profile_state['stats_path'],
+                                                                profile_state['stats_path']))
+
+
+def set_output_options(args: List[str]):
+    """
+    Description:
+        set output options common to all analyzers from command line arguments.
+        --outputDir DIR : output folder (default ../output/). created when it doesn't exist.
+        --gzip : output csv.gz instead of csv
+        --floatFormat FORMAT : format of decimal values in csv (ex. .2f). default is as it is.
+    :param args: command line arguments
+    :return: void
+    """
+    output_dir = get_option_value(OUTPUT_DIR_OPTION, args)
+    if output_dir is not None:
+        # created before parsing, so that a wrong folder doesn't fail after the whole parse
+        os.makedirs(output_dir, exist_ok=True)
+    output_options['dir'] = output_dir or OUTPUT_DIR
+    output_options['is_gzip'] = GZIP_OPTION in args
+    output_options['float_format'] = get_option_value(FLOAT_FORMAT_OPTION, args)
+
+
+def get_output_file_path(filename: str, extension: str, output_dir: Optional[str] = None) -> str:
+    return os.path.join(output_dir or output_options['dir'], filename + extension)
+
+
+def open_csv_output_file(filename: str, output_dir: Optional[str] = None) -> TextIO:
+    """
+    Description:
+        open csv output file with large write buffer. csv.gz is opened when --gzip is specified.
+    :param filename: output file name (without extension).
+    :param output_dir: output folder. default is --outputDir option.
+    :return: text file object
+    """
+    if output_options['is_gzip']:
+        return io.TextIOWrapper(io.BufferedWriter(
+            gzip.open(get_output_file_path(filename, '.csv' + GZIP_EXTENSION, output_dir), 'wb',
+                      compresslevel=GZIP_COMPRESS_LEVEL), buffer_size=WRITE_BUFFER_SIZE), newline='')
+    return open(get_output_file_path(filename, '.csv', output_dir), 'w', newline='', buffering=WRITE_BUFFER_SIZE)
+
+
+def format_float_value(value, float_format: str):
+    if isinstance(value, float) or (isinstance(value, str) and '.' in value):
+        try:
+            return format(float(value), float_format)
+        except ValueError:
+            return value
+    return value
+
 
+def iterate_output_rows(array2d: Iterable, columns: Optional[List[int]], float_format: Optional[str]) -> Iterable:
+    """
+    Description:
+        iterate rows of output. columns are projected by itemgetter (no list per row is created in python code),
+        and decimal values are formatted only when float format is specified.
+    :param array2d: 2d array (row: date time, column: value). row 0 is date time.
+    :param columns: column indexes to output in this order. None is all columns.
+    :param float_format: format of decimal values. None is as it is.
+    :return: rows
+    """
+    rows = array2d
+    if columns is not None:
+        rows = map(itemgetter(*columns), rows) if len(columns) > 1 else ((row[columns[0]],) for row in rows)
+    if float_format is not None:
+        rows = ([format_float_value(value, float_format) for value in row] for row in rows)
+    return rows
 
-def write_csv_file(filename: str, header: List[str], array2d: List[List[str]]):
+
+@profile_phase('write')
+def write_csv_file(filename: str, header: List[str], array2d: List[List[str]], columns: Optional[List[int]] = None,
+                   output_dir: Optional[str] = None):
     """
     Description:
         output csv file (row: date time, column: process)
     :param filename: output file name.
     :param header: top line of output file. top line is '' and process id.
     :param array2d: 2d array (row: date time, column: process). row 0 is date time.
+    :param columns: column indexes to output in this order (ex. top N processes, selected devices).
+                    None is all columns.
+    :param output_dir: output folder. default is --outputDir option (../output/).
     :return: void
     """
-    with open('../output/' + filename + '.csv', 'w', newline='') as csvfile:
+    with open_csv_output_file(filename, output_dir) as csvfile:
         writer = csv.writer(csvfile, lineterminator='\n')
-        writer.writerow(header)
-        writer.writerows(array2d)
+        writer.writerow(header if columns is None else [header[col] for col in columns])
+        writer.writerows(iterate_output_rows(array2d, columns, output_options['float_format']))
+
+
+def find_log_files(pattern: str) -> List[str]:
+    """
+    Description:
+        find log files of the pattern and the compressed files of them (rotated by collector).
+        ex) '../input/vmstat_*.log' -> vmstat_20210101.log.gz, vmstat_20210102.log.zst, vmstat_20210103.log
+    :param pattern: glob pattern of uncompressed log file.
+    :return: file paths sorted by name (date order).
+    """
+    file_paths = glob.glob(pattern)
+    for extension in COMPRESSED_EXTENSIONS:
+        file_paths += glob.glob(pattern + extension)
+    return sorted(file_paths)
+
+
+def is_compressed_file(file_path: str) -> bool:
+    return file_path.endswith(COMPRESSED_EXTENSIONS)
+
+
+def open_binary_log_file(file_path: str) -> BinaryIO:
+    """
+    Description:
+        open log file for binary read with large buffer. .gz and .zst files are decompressed while reading
+        (no temporary file).
+    :param file_path: log file path.
+    :return: opened file.
+    """
+    if file_path.endswith(GZIP_EXTENSION):
+        return io.BufferedReader(gzip.GzipFile(file_path, 'rb'), buffer_size=READ_BUFFER_SIZE)
+    if file_path.endswith(ZSTD_EXTENSION):
+        if zstandard is None:
+            print('zstandard package is required to read {} (pip install zstandard)'.format(file_path))
+            raise ImportError('zstandard')
+        reader = zstandard.ZstdDecompressor().stream_reader(open(file_path, 'rb'), closefd=True)
+        return io.BufferedReader(reader, buffer_size=READ_BUFFER_SIZE)
+    return open(file_path, 'rb', buffering=READ_BUFFER_SIZE)
+
+
+def open_log_file(file_path: str, encoding: str = 'utf-8_sig') -> TextIO:
+    """
+    Description:
+        open log file for text read. .gz and .zst files are decompressed while reading.
+    :param file_path: log file path.
+    :param encoding: file encoding.
+    :return: opened file.
+    """
+    return io.TextIOWrapper(open_binary_log_file(file_path), encoding=encoding)
+
+
+def iterate_log_lines(file_paths: List[str], encoding: str = 'utf-8_sig') -> Iterator[str]:
+    """
+    Description:
+        read log files line by line. lines of all files are not held in memory.
+    :param file_paths: log file paths (.gz and .zst files are decompressed while reading).
+    :param encoding: file encoding.
+    :return: iterator of log lines.
+    """
+    for file_path in file_paths:
+        with open_log_file(file_path, encoding) as f:
+            if not profile_state['is_enabled']:
+                yield from f
+                continue
+            while True:
+                # lines are read by block to measure read time (decompress, decode and split lines)
+                with profile_phase('read'):
+                    lines = f.readlines(READ_BUFFER_SIZE)
+                if not lines:
+                    break
+                yield from lines
+
+
+def split_file_chunks(file_paths: List[str], chunk_count: int) -> List[Tuple[str, int, int]]:
+    """
+    Description:
+        split log files into byte ranges for parallel analysis.
+        chunk boundaries are arbitrary byte offsets. iterate_file_chunk_lines aligns them to lines.
+        compressed file can't be read from the middle, so it is one chunk.
+    :param file_paths: log file paths.
+    :param chunk_count: chunk count per file (small file is not split under MIN_CHUNK_SIZE).
+    :return: list of (file path, start offset, end offset)
+    """
+    chunks: List[Tuple[str, int, int]] = []
+    for file_path in file_paths:
+        file_size = os.path.getsize(file_path)
+        if is_compressed_file(file_path):
+            chunks.append((file_path, 0, file_size))
+            continue
+        chunk_size = max(MIN_CHUNK_SIZE, -(-file_size // max(chunk_count, 1)))
+        for start in range(0, max(file_size, 1), chunk_size):
+            chunks.append((file_path, start, min(start + chunk_size, file_size)))
+    return chunks
+
+
+def iterate_file_chunk_lines(file_path: str, start: int, end: int, encoding: str = 'utf-8_sig') -> Iterator[str]:
+    """
+    Description:
+        read lines of byte range. a line belongs to the chunk where the line starts,
+        so the partial line at start offset is skipped and the line over end offset is read to the end.
+        compressed file is always read to the end (split_file_chunks doesn't split it).
+    :param file_path: log file path.
+    :param start: start offset.
+    :param end: end offset.
+    :param encoding: file encoding.
+    :return: iterator of log lines.
+    """
+    if is_compressed_file(file_path):
+        with open_log_file(file_path, encoding) as f:
+            yield from f
+        return
+    with open_binary_log_file(file_path) as f:
+        if start > 0:
+            f.seek(start - 1)
+            # skip the rest of the line which started in the previous chunk
+            f.readline()
+        position = f.tell()
+        while position < end:
+            line = f.readline()
+            if not line:
+                break
+            yield line.decode(encoding if position == 0 else 'utf-8', errors='replace')
+            position += len(line)
+
+
+def get_option_value(option: str, args: List[str]) -> Optional[str]:
+    """
+    Description:
+        get value of command line option (value is the next argument of option).
+    :param option: option name
+    :param args: command line arguments
+    :return: option value. None when option is not specified.
+    """
+    if option not in args:
+        return None
+    index = args.index(option)
+    if index + 1 >= len(args):
+        print('{} requires value'.format(option))
+        raise ValueError(option)
+    return args[index + 1]
 
 
 def convert_date_time(datetime: str, date_time_format: str = DATETIME_FORMAT):
     return dt.datetime.strptime(datetime, date_time_format)
 
 
+def days_from_civil(year: int, month: int, day: int) -> int:
+    """
+    Description:
+        convert date to days from 1970/01/01 without creating datetime object.
+    :param year: year
+    :param month: month (1-12)
+    :param day: day (1-31)
+    :return: days from 1970/01/01
+    """
+    y = year - 1 if month <= 2 else year
+    era = y // 400
+    year_of_era = y - era * 400
+    day_of_year = (153 * (month - 3 if month > 2 else month + 9) + 2) // 5 + day - 1
+    day_of_era = year_of_era * 365 + year_of_era // 4 - year_of_era // 100 + day_of_year
+    return era * 146097 + day_of_era - 719468
+
+
+def convert_to_seconds(year: int, month: int, day: int, hour: int, minute: int, second: int) -> int:
+    """
+    Description:
+        convert date time fields to seconds from 1970/01/01 00:00:00.
+        log date time is local time, so seconds are counted on the log's wall clock (no time zone conversion).
+    :return: seconds
+    """
+    return days_from_civil(year, month, day) * SECONDS_PER_DAY + hour * 3600 + minute * 60 + second
+
+
+def convert_log_date_time_to_seconds(date: str, time: str) -> Optional[int]:
+    """
+    Description:
+        convert date time added to log line by collector ('YYYY/mm/dd', 'HH:MM:SS') to seconds without strptime.
+    :param date: 'YYYY/mm/dd'
+    :param time: 'HH:MM:SS'
+    :return: seconds. None when the format is invalid.
+    """
+    if len(date) != 10 or len(time) != 8 or date[4] != '/' or date[7] != '/' or time[2] != ':' or time[5] != ':':
+        return None
+    try:
+        return convert_to_seconds(int(date[0:4]), int(date[5:7]), int(date[8:10]),
+                                  int(time[0:2]), int(time[3:5]), int(time[6:8]))
+    except ValueError:
+        return None
+
+
+def convert_date_time_to_seconds(date_time: dt.datetime) -> int:
+    return (date_time - EPOCH_DATE_TIME) // dt.timedelta(seconds=1)
+
+
+def convert_seconds_to_date_time(seconds: int) -> dt.datetime:
+    return EPOCH_DATE_TIME + dt.timedelta(seconds=seconds)
+
+
+def convert_filter_seconds(filter_time: Optional) -> Optional[int]:
+    """
+    Description:
+        convert filter date time (command line option) to seconds. None is kept.
+    :param filter_time: filter date time or None
+    :return: seconds or None
+    """
+    if filter_time is None:
+        return None
+    return convert_date_time_to_seconds(filter_time)
+
+
+def format_seconds(seconds: int) -> str:
+    """
+    Description:
+        format seconds to 'YYYY/mm/dd HH:MM:SS'. date part is cached per day.
+    :param seconds: seconds from 1970/01/01 00:00:00
+    :return: date time string
+    """
+    days, time_seconds = divmod(seconds, SECONDS_PER_DAY)
+    date_string = date_string_cache.get(days)
+    if date_string is None:
+        date_string = (EPOCH_DATE_TIME + dt.timedelta(days=days)).strftime('%Y/%m/%d')
+        date_string_cache[days] = date_string
+    hour, time_seconds = divmod(time_seconds, 3600)
+    minute, second = divmod(time_seconds, 60)
+    return '{} {:02d}:{:02d}:{:02d}'.format(date_string, hour, minute, second)
+
+
+def is_contain_range_seconds(seconds: int, filter_start_seconds: Optional[int],
+                             filter_end_seconds: Optional[int]) -> bool:
+    """
+    Description:
+        check contain date time range from start to end (seconds version of is_contain_rage_from_start_to_end)
+    :param seconds: date time seconds
+    :param filter_start_seconds: output to start date time seconds.
+    :param filter_end_seconds: output to end date time seconds.
+    :return: true/false
+    """
+    if filter_start_seconds is not None and seconds < filter_start_seconds:
+        return False
+    if filter_end_seconds is not None and seconds > filter_end_seconds:
+        return False
+    return True
+
+
 def convert_option_date_time(option: str, args: List[str]):
     """
     Description:
@@ -44,6 +480,126 @@ def convert_option_date_time(option: str, args: List[str]):
             raise
 
 
+def get_column_index(name: str, column_names: List[str], column_indexes: Dict[str, int]) -> int:
+    """
+    Description:
+        get column index of name. new name (ex. device added while collecting) is assigned the next column.
+    :param name: column name (device name, process id, ...).
+    :param column_names: column names in order of appearance.
+    :param column_indexes: map of column name and column index.
+    :return: column index (not include date time column).
+    """
+    index = column_indexes.get(name)
+    if index is None:
+        index = len(column_names)
+        column_names.append(name)
+        column_indexes[name] = index
+    return index
+
+
+def convert_sparse_records_to_array2d(sparse_records: List[Tuple[str, Dict[int, str]]],
+                                      column_count: int) -> List[List[str]]:
+    """
+    Description:
+        convert sparse records to 2d array. missing value is ''.
+    :param sparse_records: list of (date time, map of column index and value).
+    :param column_count: column count (not include date time column).
+    :return: 2d array (row: date time, column: value). row 0 is date time.
+    """
+    array2d: List[List[str]] = []
+    for date_time, value_dict in sparse_records:
+        record: List[str] = [''] * (column_count + 1)
+        record[0] = date_time
+        for index, value in value_dict.items():
+            record[index + 1] = value
+        array2d.append(record)
+    return array2d
+
+
+def iterate_jsonl_records(file_paths: List[str], record_type: str) -> Iterator[Dict]:
+    """
+    Description:
+        iterate records of the type in JSON lines logs written by collector (getstatlog.py --format jsonl).
+        lines of other types are skipped before decoding, and partial line (collector stopped while writing) is ignored.
+    :param file_paths: log file paths (statlog_yyyymmdd.jsonl)
+    :param record_type: vmstat, free, iostat_cpu, iostat_dev, iostat_x_dev, df, df_inode, proc or collector
+    :return: records (dict)
+    """
+    type_string = JSONL_TYPE_FORMAT.format(record_type)
+    for line in iterate_log_lines(file_paths):
+        if type_string not in line:
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError:
+            continue
+        if record.get('type') == record_type:
+            yield record
+
+
+def get_jsonl_record_seconds(record: Dict) -> int:
+    # local time seconds (epoch seconds + utc offset) same as the seconds of text logs
+    return int(record['ts']) + record.get('tz', 0)
+
+
+def iterate_jsonl_samples(file_paths: List[str], record_type: str, key_field: str) -> Iterator[Tuple[int, Dict]]:
+    """
+    Description:
+        iterate samples of the type which has one record per key (device, filesystem or process) in JSON lines logs.
+        records of one sample have the same time and are written in a row by collector.
+    :param file_paths: log file paths (statlog_yyyymmdd.jsonl)
+    :param record_type: iostat_dev, iostat_x_dev, df, df_inode or proc
+    :param key_field: key field of the record type (device, filesystem or pid)
+    :return: (date time seconds, map of key value and record)
+    """
+    seconds: Optional[int] = None
+    sample: Dict[str, Dict] = {}
+    for record in iterate_jsonl_records(file_paths, record_type):
+        record_seconds = get_jsonl_record_seconds(record)
+        if record_seconds != seconds:
+            if sample:
+                yield seconds, sample
+            seconds = record_seconds
+            sample = {}
+        sample[str(record.get(key_field, ''))] = record
+    if sample:
+        yield seconds, sample
+
+
+def load_jsonl_array2d(file_paths: List[str], record_type: str, fields: List[str],
+                       filter_start_time: Optional = None, filter_end_time: Optional = None
+                       ) -> Tuple[List[int], List[str], List[List]]:
+    """
+    Description:
+        load JSON lines logs of the type which has one record per sample to 2d array of numeric values
+        (no text tokenizing). the type which has one record per key is got by iterate_jsonl_samples.
+    :param file_paths: log file paths (statlog_yyyymmdd.jsonl)
+    :param record_type: vmstat, free, iostat_cpu or collector
+    :param fields: value fields (columns).
+    :param filter_start_time: output to start date time.
+    :param filter_end_time: output to end date time.
+    :return: (date time seconds of each row, column names,
+              2d array (row: date time, column: value). row 0 is date time.)
+    """
+    filter_start_seconds = convert_filter_seconds(filter_start_time)
+    filter_end_seconds = convert_filter_seconds(filter_end_time)
+    times: List[int] = []
+    array2d: List[List] = []
+    for record in iterate_jsonl_records(file_paths, record_type):
+        seconds = get_jsonl_record_seconds(record)
+        if not is_contain_range_seconds(seconds, filter_start_seconds, filter_end_seconds):
+            continue
+        row = [format_seconds(seconds)] + [record.get(field, '') for field in fields]
+        if times and times[-1] == seconds:
+            # same second is written twice (ex. collector restarted), the last record is used
+            array2d[-1] = row
+            continue
+        times.append(seconds)
+        array2d.append(row)
+    return times, list(fields), array2d
+
+
+@profile_phase('summarize')
 def create_max_value_row(array2d: List[List[str]]) -> List[str]:
     """
     Description:
@@ -65,6 +621,7 @@ def create_max_value_row(array2d: List[List[str]]) -> List[str]:
     return max_values
 
 
+@profile_phase('summarize')
 def create_average_value_row(array2d: List[List[str]]) -> List[str]:
     """
     Description:
@@ -0,0 +1,181 @@
+"""
+analyze collector overhead log (collector_yyyymmdd.log written by getstatlog.sh and getstatlog.py)
+and output csv file (row: time, column: overhead value)
+    option:
+        --jsonl : analyze statlog_yyyymmdd.jsonl (getstatlog.py --format jsonl) instead of collector log
+        --startTime "YYYY/mm/dd HH:MM:ss" : output start date time filter
+        --endTime "YYYY/mm/dd HH:MM:ss" : output end date time filter
+"""
+import sys
+from typing import Optional, List, Iterable
+
+import matplotlib.dates as mdates
+import matplotlib.pyplot as plt
+
+from analyzeTool.analysis_util import find_log_files, convert_option_date_time, write_csv_file, \
+    create_max_value_row, create_average_value_row, iterate_log_lines, convert_filter_seconds, \
+    convert_log_date_time_to_seconds, is_contain_range_seconds, format_seconds, convert_seconds_to_date_time, \
+    load_jsonl_array2d, set_output_options, profile_phase, set_profile_options
+
+# Constant Value
+DATE_INDEX = 0
+TIME_INDEX = 1
+VALUE_START_INDEX = 2
+# date time  cpu[ms] rss[KB] forks written[bytes] interval[ms] jitter[ms]
+COLLECTOR_LABELS = ['cpu', 'rss', 'forks', 'written', 'interval', 'jitter']
+CPU_VALUE = 0
+RSS_VALUE = 1
+FORKS_VALUE = 2
+WRITTEN_VALUE = 3
+INTERVAL_VALUE = 4
+JITTER_VALUE = 5
+OUTPUT_HEADER = ['', 'cpu [ms]', 'cpu [%]', 'rss [KB]', 'forks', 'written [bytes]', 'written [KB/s]',
+                 'interval [ms]', 'jitter [ms]']
+CPU_RATE_COLUMN = 2
+RSS_COLUMN = 3
+FORKS_COLUMN = 4
+WRITTEN_RATE_COLUMN = 6
+INTERVAL_COLUMN = 7
+JITTER_COLUMN = 8
+
+# Variables
+START_DATETIME_OPTION = '--startTime'
+END_DATETIME_OPTION = '--endTime'
+JSONL_OPTION = '--jsonl'
+JSONL_RECORD_TYPE = 'collector'
+OUTPUT_FILE_NAME = 'collector_result'
+
+
+def create_collector_record(date_time: str, values: List[int]) -> List:
+    """
+    Description:
+        create output row from collector values. cpu and written are also converted to rates per interval.
+    :param date_time: date time of the sample.
+    :param values: values in order of COLLECTOR_LABELS.
+    :return: row in order of OUTPUT_HEADER
+    """
+    interval_ms = values[INTERVAL_VALUE]
+    cpu_rate = round(values[CPU_VALUE] * 100.0 / interval_ms, 2) if interval_ms > 0 else ''
+    written_rate = round(values[WRITTEN_VALUE] / interval_ms, 2) if interval_ms > 0 else ''  # bytes/ms = KB/s
+    return [date_time, values[CPU_VALUE], cpu_rate, values[RSS_VALUE], values[FORKS_VALUE], values[WRITTEN_VALUE],
+            written_rate, interval_ms, values[JITTER_VALUE]]
+
+
+@profile_phase('parse')
+def analyze_collector_log_lines(lines: Iterable[str], filter_start_time: Optional, filter_end_time: Optional,
+                                times: List[int], array2d: List[List]):
+    """
+    Description:
+        analyze collector log lines. lines which are not all numbers (ex. partial line) are skipped.
+    :param lines: log lines.
+    :param filter_start_time: output to start date time.
+    :param filter_end_time: output to end date time.
+    :param times: date time seconds of each row.
+    :param array2d: 2d array (row: date time, column: overhead value). row 0 is date time.
+    :return: void
+    """
+    filter_start_seconds = convert_filter_seconds(filter_start_time)
+    filter_end_seconds = convert_filter_seconds(filter_end_time)
+    for line in lines:
+        line_columns: List[str] = line.split()
+        if len(line_columns) != VALUE_START_INDEX + len(COLLECTOR_LABELS):
+            continue
+        try:
+            values = [int(value) for value in line_columns[VALUE_START_INDEX:]]
+        except ValueError:
+            continue
+        seconds = convert_log_date_time_to_seconds(line_columns[DATE_INDEX], line_columns[TIME_INDEX])
+        if seconds is None or not is_contain_range_seconds(seconds, filter_start_seconds, filter_end_seconds):
+            continue
+        times.append(seconds)
+        array2d.append(create_collector_record(format_seconds(seconds), values))
+
+
+@profile_phase('render')
+def view_line_graph(times: List[int], array2d: List[List]):
+    """
+    Description:
+        create and view line graph (cpu and write rate, rss and forks, interval jitter) by matplotlib.
+    :param times: date time seconds of each row.
+    :param array2d: 2d array (row: date time, column: overhead value). row 0 is date time.
+    :return: void
+    """
+    times = [convert_seconds_to_date_time(seconds) for seconds in times]
+    fig, (ax_top, ax_middle, ax_under) = plt.subplots(nrows=3, ncols=1, sharex=True)
+    fig.subplots_adjust(bottom=0.2, top=0.95)
+    for ax, title, columns in [(ax_top, 'Collector CPU and Write', [CPU_RATE_COLUMN, WRITTEN_RATE_COLUMN]),
+                               (ax_middle, 'Collector RSS and Forks', [RSS_COLUMN, FORKS_COLUMN]),
+                               (ax_under, 'Sampling Interval and Jitter', [INTERVAL_COLUMN, JITTER_COLUMN])]:
+        for col in columns:
+            ax.plot(times, [record[col] if record[col] != '' else None for record in array2d],
+                    label=OUTPUT_HEADER[col])
+        ax.set_title(title)
+        ax.set_xlabel('Time')
+        ax.legend()
+        ax.grid()
+    ax_under.xaxis.set_major_locator(mdates.DayLocator(bymonthday=None, interval=1, tz=None))
+    ax_under.xaxis.set_major_formatter(mdates.DateFormatter('%Y/%m/%d'))
+    plt.xticks(rotation=30)
+    plt.subplots_adjust(hspace=0.3)
+
+
+@profile_phase('parse')
+def analyze_collector_jsonl(file_paths: List[str], filter_start_time: Optional, filter_end_time: Optional,
+                            times: List[int], array2d: List[List]):
+    """
+    Description:
+        analyze collector records of JSON lines logs (getstatlog.py --format jsonl). values are numbers.
+    :param file_paths: log file paths (statlog_yyyymmdd.jsonl)
+    :param filter_start_time: output to start date time.
+    :param filter_end_time: output to end date time.
+    :param times: date time seconds of each row.
+    :param array2d: 2d array (row: date time, column: overhead value). row 0 is date time.
+    :return: void
+    """
+    jsonl_times, _, jsonl_array2d = load_jsonl_array2d(file_paths, JSONL_RECORD_TYPE, COLLECTOR_LABELS,
+                                                       filter_start_time, filter_end_time)
+    for seconds, record in zip(jsonl_times, jsonl_array2d):
+        if '' in record:
+            continue
+        times.append(seconds)
+        array2d.append(create_collector_record(record[0], record[1:]))
+
+
+def analyze_collector_log(file_paths: List[str], filter_start_time: Optional, filter_end_time: Optional,
+                          is_jsonl: bool):
+    times: List[int] = []
+    collector_array2d: List[List] = []
+    if is_jsonl:
+        analyze_collector_jsonl(file_paths, filter_start_time, filter_end_time, times, collector_array2d)
+    else:
+        analyze_collector_log_lines(iterate_log_lines(file_paths), filter_start_time, filter_end_time, times,
+                                    collector_array2d)
+    view_line_graph(times, collector_array2d)
+    max_row = ['MAX:'] + create_max_value_row(collector_array2d)
+    average_row = ['AVG:'] + create_average_value_row(collector_array2d)
+    collector_array2d += [max_row, average_row]
+    write_csv_file(OUTPUT_FILE_NAME, OUTPUT_HEADER, collector_array2d)
+    plt.show()
+
+
+def main(args: List[str]):
+    """
+
+    :param args: command line arguments
+    :return: void
+    """
+    filter_start_time: Optional = None
+    filter_end_time: Optional = None
+    set_output_options(args)
+    set_profile_options(args)
+    if START_DATETIME_OPTION in args:
+        filter_start_time = convert_option_date_time(START_DATETIME_OPTION, args)
+    if END_DATETIME_OPTION in args:
+        filter_end_time = convert_option_date_time(END_DATETIME_OPTION, args)
+    is_jsonl = JSONL_OPTION in args
+    file_paths: List[str] = find_log_files("../input/statlog_*.jsonl" if is_jsonl else "../input/collector_*.log")
+    analyze_collector_log(file_paths, filter_start_time, filter_end_time, is_jsonl)
+
+
+if __name__ == '__main__':
+    main(sys.argv)
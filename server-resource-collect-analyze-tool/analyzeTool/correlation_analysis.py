@@ -0,0 +1,281 @@
+"""
+correlation of all series (vmstat, iostat, free, top processes, ...) in input folder.
+    series are got by the same loaders as html_report.py and averaged on a common time grid (--gridSeconds).
+    correlation of each pair is calculated for lags from -maxLag to +maxLag grid steps, and pairs are ranked by
+    the absolute value of the strongest lag. (ex. process cpu of a batch and vmstat wa with lag 0 or 1)
+    correlation of a pair at a lag uses mean and standard deviation of the points where both series have values,
+    and correlations of all pairs at one lag are calculated by matrix products (numpy). spearman is pearson of ranks.
+    missing values of top processes are 0 (process is not listed), and the other missing values are excluded.
+    output:
+        correlation_matrix.csv : correlation matrix at lag 0
+        correlation_top_pairs.csv : top pairs (series A, series B, correlation, lag, correlation at lag 0, points)
+    option:
+        --method pearson|spearman : correlation method (default pearson)
+        --gridSeconds N : grid size [sec] (default 60)
+        --maxLag N : max lag [grid steps] (default 5)
+        --topPairs N : number of pairs to output (default 30)
+        --target REGEX : output only pairs which one of the series name matches (ex. 'iowait|wa$')
+        --topN N : number of top processes (cpu and memory) as series (default 10)
+        --proc : use proc log (getstatlog.py --process) instead of top log
+        --groupByDisk : iostat per disk instead of per partition
+        --startTime "YYYY/mm/dd HH:MM:ss" : output start date time filter
+        --endTime "YYYY/mm/dd HH:MM:ss" : output end date time filter
+"""
+import re
+import sys
+from typing import List, Dict, Optional, Tuple, Pattern
+
+import numpy as np
+from analyzeTool.analysis_util import convert_option_date_time, get_option_value, write_csv_file, format_seconds, \
+    set_output_options, profile_phase, set_profile_options
+from analyzeTool import html_report
+
+# Constant Value
+PEARSON = 'pearson'
+SPEARMAN = 'spearman'
+METHODS = [PEARSON, SPEARMAN]
+MIN_VALID_POINTS = 10  # series (and overlap of pair) which has less points is skipped
+MIN_VARIANCE_RATE = 1e-9  # variance in overlap less than this rate of sum of squares is constant (rounding error)
+MATRIX_OUTPUT_FILE_NAME = 'correlation_matrix'
+TOP_PAIRS_OUTPUT_FILE_NAME = 'correlation_top_pairs'
+
+# Variables
+START_DATETIME_OPTION = '--startTime'
+END_DATETIME_OPTION = '--endTime'
+PROC_OPTION = '--proc'
+GROUP_BY_DISK_OPTION = '--groupByDisk'
+METHOD_OPTION = '--method'
+GRID_SECONDS_OPTION = '--gridSeconds'
+MAX_LAG_OPTION = '--maxLag'
+TOP_PAIRS_OPTION = '--topPairs'
+TARGET_OPTION = '--target'
+TOP_N_OPTION = '--topN'
+GRID_SECONDS = 60
+MAX_LAG = 5
+TOP_PAIRS = 30
+TOP_N = 10
+
+
+def load_series_panels(filter_start_time: Optional, filter_end_time: Optional, is_proc: bool,
+                       is_group_by_disk: bool, top_n: int) -> List[Tuple[Dict, bool]]:
+    """
+    Description:
+        load panels of all logs by loaders of html_report.
+    :return: list of (panel, missing value is 0). missing value of top process is 0 (process is not listed).
+    """
+    panels = [(panel, False) for panel in html_report.load_vmstat_panels(filter_start_time, filter_end_time)]
+    panels += [(panel, False) for panel in html_report.load_iostat_cpu_panels(filter_start_time, filter_end_time)]
+    panels += [(panel, False) for panel in html_report.load_free_panels(filter_start_time, filter_end_time)]
+    panels += [(panel, True) for panel in html_report.load_top_panels(filter_start_time, filter_end_time, is_proc,
+                                                                      top_n)]
+    panels += [(panel, False) for panel in html_report.load_iostat_panels(filter_start_time, filter_end_time,
+                                                                          is_group_by_disk)]
+    panels += [(panel, False) for panel in html_report.load_iostat_dev_panels(filter_start_time, filter_end_time,
+                                                                              is_group_by_disk)]
+    return panels
+
+
+@profile_phase('summarize')
+def create_grid_series(panels: List[Tuple[Dict, bool]], grid_seconds: int) \
+        -> Tuple[List[int], List[str], List[List[Optional[float]]]]:
+    """
+    Description:
+        average all series of panels on the common time grid (from the first to the last bucket of all series).
+    :param panels: list of (panel, missing value is 0)
+    :param grid_seconds: grid size [sec]
+    :return: (grid start seconds, series names, values per series on grid. None is missing value)
+    """
+    aggregated = []
+    for panel, is_zero_missing in panels:
+        if not panel['times']:
+            continue
+        bucket_times, average_columns, _ = html_report.aggregate_level(panel['times'], panel['columns'],
+                                                                       grid_seconds)
+        aggregated.append((panel, is_zero_missing, bucket_times, average_columns))
+    if not aggregated:
+        return [], [], []
+    grid_start = min(bucket_times[0] for _, _, bucket_times, _ in aggregated)
+    grid_end = max(bucket_times[-1] for _, _, bucket_times, _ in aggregated)
+    grid_times = list(range(grid_start, grid_end + grid_seconds, grid_seconds))
+    names: List[str] = []
+    series: List[List[Optional[float]]] = []
+    for panel, is_zero_missing, bucket_times, average_columns in aggregated:
+        indexes = [(time - grid_start) // grid_seconds for time in bucket_times]
+        for name, averages in zip(panel['names'], average_columns):
+            values: List[Optional[float]] = [0.0 if is_zero_missing else None] * len(grid_times)
+            for index, value in zip(indexes, averages):
+                if value is not None:
+                    values[index] = value
+            names.append('{}: {}'.format(panel['title'], name))
+            series.append(values)
+    return grid_times, names, series
+
+
+def rank_values(values: List[Optional[float]]) -> List[Optional[float]]:
+    """
+    Description:
+        convert values to ranks (1 origin, tie is average rank) for spearman correlation. None is kept.
+    :param values: values (None is missing value)
+    :return: ranks
+    """
+    order = sorted((index for index, value in enumerate(values) if value is not None), key=lambda i: values[i])
+    ranks: List[Optional[float]] = [None] * len(values)
+    start = 0
+    while start < len(order):
+        end = start
+        while end + 1 < len(order) and values[order[end + 1]] == values[order[start]]:
+            end += 1
+        rank = (start + end) / 2 + 1
+        for position in range(start, end + 1):
+            ranks[order[position]] = rank
+        start = end + 1
+    return ranks
+
+
+def standardize_values(values: List[Optional[float]]) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+    """
+    Description:
+        standardize values ((value - mean) / standard deviation) to keep the sums of lag correlation small.
+        missing value is 0 and excluded by mask.
+    :param values: values (None is missing value)
+    :return: (standardized values, mask (1: valid, 0: missing)). None when too few points or constant.
+    """
+    mask = np.array([value is not None for value in values])
+    if np.count_nonzero(mask) < MIN_VALID_POINTS:
+        return None
+    array = np.array([0.0 if value is None else value for value in values])
+    std = array[mask].std()
+    if std <= 0:
+        return None
+    return np.where(mask, (array - array[mask].mean()) / std, 0.0), mask.astype(np.float64)
+
+
+def calculate_lag_correlations(values: np.ndarray, masks: np.ndarray, lag: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Description:
+        correlation of series i [t] and series j [t + lag] of all pairs (i, j) by matrix products.
+        mean and standard deviation are of the points where both have values (overlap of masks).
+    :param values: standardized values (row: series, column: grid). missing value is 0.
+    :param masks: masks of values (1: valid, 0: missing)
+    :param lag: lag [grid steps] (0 or more). correlation at -lag is the transposed matrix.
+    :return: (correlation matrix (nan when too few points or constant in overlap), points matrix)
+    """
+    length = max(values.shape[1] - lag, 0)
+    a_values, a_masks = values[:, :length], masks[:, :length]
+    b_values, b_masks = values[:, lag:lag + length], masks[:, lag:lag + length]
+    points = a_masks @ b_masks.T
+    a_sums = a_values @ b_masks.T
+    b_sums = a_masks @ b_values.T
+    a_squares = np.square(a_values) @ b_masks.T
+    b_squares = a_masks @ np.square(b_values).T
+    products = a_values @ b_values.T
+    with np.errstate(divide='ignore', invalid='ignore'):
+        covariances = products - a_sums * b_sums / points
+        a_variances = a_squares - np.square(a_sums) / points
+        b_variances = b_squares - np.square(b_sums) / points
+        correlations = covariances / np.sqrt(a_variances * b_variances)
+    is_invalid = (points < MIN_VALID_POINTS) | ~(a_variances > a_squares * MIN_VARIANCE_RATE) \
+        | ~(b_variances > b_squares * MIN_VARIANCE_RATE)
+    correlations[is_invalid] = np.nan
+    return correlations, points
+
+
+@profile_phase('summarize')
+def calculate_correlations(names: List[str], series: List[List[Optional[float]]], method: str, max_lag: int) \
+        -> Tuple[List[str], List[List], List[List]]:
+    """
+    Description:
+        calculate correlation matrix (lag 0) and the strongest lag of each pair.
+    :param names: series names
+    :param series: values per series on grid
+    :param method: pearson or spearman
+    :param max_lag: max lag [grid steps]
+    :return: (names of valid series, matrix rows, pair rows [A, B, correlation, lag, correlation at lag 0, points])
+    """
+    valid_names: List[str] = []
+    standardized: List[Tuple[np.ndarray, np.ndarray]] = []
+    for name, values in zip(names, series):
+        result = standardize_values(rank_values(values) if method == SPEARMAN else values)
+        if result is None:
+            print('skip constant or short series: ' + name)
+            continue
+        valid_names.append(name)
+        standardized.append(result)
+    count = len(valid_names)
+    matrix: List[List] = [[name] + [''] * count for name in valid_names]
+    pairs: List[List] = []
+    if count == 0:
+        return valid_names, matrix, pairs
+    standardized_values = np.array([values for values, _ in standardized])
+    masks = np.array([mask for _, mask in standardized])
+    # lag 0 first, so the strongest lag is 0 when it ties with other lags
+    lags = [0] + [lag for lag in range(-max_lag, max_lag + 1) if lag != 0]
+    lag_results = [calculate_lag_correlations(standardized_values, masks, lag) for lag in range(max_lag + 1)]
+    correlations = np.array([lag_results[lag][0] if lag >= 0 else lag_results[-lag][0].T for lag in lags])
+    points = np.array([lag_results[lag][1] if lag >= 0 else lag_results[-lag][1].T for lag in lags])
+    best_indexes = np.argmax(np.nan_to_num(np.abs(correlations), nan=-1.0), axis=0)
+    for i in range(count):
+        matrix[i][i + 1] = 1.0
+        for j in range(i + 1, count):
+            zero_lag_correlation = None if np.isnan(correlations[0, i, j]) else float(correlations[0, i, j])
+            if zero_lag_correlation is not None:
+                matrix[i][j + 1] = zero_lag_correlation
+                matrix[j][i + 1] = zero_lag_correlation
+            best_index = best_indexes[i, j]
+            if not np.isnan(correlations[best_index, i, j]):
+                pairs.append([valid_names[i], valid_names[j], float(correlations[best_index, i, j]),
+                              lags[best_index], zero_lag_correlation, int(points[best_index, i, j])])
+    return valid_names, matrix, pairs
+
+
+def select_top_pairs(pairs: List[List], target: Optional[Pattern], top_pairs: int) -> List[List]:
+    if target is not None:
+        pairs = [pair for pair in pairs if target.search(pair[0]) or target.search(pair[1])]
+    return sorted(pairs, key=lambda pair: abs(pair[2]), reverse=True)[:top_pairs]
+
+
+def main(args: List[str]):
+    """
+    Description:
+        calculate correlation matrix and top correlated pairs of all series in input folder.
+    :param args: command line arguments
+    :return: void
+    """
+    filter_start_time: Optional = None
+    filter_end_time: Optional = None
+    set_output_options(args)
+    set_profile_options(args)
+    if START_DATETIME_OPTION in args:
+        filter_start_time = convert_option_date_time(START_DATETIME_OPTION, args)
+    if END_DATETIME_OPTION in args:
+        filter_end_time = convert_option_date_time(END_DATETIME_OPTION, args)
+    method = get_option_value(METHOD_OPTION, args) or PEARSON
+    if method not in METHODS:
+        raise ValueError('unknown method: {} (method: {})'.format(method, ', '.join(METHODS)))
+    grid_seconds = int(get_option_value(GRID_SECONDS_OPTION, args) or GRID_SECONDS)
+    max_lag = int(get_option_value(MAX_LAG_OPTION, args) or MAX_LAG)
+    top_pairs = int(get_option_value(TOP_PAIRS_OPTION, args) or TOP_PAIRS)
+    target_option = get_option_value(TARGET_OPTION, args)
+    target = re.compile(target_option) if target_option is not None else None
+    top_n = int(get_option_value(TOP_N_OPTION, args) or TOP_N)
+    panels = load_series_panels(filter_start_time, filter_end_time, PROC_OPTION in args, GROUP_BY_DISK_OPTION in args,
+                                top_n)
+    grid_times, names, series = create_grid_series(panels, grid_seconds)
+    if not grid_times:
+        print('no log in input folder')
+        return
+    print('{} series, {} grid points ({} - {})'.format(len(names), len(grid_times), format_seconds(grid_times[0]),
+                                                      format_seconds(grid_times[-1])))
+    valid_names, matrix, pairs = calculate_correlations(names, series, method, max_lag)
+    write_csv_file(MATRIX_OUTPUT_FILE_NAME, [''] + valid_names, matrix)
+    top_pair_rows = [[a, b, correlation, lag * grid_seconds, zero_lag_correlation, points]
+                     for a, b, correlation, lag, zero_lag_correlation, points
+                     in select_top_pairs(pairs, target, top_pairs)]
+    write_csv_file(TOP_PAIRS_OUTPUT_FILE_NAME,
+                   ['series A', 'series B', method, 'lag [sec]', method + ' (lag 0)', 'points'], top_pair_rows)
+    for a, b, correlation, lag_seconds, _, _ in top_pair_rows:
+        print('{:+.3f} (lag {:+d}s) {} <-> {}'.format(correlation, lag_seconds, a, b))
+
+
+if __name__ == '__main__':
+    main(sys.argv)
@@ -1,46 +1,73 @@
-import csv
 import glob
+import os
+import re
 import sys
-from typing import List, Optional, Dict
+from typing import List, Optional, Dict, Iterable, Tuple, Pattern
 
 import matplotlib.dates as mdates
 import matplotlib.pyplot as plt
-from analyzeTool.analysis_util import convert_date_time, convert_option_date_time, create_max_value_row, \
-    create_average_value_row, is_contain_rage_from_start_to_end, write_csv_file
+from analyzeTool.analysis_util import convert_option_date_time, create_max_value_row, \
+    create_average_value_row, write_csv_file, convert_to_seconds, convert_filter_seconds, is_contain_range_seconds, \
+    format_seconds, convert_seconds_to_date_time, get_option_value, iterate_log_lines, get_column_index, \
+    convert_sparse_records_to_array2d, find_log_files, set_output_options, profile_phase, set_profile_options, \
+    iterate_jsonl_samples
+from analyzeTool.df_forecast import DEFAULT_WINDOWS, parse_windows, create_forecast_rows, create_forecast_header, \
+    rank_by_urgency
 
 # Constant Value
 FILESYSTEM_INDEX = 0
-ONE_K_BLOCKS_INDEX = 1
-USED_INDEX = 2
-AVAILABLE_INDEX = 3
+ONE_K_BLOCKS_INDEX = 1  # Inodes (df -i)
+USED_INDEX = 2  # IUsed (df -i)
+AVAILABLE_INDEX = 3  # IFree (df -i)
 USE_PERCENT_INDEX = 4
 MOUNTED_ON_INDEX = 5
+DF_COLUMN_COUNT = 6
 LOG_ONE_BLOCK_START_MARK = '###### start '
-LOG_ONE_BLOCK_START_LINE_SLICE_SIZE = 7
-DATE_TIME_FORMAT = '%Y-%m-%d %H%M%S'
+BLOCK_DATE_TIME_LENGTH = 17  # YYYY-mm-dd HHMMSS
 
 # Variables
-FILESYSTEM_FILTER_TOP_STRING = '/dev/s'
+DEFAULT_FILESYSTEM_FILTER = r'^/dev/(s|hd|vd|xvd|nvme|mapper/|md|root)'
 GRAPH_TITLE = 'Disk Usage'
+INODE_GRAPH_TITLE = 'Inode Usage'
 OUTPUT_FILE_NAME = 'df_result'
+INODE_OUTPUT_FILE_NAME = 'df_inode_result'
+FORECAST_OUTPUT_FILE_NAME = 'df_forecast_result'
+INODE_FORECAST_OUTPUT_FILE_NAME = 'df_inode_forecast_result'
+FLEET_FORECAST_OUTPUT_FILE_NAME = 'df_fleet_forecast_result'
+INODE_FLEET_FORECAST_OUTPUT_FILE_NAME = 'df_inode_fleet_forecast_result'
+DF_LOG_FILE_PATTERN = 'df_[0-9]*.log'  # not match df_inode_*.log
+INODE_LOG_FILE_PATTERN = 'df_inode_*.log'
+JSONL_LOG_FILE_PATTERN = 'statlog_*.jsonl'
+JSONL_RECORD_TYPE = 'df'
+INODE_JSONL_RECORD_TYPE = 'df_inode'
 START_DATETIME_OPTION = '--startTime'
 END_DATETIME_OPTION = '--endTime'
 GRAPH_TIME_RANGE_HOUR_OPTION = '--hour'
+FORECAST_OPTION = '--forecast'
+FORECAST_WINDOWS_OPTION = '--forecastWindows'
+FLEET_OPTION = '--fleet'
+FILESYSTEM_FILTER_OPTION = '--filesystemFilter'
+INODE_OPTION = '--inode'
+JSONL_OPTION = '--jsonl'
 
 
-def view_line_graph(title: str, total: int, header: List[str], array2d: List[List[str]],
-                    is_time_range_hour_option: bool, target_col: int):
+@profile_phase('render')
+def view_line_graph(title: str, total: int, header: List[str], array2d: List[List[str]], times: List[int],
+                    is_time_range_hour_option: bool, target_col: int, y_label: str):
     """
     Description:
         create and view line graph by matplotlib.
     :param is_time_range_hour_option:
-    :param total: memory total value
+    :param total: filesystem total size [KB] (inode count when df -i)
     :param title: graph title.
-    :param header: top line of output file. top line is '' and process id.
-    :param array2d: 2d array (row: date time, column: process). row 0 is date time.
+    :param header: top line of output file. top line is '' and filesystem.
+    :param array2d: 2d array (row: date time, column: filesystem). row 0 is date time.
+    :param times: date time seconds of each row.
+    :param target_col: column of filesystem to view.
+    :param y_label: y axis label.
     :return: void
     """
-    times = [convert_date_time(array2d[i][0]) for i in range(len(array2d)) if i < len(array2d)]
+    times = [convert_seconds_to_date_time(seconds) for seconds in times]
     fig, axes = plt.subplots()
     fig.subplots_adjust(bottom=0.2, top=0.95)
     y_values = []
@@ -55,81 +82,198 @@ def view_line_graph(title: str, total: int, header: List[str], array2d: List[Lis
         axes.xaxis.set_major_formatter(mdates.DateFormatter('%Y/%m/%d'))
     axes.set_title(title)
     axes.set_xlabel('Time')
-    axes.set_ylabel('Filesystem Usage [KB]')
-    axes.set_ylim(bottom=0)
+    axes.set_ylabel(y_label)
+    axes.set_ylim(bottom=0, top=total)
     axes.legend()
     axes.grid()
     plt.xticks(rotation=30)
 
 
-def add_time_and_disk_usage_array2d(datetime: str, filesystems: List[str], filesystem_dict: Dict,
-                                    df_array2d: List[List[str]]):
-    if datetime == '':
-        return
-    record: List[str] = [''] * (len(filesystems) + 1)
-    record[0] = datetime
-    for filesystem_name in filesystem_dict.keys():
-        record[filesystems.index(filesystem_name) + 1] = filesystem_dict[filesystem_name]
-    df_array2d.append(record)  # array2d record : datetime + disk usage
+def get_date_time_seconds_in_line(line: str) -> Optional[int]:
+    """
+    Description:
+        get date time seconds of block start line. ex) '###### start 2021-01-01 000000'
+    :param line: block start line.
+    :return: seconds. None when the format is invalid.
+    """
+    date_time = line[len(LOG_ONE_BLOCK_START_MARK):].strip()
+    if len(date_time) != BLOCK_DATE_TIME_LENGTH or date_time[4] != '-' or date_time[7] != '-':
+        return None
+    try:
+        return convert_to_seconds(int(date_time[0:4]), int(date_time[5:7]), int(date_time[8:10]),
+                                  int(date_time[11:13]), int(date_time[13:15]), int(date_time[15:17]))
+    except ValueError:
+        return None
 
 
-def get_filesystem_and_total_size(lines: List[str], filesystems: List[str], filesystem_total_sizes: List[str]):
-    block_count = 0
+@profile_phase('parse')
+def analyze_df_log_lines(lines: Iterable[str], filter_start_time: Optional, filter_end_time: Optional,
+                         filesystem_filter: Pattern, filesystems: List[str], total_dict: Dict[str, str],
+                         available_dict: Dict[str, str], times: List[int], records: List[Tuple[str, Dict[int, str]]]):
+    """
+    Description:
+        analyze df log lines (df -kP or df -iP) in one pass. filesystems are added in order of appearance,
+        so filesystem mounted while collecting is added as new column.
+    :param lines: log lines.
+    :param filter_start_time: output to start date time.
+    :param filter_end_time: output to end date time.
+    :param filesystem_filter: filesystem name pattern to output.
+    :param filesystems: filesystem names in order of appearance.
+    :param total_dict: map of filesystem and total size of the last block in filter range.
+    :param available_dict: map of filesystem and available size of the last block in filter range.
+    :param times: date time seconds of each record.
+    :param records: list of (date time, map of filesystem column index and used size)
+    :return: void
+    """
+    filter_start_seconds = convert_filter_seconds(filter_start_time)
+    filter_end_seconds = convert_filter_seconds(filter_end_time)
+    filesystem_indexes: Dict[str, int] = {}
+    is_target_block = False
     for line in lines:
         if line.startswith(LOG_ONE_BLOCK_START_MARK):
-            if block_count > 0:
-                break
-        if line.startswith(FILESYSTEM_FILTER_TOP_STRING):
-            line_columns: List[str] = line.split()
-            filesystems.append(line_columns[FILESYSTEM_INDEX])
-            filesystem_total_sizes.append(line_columns[ONE_K_BLOCKS_INDEX])
-
-
-def get_date_time_in_line(line: str) -> str:
-    slice_line = line[LOG_ONE_BLOCK_START_LINE_SLICE_SIZE:]
-    date_time = slice_line[:LOG_ONE_BLOCK_START_LINE_SLICE_SIZE]
-    return date_time
+            # one block start line
+            seconds = get_date_time_seconds_in_line(line)
+            is_target_block = seconds is not None and is_contain_range_seconds(seconds, filter_start_seconds,
+                                                                               filter_end_seconds)
+            if is_target_block:
+                times.append(seconds)
+                records.append((format_seconds(seconds), {}))
+            continue
+        if not is_target_block:
+            continue
+        line_columns: List[str] = line.split()
+        if len(line_columns) != DF_COLUMN_COUNT or not filesystem_filter.match(line_columns[FILESYSTEM_INDEX]):
+            continue
+        if not line_columns[USED_INDEX].isdigit():
+            continue
+        filesystem = line_columns[FILESYSTEM_INDEX]
+        index = get_column_index(filesystem, filesystems, filesystem_indexes)
+        records[-1][1][index] = line_columns[USED_INDEX]
+        total_dict[filesystem] = line_columns[ONE_K_BLOCKS_INDEX]
+        available_dict[filesystem] = line_columns[AVAILABLE_INDEX]
 
 
-def analyze_filesystem_data_line(line, filesystems: List[str], filesystem_dict: Dict):
-    line_columns: List[str] = line.split()
-    if line_columns[FILESYSTEM_INDEX] in filesystems:
-        filesystem_dict[line_columns[FILESYSTEM_INDEX]] = line_columns[USED_INDEX]
+@profile_phase('parse')
+def analyze_df_jsonl(file_paths: List[str], filter_start_time: Optional, filter_end_time: Optional,
+                     filesystem_filter: Pattern, filesystems: List[str], total_dict: Dict[str, str],
+                     available_dict: Dict[str, str], times: List[int], records: List[Tuple[str, Dict[int, str]]],
+                     is_inode: bool):
+    """
+    Description:
+        analyze df (df_inode when is_inode) records of JSON lines logs (getstatlog.py --format jsonl).
+        parameters are the same as analyze_df_log_lines except file paths and is_inode.
+    :param file_paths: log file paths (statlog_yyyymmdd.jsonl)
+    :param is_inode: analyze inode usage (df_inode records) instead of disk usage.
+    :return: void
+    """
+    filter_start_seconds = convert_filter_seconds(filter_start_time)
+    filter_end_seconds = convert_filter_seconds(filter_end_time)
+    filesystem_indexes: Dict[str, int] = {}
+    record_type = INODE_JSONL_RECORD_TYPE if is_inode else JSONL_RECORD_TYPE
+    for seconds, sample in iterate_jsonl_samples(file_paths, record_type, 'filesystem'):
+        if not is_contain_range_seconds(seconds, filter_start_seconds, filter_end_seconds):
+            continue
+        times.append(seconds)
+        records.append((format_seconds(seconds), {}))
+        for filesystem, record in sample.items():
+            if not filesystem_filter.match(filesystem) or not isinstance(record.get('used'), int):
+                continue
+            index = get_column_index(filesystem, filesystems, filesystem_indexes)
+            records[-1][1][index] = str(record['used'])
+            total_dict[filesystem] = str(record.get('total', ''))
+            available_dict[filesystem] = str(record.get('available', ''))
 
 
-def analyze_df_log_lines(lines: List[str], filter_start_time: Optional, filter_end_time: Optional,
-                         filesystems: List[str], df_array2d: List[List[str]]):
-    filesystem_dict: Dict = {}
-    datetime = ''
-    for line in lines:
-        if not line:
-            continue
-        if line.startswith(LOG_ONE_BLOCK_START_MARK):
-            # one block start line
-            if is_contain_rage_from_start_to_end(datetime, filter_start_time, filter_end_time, DATE_TIME_FORMAT):
-                add_time_and_disk_usage_array2d(datetime, filesystems, filesystem_dict, df_array2d)
-            datetime = get_date_time_in_line(line)
-        if line.startswith(FILESYSTEM_FILTER_TOP_STRING):
-            analyze_filesystem_data_line(line, filesystems, filesystem_dict)
-    if is_contain_rage_from_start_to_end(datetime, filter_start_time, filter_end_time, DATE_TIME_FORMAT):
-        add_time_and_disk_usage_array2d(datetime, filesystems, filesystem_dict, df_array2d)
+def write_forecast(file_name: str, forecast_rows: List[List], windows, unit: str):
+    """
+    Description:
+        output forecast csv sorted by urgency (filesystem which will be full sooner is upper).
+    :param file_name: output file name.
+    :param forecast_rows: forecast rows (df_forecast.create_forecast_rows)
+    :param windows: forecast windows.
+    :param unit: unit of used and available values.
+    :return: void
+    """
+    forecast_rows = rank_by_urgency(forecast_rows, len(windows))
+    write_csv_file(file_name, create_forecast_header(windows, unit), forecast_rows)
+    for row in forecast_rows[:10]:
+        print(' '.join(str(value) for value in row))
 
 
-def analyze_df_logs(lines: List[str], is_time_range_hour_option, filter_start_time, filter_end_time):
-    df_array2d: List[List[str]] = []
+def analyze_df_logs(file_paths: List[str], is_time_range_hour_option, filter_start_time, filter_end_time,
+                    filesystem_filter: Pattern, windows: Optional[List], is_inode: bool, is_jsonl: bool = False):
+    times: List[int] = []
     filesystems: List[str] = []
-    filesystem_total_sizes: List[str] = []
-    get_filesystem_and_total_size(lines, filesystems, filesystem_total_sizes)
-    analyze_df_log_lines(lines, filter_start_time, filter_end_time, filesystems, df_array2d)
+    total_dict: Dict[str, str] = {}
+    available_dict: Dict[str, str] = {}
+    records: List[Tuple[str, Dict[int, str]]] = []
+    if is_jsonl:
+        analyze_df_jsonl(file_paths, filter_start_time, filter_end_time, filesystem_filter, filesystems, total_dict,
+                         available_dict, times, records, is_inode)
+    else:
+        analyze_df_log_lines(iterate_log_lines(file_paths), filter_start_time, filter_end_time, filesystem_filter,
+                             filesystems, total_dict, available_dict, times, records)
+    df_array2d = convert_sparse_records_to_array2d(records, len(filesystems))
+    header = [''] + filesystems
     for index in range(len(filesystems)):
-        view_line_graph(GRAPH_TITLE, filesystems, df_array2d, is_time_range_hour_option, index + 1)
-    df_array2d.append(['TOTAL:'] + filesystem_total_sizes)
-    df_array2d.append(['MAX:'] + create_max_value_row(df_array2d))
-    df_array2d.append(['AVG:'] + create_average_value_row(df_array2d))
-    write_csv_file(OUTPUT_FILE_NAME, filesystems, df_array2d)
+        view_line_graph(INODE_GRAPH_TITLE if is_inode else GRAPH_TITLE, int(total_dict[filesystems[index]]), header,
+                        df_array2d, times, is_time_range_hour_option, index + 1,
+                        'Inode Usage [count]' if is_inode else 'Filesystem Usage [KB]')
+    if windows is not None:
+        write_forecast(INODE_FORECAST_OUTPUT_FILE_NAME if is_inode else FORECAST_OUTPUT_FILE_NAME,
+                       create_forecast_rows('', filesystems, available_dict, times, df_array2d, windows), windows,
+                       'inodes' if is_inode else 'KB')
+    if df_array2d:
+        max_values = create_max_value_row(df_array2d)
+        average_values = create_average_value_row(df_array2d)
+        df_array2d.append(['TOTAL:'] + [total_dict[filesystem] for filesystem in filesystems])
+        df_array2d.append(['MAX:'] + max_values)
+        df_array2d.append(['AVG:'] + average_values)
+    write_csv_file(INODE_OUTPUT_FILE_NAME if is_inode else OUTPUT_FILE_NAME, header, df_array2d)
     plt.show()
 
 
+def analyze_fleet_df_logs(host_dirs: List[str], filter_start_time, filter_end_time, filesystem_filter: Pattern,
+                          windows: List, is_inode: bool, is_jsonl: bool = False):
+    """
+    Description:
+        forecast filesystems of all hosts and rank them by urgency. df logs of each host are put in
+        the sub directory of input directory (../input/<host name>/df_*.log or statlog_*.jsonl).
+    :param host_dirs: sub directories of input directory.
+    :param filter_start_time: output to start date time.
+    :param filter_end_time: output to end date time.
+    :param filesystem_filter: filesystem name pattern to output.
+    :param windows: forecast windows.
+    :param is_inode: forecast inode usage (df -i) instead of disk usage.
+    :param is_jsonl: read JSON lines logs (getstatlog.py --format jsonl) instead of df logs.
+    :return: void
+    """
+    forecast_rows: List[List] = []
+    for host_dir in host_dirs:
+        file_paths = find_log_files(os.path.join(host_dir, get_log_file_pattern(is_inode, is_jsonl)))
+        times: List[int] = []
+        filesystems: List[str] = []
+        available_dict: Dict[str, str] = {}
+        records: List[Tuple[str, Dict[int, str]]] = []
+        if is_jsonl:
+            analyze_df_jsonl(file_paths, filter_start_time, filter_end_time, filesystem_filter, filesystems, {},
+                             available_dict, times, records, is_inode)
+        else:
+            analyze_df_log_lines(iterate_log_lines(file_paths), filter_start_time, filter_end_time,
+                                 filesystem_filter, filesystems, {}, available_dict, times, records)
+        df_array2d = convert_sparse_records_to_array2d(records, len(filesystems))
+        forecast_rows += create_forecast_rows(os.path.basename(host_dir), filesystems, available_dict, times,
+                                              df_array2d, windows)
+    write_forecast(INODE_FLEET_FORECAST_OUTPUT_FILE_NAME if is_inode else FLEET_FORECAST_OUTPUT_FILE_NAME,
+                   forecast_rows, windows, 'inodes' if is_inode else 'KB')
+
+
+def get_log_file_pattern(is_inode: bool, is_jsonl: bool) -> str:
+    if is_jsonl:
+        return JSONL_LOG_FILE_PATTERN
+    return INODE_LOG_FILE_PATTERN if is_inode else DF_LOG_FILE_PATTERN
+
+
 def main(args: List[str]):
     """
 
@@ -138,20 +282,31 @@ def main(args: List[str]):
     """
     is_view_graph = False
     is_time_range_hour_option = False
+    is_inode = INODE_OPTION in args
+    is_jsonl = JSONL_OPTION in args
     filter_start_time: Optional = None
     filter_end_time: Optional = None
+    set_output_options(args)
+    set_profile_options(args)
     if START_DATETIME_OPTION in args:
         filter_start_time = convert_option_date_time(START_DATETIME_OPTION, args)
     if END_DATETIME_OPTION in args:
         filter_end_time = convert_option_date_time(END_DATETIME_OPTION, args)
     if GRAPH_TIME_RANGE_HOUR_OPTION in args:
         is_time_range_hour_option = True
-    file_paths: List[str] = glob.glob("../input/df_*.log")
-    lines = []
-    for file_path in file_paths:
-        with open(file_path, 'r', encoding="utf-8_sig") as f:
-            lines += f.readlines()
-    analyze_df_logs(lines, is_time_range_hour_option, filter_start_time, filter_end_time)
+    filesystem_filter = re.compile(get_option_value(FILESYSTEM_FILTER_OPTION, args) or DEFAULT_FILESYSTEM_FILTER)
+    windows: Optional[List] = None
+    if FORECAST_OPTION in args or FORECAST_WINDOWS_OPTION in args or FLEET_OPTION in args:
+        windows = parse_windows(get_option_value(FORECAST_WINDOWS_OPTION, args) or DEFAULT_WINDOWS)
+    if FLEET_OPTION in args:
+        host_dirs: List[str] = sorted(path for path in glob.glob("../input/*") if os.path.isdir(path))
+        analyze_fleet_df_logs(host_dirs, filter_start_time, filter_end_time, filesystem_filter, windows, is_inode,
+                              is_jsonl)
+        return
+    file_paths: List[str] = find_log_files("../input/" + get_log_file_pattern(is_inode, is_jsonl))
+    analyze_df_logs(file_paths, is_time_range_hour_option, filter_start_time, filter_end_time, filesystem_filter,
+                    windows, is_inode, is_jsonl)
 
 
-main(sys.argv)
+if __name__ == '__main__':
+    main(sys.argv)
@@ -0,0 +1,161 @@
+"""
+forecast of filesystem usage from parsed df series (df_analysis).
+    fill rate is the slope of least squares line of used KB in the window (last sample - window to last sample),
+    and time to full is (available KB of last sample) / fill rate.
+"""
+from typing import List, Optional, Tuple, Dict
+
+import numpy as np
+from analyzeTool.analysis_util import format_seconds, profile_phase
+
+WINDOW_UNIT_SECONDS = {'m': 60, 'h': 3600, 'd': 86400}
+DEFAULT_WINDOWS = '1d,7d,30d'
+SECONDS_PER_DAY = 86400
+MIN_FIT_POINTS = 2
+NOT_FILLING = ''  # time to full of filesystem which usage is not increasing
+
+
+def parse_windows(windows_option: str) -> List[Tuple[str, int]]:
+    """
+    Description:
+        parse forecast windows option. ex) '24h,7d' -> [('24h', 86400), ('7d', 604800)]
+    :param windows_option: comma separated windows. unit is m (minute), h (hour) or d (day).
+    :return: list of (window name, window seconds)
+    """
+    windows: List[Tuple[str, int]] = []
+    for window in windows_option.split(','):
+        window = window.strip()
+        if window == '':
+            continue
+        unit = window[-1]
+        if unit not in WINDOW_UNIT_SECONDS or not window[:-1].isdigit():
+            print('invalid forecast window: {} (ex. 24h,7d)'.format(window))
+            raise ValueError(window)
+        windows.append((window, int(window[:-1]) * WINDOW_UNIT_SECONDS[unit]))
+    return windows
+
+
+def fit_linear(times: np.ndarray, values: np.ndarray) -> Optional[Tuple[float, float]]:
+    """
+    Description:
+        least squares fit of values by time on numpy arrays (closed form of centered sums).
+        times are shifted to the first time to keep precision.
+    :param times: date time seconds.
+    :param values: values of each time.
+    :return: (slope per second, value at the first time). None when points are not enough.
+    """
+    if len(times) < MIN_FIT_POINTS:
+        return None
+    xs = (times - times[0]).astype(np.float64)
+    x_mean = xs.mean()
+    y_mean = values.mean()
+    x_deviations = xs - x_mean
+    denominator = np.dot(x_deviations, x_deviations)
+    if denominator == 0:
+        return None
+    slope = float(np.dot(x_deviations, values - y_mean) / denominator)
+    return slope, float(y_mean - slope * x_mean)
+
+
+def get_series(times: List[int], df_array2d: List[List[str]], col: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Description:
+        get used KB series of one filesystem. rows without value are skipped.
+    :param times: date time seconds of each row.
+    :param df_array2d: 2d array (row: date time, column: filesystem). row 0 is date time.
+    :param col: column of filesystem.
+    :return: (times, used KB values)
+    """
+    rows = [(time, record[col]) for time, record in zip(times, df_array2d) if record[col] != '']
+    series_times = np.array([time for time, _ in rows], dtype=np.int64)
+    values = np.array([float(value) for _, value in rows], dtype=np.float64)
+    return series_times, values
+
+
+def forecast_window(times: np.ndarray, values: np.ndarray, available: float,
+                    window_seconds: int) -> Tuple[Optional[float], Optional[float]]:
+    """
+    Description:
+        forecast fill rate and time to full in the window.
+    :param times: date time seconds (ascending order).
+    :param values: used KB of each time.
+    :param available: available KB of last sample.
+    :param window_seconds: window size.
+    :return: (fill rate KB/day, seconds to full). None when not calculable. seconds to full is None when not filling.
+    """
+    if len(times) == 0:
+        return None, None
+    start_index = int(np.searchsorted(times, times[-1] - window_seconds, side='left'))
+    result = fit_linear(times[start_index:], values[start_index:])
+    if result is None:
+        return None, None
+    slope = result[0]
+    if slope <= 0:
+        return slope * SECONDS_PER_DAY, None
+    return slope * SECONDS_PER_DAY, available / slope
+
+
+@profile_phase('summarize')
+def create_forecast_rows(host: str, filesystems: List[str], available_dict: Dict[str, str], times: List[int],
+                         df_array2d: List[List[str]], windows: List[Tuple[str, int]]) -> List[List]:
+    """
+    Description:
+        create forecast rows per filesystem.
+        row: host, filesystem, used KB, available KB, (fill rate KB/day, days to full, full date) per window
+    :param host: host name ('' when not fleet mode).
+    :param filesystems: filesystem names (order of df_array2d columns).
+    :param available_dict: map of filesystem and available KB of last sample.
+    :param times: date time seconds of each row of df_array2d.
+    :param df_array2d: 2d array (row: date time, column: filesystem). row 0 is date time.
+    :param windows: list of (window name, window seconds)
+    :return: forecast rows.
+    """
+    rows: List[List] = []
+    for index, filesystem in enumerate(filesystems):
+        series_times, values = get_series(times, df_array2d, index + 1)
+        if len(series_times) == 0:
+            continue
+        available = float(available_dict.get(filesystem, 0))
+        row: List = [host, filesystem, int(values[-1]), int(available)]
+        for _, window_seconds in windows:
+            fill_rate, seconds_to_full = forecast_window(series_times, values, available, window_seconds)
+            if fill_rate is None:
+                row += ['', '', '']
+            elif seconds_to_full is None:
+                row += ['{:.1f}'.format(fill_rate), NOT_FILLING, NOT_FILLING]
+            else:
+                row += ['{:.1f}'.format(fill_rate), '{:.2f}'.format(seconds_to_full / SECONDS_PER_DAY),
+                        format_seconds(int(series_times[-1]) + int(seconds_to_full))]
+        rows.append(row)
+    return rows
+
+
+def create_forecast_header(windows: List[Tuple[str, int]], unit: str = 'KB') -> List[str]:
+    header = ['host', 'filesystem', 'used [{}]'.format(unit), 'available [{}]'.format(unit)]
+    for window_name, _ in windows:
+        header += ['fill rate {} [{}/day]'.format(window_name, unit), 'days to full {}'.format(window_name),
+                   'full date {}'.format(window_name)]
+    return header
+
+
+def get_urgency(row: List, window_count: int) -> float:
+    """
+    Description:
+        urgency of forecast row. the shortest days to full in all windows (smaller is more urgent).
+    :param row: forecast row.
+    :param window_count: window count.
+    :return: days to full. infinity when not filling.
+    """
+    days = [float(row[4 + i * 3 + 1]) for i in range(window_count) if row[4 + i * 3 + 1] != '']
+    return min(days) if days else float('inf')
+
+
+def rank_by_urgency(rows: List[List], window_count: int) -> List[List]:
+    """
+    Description:
+        sort forecast rows (of all hosts in fleet mode) by urgency.
+    :param rows: forecast rows.
+    :param window_count: window count.
+    :return: sorted forecast rows.
+    """
+    return sorted(rows, key=lambda row: get_urgency(row, window_count))
@@ -1,11 +1,15 @@
-import glob
 import sys
-from typing import Optional, List
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from typing import Optional, List, Dict, Iterable, Tuple
 
 import matplotlib.dates as mdates
 import matplotlib.pyplot as plt
-from analyzeTool.analysis_util import convert_option_date_time, write_csv_file, \
-    create_max_value_row, create_average_value_row, is_contain_rage_from_start_to_end, convert_date_time
+from analyzeTool.analysis_util import find_log_files, convert_option_date_time, write_csv_file, \
+    create_max_value_row, create_average_value_row, convert_seconds_to_date_time, iterate_log_lines, \
+    convert_filter_seconds, convert_log_date_time_to_seconds, is_contain_range_seconds, format_seconds, split_file_chunks, \
+    iterate_file_chunk_lines, get_option_value, set_output_options, profile_phase, set_profile_options, \
+    load_jsonl_array2d
 
 GET_PARAM_NAME_START_INDEX = 3
 AVAILABLE_NAME_INDEX = 7
@@ -17,29 +21,38 @@ FREE_VALUE_INDEX = 5
 SHARED_VALUE_INDEX = 6
 BUFF_CACHE_VALUE_INDEX = 7
 AVAILABLE_VALUE_INDEX = 8
+MEM_TOTAL_COLUMN = 9  # column of mem total in output 2d array
+MEM_COLUMN_COUNT = 9  # date time Mem: total used free shared buff/cache available
+SWAP_COLUMN_COUNT = 6  # date time Swap: total used free
 
 # Variables
 GET_VALUE_START_INDEX = 4
 GRAPH_TITLE = 'Memory Usage'
 START_DATETIME_OPTION = '--startTime'
 END_DATETIME_OPTION = '--endTime'
+PARALLEL_OPTION = '--parallel'
+JSONL_OPTION = '--jsonl'
+JSONL_RECORD_TYPE = 'free'
+JSONL_FIELDS = ['total', 'used', 'free', 'shared', 'buff/cache', 'available', 'swap used', 'swap free']
 OUTPUT_FILE_NAME = 'free_result'
 MEM_LABEL = 'Mem:'
 SWAP_LABEL = 'Swap:'
 LABEL_INDEX = 2
 
 
-def view_line_graph(title: str, total: int, header: List[str], array2d: List[List[str]]):
+@profile_phase('render')
+def view_line_graph(title: str, total: int, header: List[str], times: List[int], array2d: List[List[str]]):
     """
     Description:
         create and view line graph by matplotlib.
-    :param total: memory total value
+    :param total: memory total value (max value when total changed)
     :param title: graph title.
     :param header: top line of output file. top line is '' and process id.
+    :param times: date time seconds of each row.
     :param array2d: 2d array (row: date time, column: process). row 0 is date time.
     :return: void
     """
-    times = [convert_date_time(array2d[i][0]) for i in range(len(array2d)) if i < len(array2d)]
+    times = [convert_seconds_to_date_time(seconds) for seconds in times]
     fig, axes = plt.subplots()
     fig.subplots_adjust(bottom=0.2, top=0.95)
     for col in range(len(array2d[0])):
@@ -62,54 +75,240 @@ def view_line_graph(title: str, total: int, header: List[str], array2d: List[Lis
     plt.xticks(rotation=30)
 
 
-def analyze_free_log_lines(lines: List[str], total: int, filter_start_time: Optional, filter_end_time: Optional,
-                           free_array2d: List[List[str]]):
-    array = []
+def classify_free_line(line_columns: List[str]) -> str:
+    """
+    Description:
+        classify free log line by label token. value line must have the column count of the label
+        and all numbers, so partial line written by collector is ignored.
+    :param line_columns: log line columns (date, time and free columns).
+    :return: MEM_LABEL or SWAP_LABEL. '' when header line or invalid line.
+    """
+    if len(line_columns) <= LABEL_INDEX:
+        return ''
+    label = line_columns[LABEL_INDEX]
+    if label == MEM_LABEL and len(line_columns) != MEM_COLUMN_COUNT:
+        return ''
+    if label == SWAP_LABEL and len(line_columns) != SWAP_COLUMN_COUNT:
+        return ''
+    if label != MEM_LABEL and label != SWAP_LABEL:
+        return ''
+    for value in line_columns[TOTAL_VALUE_INDEX:]:
+        if not value.isdigit():
+            return ''
+    return label
+
+
+def create_free_record(date_time: str, mem_columns: List[str], swap_columns: List[str]) -> List[str]:
+    total = mem_columns[TOTAL_VALUE_INDEX]
+    used = mem_columns[USED_VALUE_INDEX]
+    free = mem_columns[FREE_VALUE_INDEX]
+    shared = mem_columns[SHARED_VALUE_INDEX]
+    buffcache = mem_columns[BUFF_CACHE_VALUE_INDEX]
+    available = mem_columns[AVAILABLE_VALUE_INDEX]
+    use_memory = str(int(total) - int(available))
+    return [date_time] + [used] + [free] + [shared] + [buffcache] + [available] + [use_memory] + [
+        swap_columns[USED_VALUE_INDEX]] + [swap_columns[FREE_VALUE_INDEX]] + [total]
+
+
+def add_free_sample(seconds: int, label: str, line_columns: List[str], pending_samples: Dict, times: List[int],
+                    free_array2d: List[List[str]]):
+    """
+    Description:
+        add Mem: or Swap: line to the sample of the same date time. when both lines are got, add the record to 2d array.
+        the order of Mem: and Swap: lines doesn't matter.
+    :param seconds: date time seconds of line.
+    :param label: MEM_LABEL or SWAP_LABEL.
+    :param line_columns: log line columns.
+    :param pending_samples: map of date time seconds and (map of label and line columns) waiting for the pair line.
+    :param times: date time seconds of each row.
+    :param free_array2d: 2d array (row: date time, column: free value). row 0 is date time.
+    :return: void
+    """
+    sample: Dict[str, List[str]] = pending_samples.setdefault(seconds, {})
+    sample[label] = line_columns
+    if MEM_LABEL in sample and SWAP_LABEL in sample:
+        del pending_samples[seconds]
+        times.append(seconds)
+        free_array2d.append(create_free_record(format_seconds(seconds), sample[MEM_LABEL], sample[SWAP_LABEL]))
+
+
+def drop_stale_samples(seconds: int, pending_samples: Dict, keep_seconds: Optional[int] = None):
+    """
+    Description:
+        drop samples older than the date time, because the pair line never comes
+        (ex. sample truncated at log rotation or collector restart).
+    :param seconds: date time seconds of the current sample.
+    :param pending_samples: map of date time seconds and (map of label and line columns) waiting for the pair line.
+    :param keep_seconds: date time seconds of the sample which is not dropped (head sample of chunk).
+    :return: void
+    """
+    for stale_seconds in [pending_seconds for pending_seconds in pending_samples
+                          if pending_seconds < seconds and pending_seconds != keep_seconds]:
+        del pending_samples[stale_seconds]
+
+
+@profile_phase('parse')
+def analyze_free_log_lines(lines: Iterable[str], filter_start_time: Optional, filter_end_time: Optional,
+                           times: List[int], free_array2d: List[List[str]], pending_samples: Dict,
+                           is_keep_head_sample: bool = False):
+    """
+    Description:
+        analyze free log lines in one pass. lines are classified by label token (not by line order),
+        so lines can start from any line of the log. memory total is got from Mem: line of each sample,
+        and date time is converted once per sample (Mem: and Swap: lines have the same date time).
+        when the next sample starts, the older samples without the pair line are dropped.
+    :param lines: log lines.
+    :param filter_start_time: output to start date time.
+    :param filter_end_time: output to end date time.
+    :param times: date time seconds of each row.
+    :param free_array2d: 2d array (row: date time, column: free value). row 0 is date time.
+    :param pending_samples: map of date time seconds and (map of label and line columns) waiting for the pair line.
+    :param is_keep_head_sample: keep the first sample without the pair line (the pair line is in the previous chunk).
+    :return: void
+    """
+    filter_start_seconds = convert_filter_seconds(filter_start_time)
+    filter_end_seconds = convert_filter_seconds(filter_end_time)
+    last_date_time: Tuple[str, str] = ('', '')
+    seconds: Optional[int] = None
+    last_seconds: Optional[int] = None
+    head_seconds: Optional[int] = None
     for line in lines:
         line_columns: List[str] = line.split()
-        datetime = line_columns[0] + ' ' + line_columns[1]
-        if not is_contain_rage_from_start_to_end(datetime, filter_start_time, filter_end_time):
-            array = []
+        label = classify_free_line(line_columns)
+        if label == '':
             continue
-        if line_columns[LABEL_INDEX] == MEM_LABEL:
-            used = line_columns[USED_VALUE_INDEX]
-            free = line_columns[FREE_VALUE_INDEX]
-            shared = line_columns[SHARED_VALUE_INDEX]
-            buffcache = line_columns[BUFF_CACHE_VALUE_INDEX]
-            available = line_columns[AVAILABLE_VALUE_INDEX]
-            use_memory = str(total - int(available))
-            array = [line_columns[DATE_INDEX] + ' ' + line_columns[TIME_INDEX]] + [used] + [free] + [shared] + [
-                buffcache] + [available] + [use_memory]
-        if line_columns[LABEL_INDEX] == SWAP_LABEL:
-            used = line_columns[USED_VALUE_INDEX]
-            free = line_columns[FREE_VALUE_INDEX]
-            array.append(used)
-            array.append(free)
-            free_array2d.append(array)
-            array = []
-
-
-def get_total_memory(lines: List[str]) -> int:
-    for line in lines:
-        columns = line.split()
-        if columns[LABEL_INDEX] == MEM_LABEL:
-            return int(columns[TOTAL_VALUE_INDEX])
-    raise ValueError('Not Found "MEM:" in free log')
+        date_time = (line_columns[DATE_INDEX], line_columns[TIME_INDEX])
+        if date_time != last_date_time:
+            last_date_time = date_time
+            seconds = convert_log_date_time_to_seconds(*date_time)
+        if seconds is None or not is_contain_range_seconds(seconds, filter_start_seconds, filter_end_seconds):
+            continue
+        if seconds != last_seconds:
+            if last_seconds is None and is_keep_head_sample:
+                head_seconds = seconds
+            elif pending_samples:
+                drop_stale_samples(seconds, pending_samples, head_seconds)
+            last_seconds = seconds
+        add_free_sample(seconds, label, line_columns, pending_samples, times, free_array2d)
+
+
+def analyze_free_log_chunk(chunk: Tuple[str, int, int], filter_start_time: Optional,
+                           filter_end_time: Optional) -> Tuple[List[int], List[List[str]], Dict]:
+    """
+    Description:
+        analyze byte range of free log (executed in worker process).
+    :param chunk: (file path, start offset, end offset)
+    :param filter_start_time: output to start date time.
+    :param filter_end_time: output to end date time.
+    :return: (times, 2d array, samples which the pair line is in other chunk)
+    """
+    times: List[int] = []
+    free_array2d: List[List[str]] = []
+    pending_samples: Dict = {}
+    analyze_free_log_lines(iterate_file_chunk_lines(*chunk), filter_start_time, filter_end_time, times, free_array2d,
+                           pending_samples, True)
+    return times, free_array2d, pending_samples
+
+
+@profile_phase('parse')
+def analyze_free_log_chunks(file_paths: List[str], parallel_count: int, filter_start_time: Optional,
+                            filter_end_time: Optional, times: List[int], free_array2d: List[List[str]]):
+    """
+    Description:
+        analyze free log files in parallel. each file is split into byte ranges and results are merged in order.
+        the sample split at chunk boundary is completed with the next chunk, and the sample which is not completed
+        is dropped.
+    :param file_paths: log file paths.
+    :param parallel_count: worker process count.
+    :param filter_start_time: output to start date time.
+    :param filter_end_time: output to end date time.
+    :param times: date time seconds of each row.
+    :param free_array2d: 2d array (row: date time, column: free value). row 0 is date time.
+    :return: void
+    """
+    pending_samples: Dict = {}
+    chunks = split_file_chunks(file_paths, parallel_count)
+    with ProcessPoolExecutor(max_workers=parallel_count) as executor:
+        results = executor.map(analyze_free_log_chunk, chunks, repeat(filter_start_time), repeat(filter_end_time))
+        for chunk_times, chunk_array2d, chunk_pending_samples in results:
+            for seconds, sample in sorted(chunk_pending_samples.items()):
+                for label, line_columns in sample.items():
+                    add_free_sample(seconds, label, line_columns, pending_samples, times, free_array2d)
+            latest_seconds = max(list(chunk_pending_samples) + chunk_times[-1:], default=None)
+            if latest_seconds is not None:
+                drop_stale_samples(latest_seconds, pending_samples)
+            times.extend(chunk_times)
+            free_array2d.extend(chunk_array2d)
+
+
+@profile_phase('parse')
+def analyze_free_jsonl(file_paths: List[str], filter_start_time: Optional, filter_end_time: Optional,
+                       times: List[int], free_array2d: List[List]):
+    """
+    Description:
+        analyze free records of JSON lines logs (getstatlog.py --format jsonl). values are numbers.
+        one record has Mem: and Swap: values, so there is no pair line.
+    :param file_paths: log file paths (statlog_yyyymmdd.jsonl)
+    :param filter_start_time: output to start date time.
+    :param filter_end_time: output to end date time.
+    :param times: date time seconds of each row.
+    :param free_array2d: 2d array (row: date time, column: free value). row 0 is date time.
+    :return: void
+    """
+    jsonl_times, _, jsonl_array2d = load_jsonl_array2d(file_paths, JSONL_RECORD_TYPE, JSONL_FIELDS,
+                                                       filter_start_time, filter_end_time)
+    for seconds, record in zip(jsonl_times, jsonl_array2d):
+        if '' in record:
+            continue
+        total, used, free, shared, buff_cache, available, swap_used, swap_free = record[1:]
+        times.append(seconds)
+        free_array2d.append([record[0], used, free, shared, buff_cache, available, total - available, swap_used,
+                             swap_free, total])
+
+
+def get_total_memory_changes(free_array2d: List[List[str]]) -> List[Tuple[str, int]]:
+    """
+    Description:
+        get memory total changes (ex. memory hotplug, VM resize) from the mem total column.
+    :param free_array2d: 2d array (row: date time, column: free value). row 0 is date time.
+    :return: list of (date time, memory total). first item is the first sample.
+    """
+    changes: List[Tuple[str, int]] = []
+    for record in free_array2d:
+        total = int(record[MEM_TOTAL_COLUMN])
+        if not changes or changes[-1][1] != total:
+            changes.append((record[0], total))
+    if not changes:
+        raise ValueError('Not Found "MEM:" in free log')
+    return changes
 
 
 def analyze_free_params(line: str) -> List[str]:
     # line_columns: List[str] = line.split()
     # return [line_columns[i] for i in range(len(line_columns)) if i >= GET_PARAM_NAME_START_INDEX]
     return ['mem used'] + ['mem free'] + ['mem shared'] + ['mem buff/cache'] + ['available'] + ['Memory Usage'] + [
-        'swap used'] + ['swap free']
+        'swap used'] + ['swap free'] + ['mem total']
 
 
-def analyze_free_logs(lines: List[str], is_output_excel, filter_start_time, filter_end_time):
+def analyze_free_logs(file_paths: List[str], parallel_count: int, is_output_excel, filter_start_time,
+                      filter_end_time, is_jsonl: bool):
+    times: List[int] = []
     free_array2d: List[List[str]] = []
-    param_names: List[str] = [''] + analyze_free_params(lines[0])
-    total: int = get_total_memory(lines)
-    analyze_free_log_lines(lines, total, filter_start_time, filter_end_time, free_array2d)
-    view_line_graph(GRAPH_TITLE, total, param_names, free_array2d)
+    param_names: List[str] = [''] + analyze_free_params('')
+    if is_jsonl:
+        analyze_free_jsonl(file_paths, filter_start_time, filter_end_time, times, free_array2d)
+    elif parallel_count > 1:
+        analyze_free_log_chunks(file_paths, parallel_count, filter_start_time, filter_end_time, times, free_array2d)
+    else:
+        analyze_free_log_lines(iterate_log_lines(file_paths), filter_start_time, filter_end_time, times, free_array2d,
+                               {})
+    if not free_array2d and (filter_start_time is not None or filter_end_time is not None):
+        raise ValueError('no sample in time range of free log (--startTime, --endTime)')
+    total_changes = get_total_memory_changes(free_array2d)
+    for date_time, changed_total in total_changes[1:]:
+        print('memory total changed at {}: {}'.format(date_time, changed_total))
+    total: int = max(changed_total for _, changed_total in total_changes)
+    view_line_graph(GRAPH_TITLE, total, param_names, times, free_array2d)
     free_array2d.append(['MAX:'] + create_max_value_row(free_array2d))
     free_array2d.append(['AVG:'] + create_average_value_row(free_array2d))
     write_csv_file(OUTPUT_FILE_NAME, param_names, free_array2d)
@@ -126,16 +325,17 @@ def main(args: List[str]):
     is_view_graph = False
     filter_start_time: Optional = None
     filter_end_time: Optional = None
+    parallel_count = int(get_option_value(PARALLEL_OPTION, args) or 1)
+    set_output_options(args)
+    set_profile_options(args)
     if START_DATETIME_OPTION in args:
         filter_start_time = convert_option_date_time(START_DATETIME_OPTION, args)
     if END_DATETIME_OPTION in args:
         filter_end_time = convert_option_date_time(END_DATETIME_OPTION, args)
-    file_paths: List[str] = glob.glob("../input/free_*.log")
-    lines = []
-    for file_path in file_paths:
-        with open(file_path, 'r', encoding="utf-8_sig") as f:
-            lines += f.readlines()
-    analyze_free_logs(lines, is_output_excel, filter_start_time, filter_end_time)
+    is_jsonl = JSONL_OPTION in args
+    file_paths: List[str] = find_log_files("../input/statlog_*.jsonl" if is_jsonl else "../input/free_*.log")
+    analyze_free_logs(file_paths, parallel_count, is_output_excel, filter_start_time, filter_end_time, is_jsonl)
 
 
-main(sys.argv)
+if __name__ == '__main__':
+    main(sys.argv)
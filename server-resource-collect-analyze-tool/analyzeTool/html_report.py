@@ -0,0 +1,403 @@
+"""
+create one self-contained html report (output: report.html) of all logs in input folder.
+    series are got by the same parsing functions as each analyzer, and embedded as multi-resolution data
+    (raw, 1m and 1h: average and max per bucket). each resolution is a separate JSON script block, and
+    the browser parses only the resolution needed for the current zoom range.
+    resolution which has more points than MAX_LEVEL_POINTS is not embedded (the coarsest is always embedded),
+    so one month of 5 seconds samples is embedded as 1m and 1h.
+    graph: drag to zoom (all graphs are zoomed together), wheel to zoom in/out, double click to reset.
+    option:
+        --proc : use proc log (getstatlog.py --process) instead of top log
+        --jsonl : use JSON lines logs (getstatlog.py --format jsonl, statlog_yyyymmdd.jsonl) instead of text logs
+        --groupByDisk : iostat per disk instead of per partition
+        --maxLevelPoints N : max points of embedded resolution (default 50000)
+        --startTime "YYYY/mm/dd HH:MM:ss" : output start date time filter
+        --endTime "YYYY/mm/dd HH:MM:ss" : output end date time filter
+"""
+import json
+import os
+import re
+import sys
+from typing import List, Dict, Optional, Tuple
+
+from analyzeTool.analysis_util import find_log_files, convert_option_date_time, iterate_log_lines, \
+    convert_sparse_records_to_array2d, create_max_value_row, get_option_value, \
+    set_output_options, get_output_file_path, profile_phase, set_profile_options
+from analyzeTool import vmstat_analysis, free_analysis, iostat_cpu_analysis, iostat_analysis, iostat_dev_analysis, \
+    df_analysis, top_analysis, collector_analysis
+
+# Constant Value
+LEVELS = [('raw', 0), ('1m', 60), ('1h', 3600)]  # (name, bucket seconds). 0 is not aggregated.
+VALUE_SIGNIFICANT_DIGITS = 4  # values are rounded to this digits (graph resolution is enough and JSON is smaller)
+FREE_REPORT_LABELS = ['mem used', 'mem buff/cache', 'available', 'Memory Usage', 'swap used']
+KB_PER_MB = 1024
+REPORT_TITLE = 'Server Resource Report'
+HTML_TEMPLATE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'html_report_template.html')
+
+# Variables
+START_DATETIME_OPTION = '--startTime'
+END_DATETIME_OPTION = '--endTime'
+PROC_OPTION = '--proc'
+JSONL_OPTION = '--jsonl'
+JSONL_LOG_FILE_PATH = '../input/statlog_*.jsonl'
+GROUP_BY_DISK_OPTION = '--groupByDisk'
+MAX_LEVEL_POINTS_OPTION = '--maxLevelPoints'
+MAX_LEVEL_POINTS = 50000
+OUTPUT_FILE_NAME = 'report'
+
+
+def to_number(value, scale: float = 1.0) -> Optional[float]:
+    if value == '' or value is None:
+        return None
+    return float(value) / scale
+
+
+def create_panel(title: str, unit: str, header: List[str], times: List[int], array2d: List[List],
+                 columns: List[int], scale: float = 1.0) -> Dict:
+    """
+    Description:
+        create one graph panel from 2d array of analyzer.
+    :param title: graph title.
+    :param unit: unit of values.
+    :param header: top line of output file. top line is ''.
+    :param times: date time seconds of each row.
+    :param array2d: 2d array (row: date time, column: value). row 0 is date time.
+    :param columns: columns of array2d to embed.
+    :param scale: values are divided by this (ex. KB -> MB)
+    :return: panel (title, unit, names, times, values per column)
+    """
+    return {'title': title, 'unit': unit, 'names': [header[col] for col in columns], 'times': times,
+            'columns': [[to_number(record[col], scale) for record in array2d] for col in columns]}
+
+
+def aggregate_level(times: List[int], columns: List[List[Optional[float]]],
+                    bucket_seconds: int) -> Tuple[List[int], List[List], List[List]]:
+    """
+    Description:
+        aggregate values per bucket (time // bucket_seconds) in one pass. times must be ascending order.
+    :param times: date time seconds of each value.
+    :param columns: values per column (None is missing value).
+    :param bucket_seconds: bucket size.
+    :return: (bucket start seconds, average values per column, max values per column)
+    """
+    bucket_times: List[int] = []
+    average_columns: List[List] = [[] for _ in columns]
+    max_columns: List[List] = [[] for _ in columns]
+    start = 0
+    while start < len(times):
+        bucket = times[start] // bucket_seconds
+        end = start
+        while end < len(times) and times[end] // bucket_seconds == bucket:
+            end += 1
+        bucket_times.append(bucket * bucket_seconds)
+        for values, averages, maxes in zip(columns, average_columns, max_columns):
+            bucket_values = [value for value in values[start:end] if value is not None]
+            averages.append(sum(bucket_values) / len(bucket_values) if bucket_values else None)
+            maxes.append(max(bucket_values) if bucket_values else None)
+        start = end
+    return bucket_times, average_columns, max_columns
+
+
+def compact_value(value: Optional[float]):
+    if value is None:
+        return None
+    value = float('{:.{}g}'.format(value, VALUE_SIGNIFICANT_DIGITS))
+    return int(value) if value == int(value) else value
+
+
+def encode_level(times: List[int], average_columns: List[List], max_columns: Optional[List[List]]) -> str:
+    """
+    Description:
+        encode one resolution to JSON. times are delta encoded (first value is absolute).
+    :return: JSON string {"t": times, "v": values per column, "m": max values per column (aggregated only)}
+    """
+    data: Dict = {'t': [times[0]] + [time - prev for prev, time in zip(times, times[1:])] if times else [],
+                  'v': [[compact_value(value) for value in values] for values in average_columns]}
+    if max_columns is not None:
+        data['m'] = [[compact_value(value) for value in values] for values in max_columns]
+    # '</' is escaped so that the JSON doesn't close the script block
+    return json.dumps(data, separators=(',', ':')).replace('</', '<\\/')
+
+
+def create_panel_levels(panel: Dict, max_level_points: int) -> List[Tuple[str, int, int, str]]:
+    """
+    Description:
+        create resolutions of panel (fine to coarse). resolution which has more points than max_level_points
+        is skipped, except the coarsest one.
+    :param panel: panel (create_panel)
+    :param max_level_points: max points of embedded resolution.
+    :return: list of (level name, bucket seconds, point count, JSON)
+    """
+    times = panel['times']
+    levels: List[Tuple[str, int, int, str]] = []
+    for index, (name, bucket_seconds) in enumerate(LEVELS):
+        is_last = index == len(LEVELS) - 1
+        if bucket_seconds == 0:
+            if len(times) <= max_level_points or is_last:
+                levels.append((name, bucket_seconds, len(times), encode_level(times, panel['columns'], None)))
+            continue
+        bucket_times, average_columns, max_columns = aggregate_level(times, panel['columns'], bucket_seconds)
+        if levels and len(bucket_times) >= levels[-1][2]:
+            # samples are sparser than bucket (ex. df), aggregation is the same as finer resolution
+            continue
+        if len(bucket_times) <= max_level_points or is_last:
+            levels.append((name, bucket_seconds, len(bucket_times),
+                           encode_level(bucket_times, average_columns, max_columns)))
+    return levels
+
+
+def load_vmstat_panels(filter_start_time: Optional, filter_end_time: Optional, is_jsonl: bool = False) -> List[Dict]:
+    file_paths = find_log_files(JSONL_LOG_FILE_PATH if is_jsonl else '../input/vmstat_*.log')
+    if not file_paths:
+        return []
+    labels: List[str] = []
+    times: List[int] = []
+    array2d: List[List] = []
+    if is_jsonl:
+        vmstat_analysis.analyze_vmstat_jsonl(file_paths, filter_start_time, filter_end_time, labels, times, array2d)
+    else:
+        vmstat_analysis.analyze_vmstat_log_lines(iterate_log_lines(file_paths), filter_start_time, filter_end_time,
+                                                 labels, times, array2d)
+    vmstat_analysis.add_cpu_use_column(labels, array2d)
+    header = [''] + labels + [vmstat_analysis.CPU_USE_LABEL]
+    panels = []
+    for title, unit, graph_labels in [
+            (vmstat_analysis.CPU_GRAPH_TITLE + ' (vmstat)', '%', vmstat_analysis.CPU_GRAPH_LABELS),
+            (vmstat_analysis.SYSTEM_GRAPH_TITLE, 'count/s', vmstat_analysis.SYSTEM_GRAPH_LABELS),
+            (vmstat_analysis.SWAP_GRAPH_TITLE, 'KB/s', vmstat_analysis.SWAP_GRAPH_LABELS)]:
+        panels.append(create_panel(title, unit, header, times, array2d,
+                                   [header.index(label) for label in graph_labels if label in header]))
+    return panels
+
+
+def load_free_panels(filter_start_time: Optional, filter_end_time: Optional, is_jsonl: bool = False) -> List[Dict]:
+    file_paths = find_log_files(JSONL_LOG_FILE_PATH if is_jsonl else '../input/free_*.log')
+    if not file_paths:
+        return []
+    times: List[int] = []
+    array2d: List[List[str]] = []
+    if is_jsonl:
+        free_analysis.analyze_free_jsonl(file_paths, filter_start_time, filter_end_time, times, array2d)
+    else:
+        free_analysis.analyze_free_log_lines(iterate_log_lines(file_paths), filter_start_time, filter_end_time,
+                                             times, array2d, {})
+    header = [''] + free_analysis.analyze_free_params('')
+    return [create_panel(free_analysis.GRAPH_TITLE, 'MB', header, times, array2d,
+                         [header.index(label) for label in FREE_REPORT_LABELS], KB_PER_MB)]
+
+
+def load_iostat_cpu_panels(filter_start_time: Optional, filter_end_time: Optional,
+                           is_jsonl: bool = False) -> List[Dict]:
+    file_paths = find_log_files(JSONL_LOG_FILE_PATH if is_jsonl else '../input/iostat_cpu_*.log')
+    if not file_paths:
+        return []
+    cpu_labels: List[str] = []
+    times: List[int] = []
+    array2d: List[List[str]] = []
+    if is_jsonl:
+        iostat_cpu_analysis.analyze_iostat_cpu_jsonl(file_paths, filter_start_time, filter_end_time, cpu_labels,
+                                                     times, array2d)
+    else:
+        iostat_cpu_analysis.analyze_iostat_cpu_log_lines(iterate_log_lines(file_paths), filter_start_time,
+                                                         filter_end_time, cpu_labels, times, array2d)
+    header = [''] + cpu_labels + [iostat_cpu_analysis.CPU_USE_LABEL]
+    return [create_panel(iostat_cpu_analysis.GRAPH_TITLE, '%', header, times, array2d,
+                         [col for col in range(1, len(header))
+                          if header[col] not in iostat_cpu_analysis.GRAPH_EXCLUDE_LABELS])]
+
+
+def load_iostat_panels(filter_start_time: Optional, filter_end_time: Optional, is_group_by_disk: bool,
+                       is_jsonl: bool = False) -> List[Dict]:
+    file_paths = find_log_files(JSONL_LOG_FILE_PATH if is_jsonl else '../input/iostat_x_dev_*.log')
+    if not file_paths:
+        return []
+    names: List[str] = []
+    times: List[int] = []
+    read_records: List[Tuple[str, Dict[int, str]]] = []
+    write_records: List[Tuple[str, Dict[int, str]]] = []
+    if is_jsonl:
+        iostat_analysis.analyze_iostat_jsonl(file_paths, filter_start_time, filter_end_time, names, times,
+                                             read_records, write_records, is_group_by_disk)
+    else:
+        iostat_analysis.analyze_iostat_log_lines(iterate_log_lines(file_paths), filter_start_time, filter_end_time,
+                                                 names, times, read_records, write_records, is_group_by_disk)
+    header = [''] + names
+    columns = list(range(1, len(header)))
+    return [create_panel('IO read (r/s)', 'IOPS', header, times,
+                         convert_sparse_records_to_array2d(read_records, len(names)), columns),
+            create_panel('IO write (w/s)', 'IOPS', header, times,
+                         convert_sparse_records_to_array2d(write_records, len(names)), columns)]
+
+
+def load_iostat_dev_panels(filter_start_time: Optional, filter_end_time: Optional, is_group_by_disk: bool,
+                           is_jsonl: bool = False) -> List[Dict]:
+    file_paths = find_log_files(JSONL_LOG_FILE_PATH if is_jsonl else '../input/iostat_dev_*.log')
+    if not file_paths:
+        return []
+    names: List[str] = []
+    times: List[int] = []
+    tps_records: List[Tuple[str, Dict[int, str]]] = []
+    read_kb_records: List[Tuple[str, Dict[int, str]]] = []
+    write_kb_records: List[Tuple[str, Dict[int, str]]] = []
+    if is_jsonl:
+        iostat_dev_analysis.analyze_iostat_dev_jsonl(file_paths, filter_start_time, filter_end_time, names, times,
+                                                     tps_records, read_kb_records, write_kb_records, is_group_by_disk)
+    else:
+        iostat_dev_analysis.analyze_iostat_dev_log_lines(iterate_log_lines(file_paths), filter_start_time,
+                                                         filter_end_time, names, times, tps_records, read_kb_records,
+                                                         write_kb_records, is_group_by_disk)
+    header = [''] + names
+    columns = list(range(1, len(header)))
+    panels = []
+    for title, unit, records in [('IO (tps)', 'tps', tps_records), ('IO read (kB_read/s)', 'KB/s', read_kb_records),
+                                 ('IO write (kB_wrtn/s)', 'KB/s', write_kb_records)]:
+        panels.append(create_panel(title, unit, header, times, convert_sparse_records_to_array2d(records, len(names)),
+                                   columns))
+    return panels
+
+
+def load_df_panels(filter_start_time: Optional, filter_end_time: Optional, is_jsonl: bool = False) -> List[Dict]:
+    file_paths = find_log_files('../input/' + df_analysis.get_log_file_pattern(False, is_jsonl))
+    if not file_paths:
+        return []
+    filesystems: List[str] = []
+    times: List[int] = []
+    records: List[Tuple[str, Dict[int, str]]] = []
+    filesystem_filter = re.compile(df_analysis.DEFAULT_FILESYSTEM_FILTER)
+    if is_jsonl:
+        df_analysis.analyze_df_jsonl(file_paths, filter_start_time, filter_end_time, filesystem_filter, filesystems,
+                                     {}, {}, times, records, False)
+    else:
+        df_analysis.analyze_df_log_lines(iterate_log_lines(file_paths), filter_start_time, filter_end_time,
+                                         filesystem_filter, filesystems, {}, {}, times, records)
+    header = [''] + filesystems
+    return [create_panel(df_analysis.GRAPH_TITLE, 'KB', header, times,
+                         convert_sparse_records_to_array2d(records, len(filesystems)),
+                         list(range(1, len(header))))]
+
+
+def create_top_panel(title: str, pids: List[str], times: List[int], array2d: List[List[str]],
+                     top_limit: int = top_analysis.RANK_TOP_LIMIT) -> Dict:
+    # only top processes (top_limit) in order of max value
+    header = [''] + pids
+    top_analysis.fill_empty_string(len(header), array2d)
+    if not array2d:
+        return create_panel(title, '%', header, [], array2d, [])
+    big_order_indexes = top_analysis.create_max_value_order(create_max_value_row(array2d))
+    return create_panel(title, '%', header, times, array2d,
+                        big_order_indexes[1:top_limit + 1])
+
+
+def load_top_panels(filter_start_time: Optional, filter_end_time: Optional, is_proc: bool,
+                    top_limit: int = top_analysis.RANK_TOP_LIMIT, is_jsonl: bool = False) -> List[Dict]:
+    if is_jsonl:
+        # process values of JSON lines logs are proc records (getstatlog.py --process)
+        file_paths = find_log_files(JSONL_LOG_FILE_PATH)
+    else:
+        file_paths = find_log_files('../input/proc_*.log' if is_proc else '../input/top_*.log')
+    if not file_paths:
+        return []
+    mem_pids: List[str] = []
+    cpu_pids: List[str] = []
+    times: List[int] = []
+    mem_array2d: List[List[str]] = []
+    cpu_array2d: List[List[str]] = []
+    if is_jsonl:
+        top_analysis.analyze_proc_jsonl(file_paths, filter_start_time, filter_end_time, mem_pids, cpu_pids, times,
+                                        mem_array2d, cpu_array2d)
+    elif is_proc:
+        top_analysis.analyze_proc_log_lines(iterate_log_lines(file_paths), filter_start_time, filter_end_time,
+                                            mem_pids, cpu_pids, times, mem_array2d, cpu_array2d)
+    else:
+        top_analysis.analyze_top_log_files(file_paths, filter_start_time, filter_end_time, mem_pids, cpu_pids, times,
+                                           mem_array2d, cpu_array2d)
+    return [create_top_panel('Process ' + top_analysis.OUTPUT_TOP_CPU_GRAPHTITLE, cpu_pids, times, cpu_array2d,
+                             top_limit),
+            create_top_panel('Process ' + top_analysis.OUTPUT_TOP_MEM_GRAPHTITLE, mem_pids, times, mem_array2d,
+                             top_limit)]
+
+
+def load_collector_panels(filter_start_time: Optional, filter_end_time: Optional,
+                          is_jsonl: bool = False) -> List[Dict]:
+    file_paths = find_log_files(JSONL_LOG_FILE_PATH if is_jsonl else '../input/collector_*.log')
+    if not file_paths:
+        return []
+    times: List[int] = []
+    array2d: List[List] = []
+    if is_jsonl:
+        collector_analysis.analyze_collector_jsonl(file_paths, filter_start_time, filter_end_time, times, array2d)
+    else:
+        collector_analysis.analyze_collector_log_lines(iterate_log_lines(file_paths), filter_start_time,
+                                                       filter_end_time, times, array2d)
+    header = collector_analysis.OUTPUT_HEADER
+    return [create_panel('Collector CPU', '%', header, times, array2d, [collector_analysis.CPU_RATE_COLUMN]),
+            create_panel('Sampling Interval and Jitter', 'ms', header, times, array2d,
+                         [collector_analysis.INTERVAL_COLUMN, collector_analysis.JITTER_COLUMN])]
+
+
+@profile_phase('render')
+def create_html(panels: List[Dict], max_level_points: int) -> str:
+    """
+    Description:
+        create html. index (panel titles, names and resolutions) is one JSON block,
+        and each resolution of each panel is one JSON block.
+    :param panels: panels (create_panel)
+    :param max_level_points: max points of embedded resolution.
+    :return: html
+    """
+    index: List[Dict] = []
+    data_blocks: List[str] = []
+    for panel_number, panel in enumerate(panels):
+        if not panel['times'] or not panel['names']:
+            continue
+        levels: List[Dict] = []
+        for name, bucket_seconds, points, level_json in create_panel_levels(panel, max_level_points):
+            block_id = 'd{}-{}'.format(panel_number, name)
+            levels.append({'id': block_id, 'name': name, 'step': bucket_seconds, 'points': points})
+            data_blocks.append('<script type="application/json" id="{}">{}</script>'.format(block_id, level_json))
+        index.append({'title': panel['title'], 'unit': panel['unit'], 'names': panel['names'],
+                      'start': min(panel['times']), 'end': max(panel['times']), 'levels': levels})
+    index_json = json.dumps(index, separators=(',', ':')).replace('</', '<\\/')
+    with open(HTML_TEMPLATE_PATH, encoding='utf-8') as f:
+        html_template = f.read()
+    return html_template.replace('%%TITLE%%', REPORT_TITLE).replace('%%INDEX%%', index_json).replace(
+        '%%DATA%%', '\n'.join(data_blocks))
+
+
+@profile_phase('write')
+def write_html_report(filename: str, panels: List[Dict], max_level_points: int):
+    with open(get_output_file_path(filename, '.html'), 'w', encoding='utf-8') as f:
+        f.write(create_html(panels, max_level_points))
+
+
+def main(args: List[str]):
+    """
+
+    :param args: command line arguments
+    :return: void
+    """
+    filter_start_time: Optional = None
+    filter_end_time: Optional = None
+    set_output_options(args)
+    set_profile_options(args)
+    if START_DATETIME_OPTION in args:
+        filter_start_time = convert_option_date_time(START_DATETIME_OPTION, args)
+    if END_DATETIME_OPTION in args:
+        filter_end_time = convert_option_date_time(END_DATETIME_OPTION, args)
+    is_group_by_disk = GROUP_BY_DISK_OPTION in args
+    is_jsonl = JSONL_OPTION in args
+    max_level_points = int(get_option_value(MAX_LEVEL_POINTS_OPTION, args) or MAX_LEVEL_POINTS)
+    panels: List[Dict] = []
+    panels += load_vmstat_panels(filter_start_time, filter_end_time, is_jsonl)
+    panels += load_iostat_cpu_panels(filter_start_time, filter_end_time, is_jsonl)
+    panels += load_free_panels(filter_start_time, filter_end_time, is_jsonl)
+    panels += load_top_panels(filter_start_time, filter_end_time, PROC_OPTION in args, is_jsonl=is_jsonl)
+    panels += load_iostat_panels(filter_start_time, filter_end_time, is_group_by_disk, is_jsonl)
+    panels += load_iostat_dev_panels(filter_start_time, filter_end_time, is_group_by_disk, is_jsonl)
+    panels += load_df_panels(filter_start_time, filter_end_time, is_jsonl)
+    panels += load_collector_panels(filter_start_time, filter_end_time, is_jsonl)
+    write_html_report(OUTPUT_FILE_NAME, panels, max_level_points)
+
+
+if __name__ == '__main__':
+    main(sys.argv)
@@ -1,138 +1,144 @@
-import datetime as dt
-import glob
 import re
 import sys
-from typing import List, Optional, Dict
+from typing import List, Optional, Dict, Iterable, Tuple, Iterator
 
 import matplotlib.dates as mdates
 import matplotlib.pyplot as plt
-from analyzeTool.analysis_util import convert_option_date_time, write_csv_file, \
-    create_max_value_row, create_average_value_row, is_contain_rage_from_start_to_end, convert_date_time
-
-R_PER_S_INDEX = 1  # r/s index
-W_PER_S_INDEX = 7  # w/s index
-DEV_PARTITION_NAME_INDEX = 0  # Device Partition Name index
+from analyzeTool.analysis_util import find_log_files, convert_option_date_time, write_csv_file, \
+    create_max_value_row, create_average_value_row, iterate_log_lines, convert_filter_seconds, \
+    is_contain_range_seconds, format_seconds, convert_seconds_to_date_time, get_column_index, \
+    convert_sparse_records_to_array2d, set_output_options, get_option_value, profile_phase, set_profile_options
+from analyzeTool.iostat_util import iterate_iostat_blocks, get_label_index, plot_line_graph, DEVICE_HEADER_LABEL, \
+    iterate_device_values, get_device_columns, iterate_jsonl_iostat_blocks
+
+R_PER_S_INDEX = 1  # r/s index (when not found in header)
+W_PER_S_INDEX = 7  # w/s index (when not found in header)
+R_PER_S_LABEL = 'r/s'
+W_PER_S_LABEL = 'w/s'
 IOSTAT_READ_IO_FILE_NAME = 'iostat_read_result'
 IOSTAT_WRITE_IO_FILE_NAME = 'iostat_write_result'
 EXCEL_OPTION = '--withExcel'
 START_DATETIME_OPTION = '--startTime'
 END_DATETIME_OPTION = '--endTime'
+GROUP_BY_DISK_OPTION = '--groupByDisk'
+DEVICE_FILTER_OPTION = '--deviceFilter'
+JSONL_OPTION = '--jsonl'
+JSONL_RECORD_TYPE = 'iostat_x_dev'
+JSONL_LABELS = [R_PER_S_LABEL, W_PER_S_LABEL]
 
 
-def view_line_graph(dev_partition_names: List[str], read_iops_array2d: List[List[str]],
+@profile_phase('render')
+def view_line_graph(dev_partition_names: List[str], times: List[int], read_iops_array2d: List[List[str]],
                     write_iops_array2d: List[List[str]]):
     """
     Description:
         create and view line graph by matplotlib.
     :param dev_partition_names: top line of output file. top line is '' and device partition name.
+    :param times: date time seconds of each row.
     :param read_iops_array2d: 2d array (row: date time, column: process). row 0 is date time.
     :param write_iops_array2d: 2d array (row: date time, column: process). row 0 is date time.
     :return: void
     """
-    def plot_graph(ax, graph_title: str, times: List[str], header: List[str], array2d: List[List[str]]):
-        for col in range(len(array2d[0])):
-            if col == 0:
-                # skip because column 0 is time
-                continue
-            y_values = []
-            for row in range(len(array2d)):
-                y_values.append(float(array2d[row][col]) if array2d[row][col] != '' else None)
-            ax.plot(times, y_values, label=header[col])
-        ax.set_title(graph_title)
-        ax.set_xlabel('Time')
-        ax.set_ylabel('IOPS')
-        ax.legend()
-        ax.grid()
-    times = [convert_date_time(write_iops_array2d[i][0]) for i in range(len(write_iops_array2d))]
-    x_alias = [time for time in times[::int(len(times) / 10)]]
+    times = [convert_seconds_to_date_time(seconds) for seconds in times]
     fig, (ax_top, ax_under) = plt.subplots(nrows=2, ncols=1, sharex=True)
     fig.subplots_adjust(bottom=0.2, top=0.95)
-    plot_graph(ax_top, 'IO read (r/s)', times, dev_partition_names, read_iops_array2d)
-    plot_graph(ax_under, 'IO write (w/s)', times, dev_partition_names, write_iops_array2d)
+    plot_line_graph(ax_top, 'IO read (r/s)', 'IOPS', times, dev_partition_names, read_iops_array2d)
+    plot_line_graph(ax_under, 'IO write (w/s)', 'IOPS', times, dev_partition_names, write_iops_array2d)
     ax_under.xaxis.set_major_locator(mdates.DayLocator(bymonthday=None, interval=1, tz=None))
     ax_under.xaxis.set_major_formatter(mdates.DateFormatter('%Y/%m/%d'))
     plt.xticks(rotation=30)
     plt.subplots_adjust(hspace=0.3)
 
 
-def analyze_iostat_extend_dev_log_one_line(line_columns: List[str], dev_partition_names: List[str],
-                                           read_iops_dict: Dict, write_iops_dict: Dict,
-                                           is_got_dev_partition_name: bool):
-    dev_partition_name = line_columns[DEV_PARTITION_NAME_INDEX]
-    if not is_got_dev_partition_name:
-        dev_partition_names.append(dev_partition_name)
-    read_iops_dict[dev_partition_name] = line_columns[R_PER_S_INDEX]
-    write_iops_dict[dev_partition_name] = line_columns[W_PER_S_INDEX]
-
-
-def add_time_iops_array2d(date_time: str, dev_partition_names: List[str], iops_dict: Dict,
-                          iops_array2d: List[List[str]]):
-    if date_time == '':
-        return
-    record: List[str] = [''] * len(dev_partition_names)
-    for name in dev_partition_names:
-        record[dev_partition_names.index(name)] = iops_dict[name]
-    iops_array2d.append([date_time] + record)
-
-
-def get_date_time(line: str) -> str:
-    return dt.datetime.strptime(line[:-1], '%Y年%m月%d日 %H時%M分%S秒').strftime('%Y/%m/%d %H:%M:%S')
-
-
-def is_date_time_line(line: str) -> bool:
-    result = re.match(r'\d{4}年\d{2}月\d{2}日 \d{2}時\d{2}分\d{2}秒', line)
-    if result:
-        return True
-    return False
-
-
-def analyze_iostat_log_lines(lines: List[str], filter_start_time: Optional, filter_end_time: Optional,
-                             dev_partition_names: List[str], read_iops_array2d: List[List[str]],
-                             write_iops_array2d: List[List[str]]):
-    is_got_dev_partition_name = False
-    date_time: str = ''
-    read_iops_dict: Dict = {}
-    write_iops_dict: Dict = {}
-    one_block_line_count: int = 0
-    for line in lines:
-        if is_date_time_line(line):
-            if is_contain_rage_from_start_to_end(date_time, filter_start_time, filter_end_time):
-                add_time_iops_array2d(date_time, dev_partition_names, read_iops_dict, read_iops_array2d)
-                add_time_iops_array2d(date_time, dev_partition_names, write_iops_dict, write_iops_array2d)
-            if one_block_line_count != 0 and not is_got_dev_partition_name:
-                is_got_dev_partition_name = True
-            one_block_line_count = 0
-            date_time = get_date_time(line)
-            read_iops_dict = {}
-            write_iops_dict = {}
+@profile_phase('parse')
+def analyze_iostat_log_lines(lines: Iterable[str], filter_start_time: Optional, filter_end_time: Optional,
+                             dev_partition_names: List[str], times: List[int],
+                             read_iops_records: List[Tuple[str, Dict[int, str]]],
+                             write_iops_records: List[Tuple[str, Dict[int, str]]], is_group_by_disk: bool):
+    """
+    Description:
+        analyze iostat extend device log lines. devices appeared on the way (hotplug, LVM/dm volume) are added
+        as new column, and each record holds only the devices in its block.
+    :param lines: log lines.
+    :param filter_start_time: output to start date time.
+    :param filter_end_time: output to end date time.
+    :param dev_partition_names: device partition names in order of appearance.
+    :param times: date time seconds of each record.
+    :param read_iops_records: list of (date time, map of column index and r/s).
+    :param write_iops_records: list of (date time, map of column index and w/s).
+    :param is_group_by_disk: output per disk (partitions are rolled up) and dm/md group instead of per partition.
+    :return: void
+    """
+    analyze_iostat_blocks(iterate_iostat_blocks(lines), filter_start_time, filter_end_time, dev_partition_names,
+                          times, read_iops_records, write_iops_records, is_group_by_disk)
+
+
+@profile_phase('parse')
+def analyze_iostat_jsonl(file_paths: List[str], filter_start_time: Optional, filter_end_time: Optional,
+                         dev_partition_names: List[str], times: List[int],
+                         read_iops_records: List[Tuple[str, Dict[int, str]]],
+                         write_iops_records: List[Tuple[str, Dict[int, str]]], is_group_by_disk: bool):
+    """
+    Description:
+        analyze iostat_x_dev records of JSON lines logs (getstatlog.py --format jsonl).
+        parameters are the same as analyze_iostat_log_lines except file paths.
+    :param file_paths: log file paths (statlog_yyyymmdd.jsonl)
+    :return: void
+    """
+    blocks = iterate_jsonl_iostat_blocks(file_paths, JSONL_RECORD_TYPE, JSONL_LABELS)
+    analyze_iostat_blocks(blocks, filter_start_time, filter_end_time, dev_partition_names, times,
+                          read_iops_records, write_iops_records, is_group_by_disk)
+
+
+def analyze_iostat_blocks(blocks: Iterator[Tuple[int, List[str], List[List[str]]]], filter_start_time: Optional,
+                          filter_end_time: Optional, dev_partition_names: List[str], times: List[int],
+                          read_iops_records: List[Tuple[str, Dict[int, str]]],
+                          write_iops_records: List[Tuple[str, Dict[int, str]]], is_group_by_disk: bool):
+    dev_partition_indexes: Dict[str, int] = {}
+    filter_start_seconds = convert_filter_seconds(filter_start_time)
+    filter_end_seconds = convert_filter_seconds(filter_end_time)
+    for seconds, header, rows in blocks:
+        if header[0] != DEVICE_HEADER_LABEL:
+            continue
+        if not is_contain_range_seconds(seconds, filter_start_seconds, filter_end_seconds):
             continue
-        line_columns = line.split()
-        if len(line_columns) == 21:
-            if one_block_line_count == 0:
-                one_block_line_count += 1
-                continue
-            analyze_iostat_extend_dev_log_one_line(line_columns, dev_partition_names, read_iops_dict, write_iops_dict,
-                                                   is_got_dev_partition_name)
-            one_block_line_count += 1
-    if is_contain_rage_from_start_to_end(date_time, filter_start_time, filter_end_time):
-        add_time_iops_array2d(date_time, dev_partition_names, read_iops_dict, read_iops_array2d)
-        add_time_iops_array2d(date_time, dev_partition_names, write_iops_dict, write_iops_array2d)
-
-
-def analyze_iostat_log(lines, is_output_excel, is_view_graph, filter_start_time, filter_end_time):
+        r_per_s_index = get_label_index(header, R_PER_S_LABEL, R_PER_S_INDEX)
+        w_per_s_index = get_label_index(header, W_PER_S_LABEL, W_PER_S_INDEX)
+        read_iops_dict: Dict[int, str] = {}
+        write_iops_dict: Dict[int, str] = {}
+        for name, values in iterate_device_values(rows, [r_per_s_index, w_per_s_index], is_group_by_disk):
+            index = get_column_index(name, dev_partition_names, dev_partition_indexes)
+            read_iops_dict[index] = values[0]
+            write_iops_dict[index] = values[1]
+        times.append(seconds)
+        date_time = format_seconds(seconds)
+        read_iops_records.append((date_time, read_iops_dict))
+        write_iops_records.append((date_time, write_iops_dict))
+
+
+def analyze_iostat_log(file_paths, is_output_excel, is_view_graph, filter_start_time, filter_end_time,
+                       is_group_by_disk, device_filter, is_jsonl=False):
     dev_partition_names: List[str] = []
-    read_iops_array2d: List[List[str]] = []
-    write_iops_array2d: List[List[str]] = []
-    analyze_iostat_log_lines(lines, filter_start_time, filter_end_time, dev_partition_names, read_iops_array2d,
-                             write_iops_array2d)
+    times: List[int] = []
+    read_iops_records: List[Tuple[str, Dict[int, str]]] = []
+    write_iops_records: List[Tuple[str, Dict[int, str]]] = []
+    if is_jsonl:
+        analyze_iostat_jsonl(file_paths, filter_start_time, filter_end_time, dev_partition_names, times,
+                             read_iops_records, write_iops_records, is_group_by_disk)
+    else:
+        analyze_iostat_log_lines(iterate_log_lines(file_paths), filter_start_time, filter_end_time,
+                                 dev_partition_names, times, read_iops_records, write_iops_records, is_group_by_disk)
+    read_iops_array2d = convert_sparse_records_to_array2d(read_iops_records, len(dev_partition_names))
+    write_iops_array2d = convert_sparse_records_to_array2d(write_iops_records, len(dev_partition_names))
     dev_partition_names = [''] + dev_partition_names
-    view_line_graph(dev_partition_names, read_iops_array2d, write_iops_array2d)
+    view_line_graph(dev_partition_names, times, read_iops_array2d, write_iops_array2d)
     read_iops_array2d.append(['MAX:'] + create_max_value_row(read_iops_array2d))
     read_iops_array2d.append(['AVG:'] + create_average_value_row(read_iops_array2d))
     write_iops_array2d.append(['MAX:'] + create_max_value_row(write_iops_array2d))
     write_iops_array2d.append(['AVG:'] + create_average_value_row(write_iops_array2d))
-    write_csv_file(IOSTAT_READ_IO_FILE_NAME, dev_partition_names, read_iops_array2d)
-    write_csv_file(IOSTAT_WRITE_IO_FILE_NAME, dev_partition_names, write_iops_array2d)
+    device_columns = get_device_columns(dev_partition_names, device_filter)
+    write_csv_file(IOSTAT_READ_IO_FILE_NAME, dev_partition_names, read_iops_array2d, device_columns)
+    write_csv_file(IOSTAT_WRITE_IO_FILE_NAME, dev_partition_names, write_iops_array2d, device_columns)
     plt.show()
 
 
@@ -144,18 +150,22 @@ def main(args: List[str]):
     """
     is_output_excel = False
     is_view_graph = False
+    is_group_by_disk = GROUP_BY_DISK_OPTION in args
+    device_filter_value = get_option_value(DEVICE_FILTER_OPTION, args)
+    device_filter = re.compile(device_filter_value) if device_filter_value is not None else None
+    set_output_options(args)
+    set_profile_options(args)
     filter_start_time: Optional = None
     filter_end_time: Optional = None
     if START_DATETIME_OPTION in args:
         filter_start_time = convert_option_date_time(START_DATETIME_OPTION, args)
     if END_DATETIME_OPTION in args:
         filter_end_time = convert_option_date_time(END_DATETIME_OPTION, args)
-    file_paths: List[str] = glob.glob("../input/iostat_x_dev_*.log")
-    lines = []
-    for file_path in file_paths:
-        with open(file_path, 'r', encoding="utf-8_sig") as f:
-            lines += f.readlines()
-    analyze_iostat_log(lines, is_output_excel, is_view_graph, filter_start_time, filter_end_time)
+    is_jsonl = JSONL_OPTION in args
+    file_paths: List[str] = find_log_files("../input/statlog_*.jsonl" if is_jsonl else "../input/iostat_x_dev_*.log")
+    analyze_iostat_log(file_paths, is_output_excel, is_view_graph, filter_start_time, filter_end_time,
+                       is_group_by_disk, device_filter, is_jsonl)
 
 
-main(sys.argv)
+if __name__ == '__main__':
+    main(sys.argv)
@@ -0,0 +1,152 @@
+import sys
+from typing import List, Optional, Iterable
+
+import matplotlib.dates as mdates
+import matplotlib.pyplot as plt
+from analyzeTool.analysis_util import find_log_files, convert_option_date_time, write_csv_file, \
+    create_max_value_row, create_average_value_row, iterate_log_lines, convert_filter_seconds, \
+    is_contain_range_seconds, format_seconds, convert_seconds_to_date_time, set_output_options, \
+    profile_phase, set_profile_options, load_jsonl_array2d
+from analyzeTool.iostat_util import iterate_iostat_blocks, DEVICE_HEADER_LABEL
+
+IDLE_LABEL = '%idle'
+CPU_USE_LABEL = 'cpu_use'
+OUTPUT_FILE_NAME = 'iostat_cpu_result'
+GRAPH_TITLE = 'CPU Usage (iostat)'
+GRAPH_EXCLUDE_LABELS = [IDLE_LABEL]
+START_DATETIME_OPTION = '--startTime'
+END_DATETIME_OPTION = '--endTime'
+JSONL_OPTION = '--jsonl'
+JSONL_RECORD_TYPE = 'iostat_cpu'
+JSONL_FIELDS = ['%user', '%nice', '%system', '%iowait', '%steal', IDLE_LABEL]
+
+
+@profile_phase('render')
+def view_line_graph(title: str, header: List[str], times: List[int], array2d: List[List[str]]):
+    """
+    Description:
+        create and view line graph by matplotlib.
+    :param title: graph title.
+    :param header: top line of output file. top line is '' and cpu labels.
+    :param times: date time seconds of each row.
+    :param array2d: 2d array (row: date time, column: cpu label). row 0 is date time.
+    :return: void
+    """
+    times = [convert_seconds_to_date_time(seconds) for seconds in times]
+    fig, axes = plt.subplots()
+    fig.subplots_adjust(bottom=0.2, top=0.95)
+    for col in range(len(header)):
+        if col == 0 or header[col] in GRAPH_EXCLUDE_LABELS:
+            # skip because column 0 is time and idle is the opposite of usage
+            continue
+        y_values = []
+        for row in range(len(array2d)):
+            y_values.append(float(array2d[row][col]) if array2d[row][col] != '' else None)
+        axes.plot(times, y_values, label=header[col])
+    axes.xaxis.set_major_locator(mdates.DayLocator(bymonthday=None, interval=1, tz=None))
+    axes.xaxis.set_major_formatter(mdates.DateFormatter('%Y/%m/%d'))
+    axes.set_title(title)
+    axes.set_xlabel('Time')
+    axes.set_ylabel('CPU Usage [%]')
+    axes.set_ylim(0, 100)
+    axes.legend()
+    axes.grid()
+    plt.xticks(rotation=30)
+
+
+@profile_phase('parse')
+def analyze_iostat_cpu_log_lines(lines: Iterable[str], filter_start_time: Optional, filter_end_time: Optional,
+                                 cpu_labels: List[str], times: List[int], array2d: List[List[str]]):
+    """
+    Description:
+        analyze iostat cpu log lines (iostat -cyt) in one pass.
+    :param lines: log lines.
+    :param filter_start_time: output to start date time.
+    :param filter_end_time: output to end date time.
+    :param cpu_labels: cpu labels (%user, %nice, ...). set by the first block.
+    :param times: date time seconds of each row.
+    :param array2d: 2d array (row: date time, column: cpu label). row 0 is date time.
+    :return: void
+    """
+    filter_start_seconds = convert_filter_seconds(filter_start_time)
+    filter_end_seconds = convert_filter_seconds(filter_end_time)
+    for seconds, header, rows in iterate_iostat_blocks(lines):
+        if header[0] == DEVICE_HEADER_LABEL or not rows:
+            continue
+        if not cpu_labels:
+            cpu_labels.extend(header)
+        if header != cpu_labels:
+            # sysstat version differs between files
+            continue
+        if not is_contain_range_seconds(seconds, filter_start_seconds, filter_end_seconds):
+            continue
+        values = rows[0]
+        cpu_use = '{:.2f}'.format(100.0 - float(values[header.index(IDLE_LABEL)]))
+        times.append(seconds)
+        array2d.append([format_seconds(seconds)] + values + [cpu_use])
+
+
+@profile_phase('parse')
+def analyze_iostat_cpu_jsonl(file_paths: List[str], filter_start_time: Optional, filter_end_time: Optional,
+                             cpu_labels: List[str], times: List[int], array2d: List[List]):
+    """
+    Description:
+        analyze iostat_cpu records of JSON lines logs (getstatlog.py --format jsonl). values are numbers.
+    :param file_paths: log file paths (statlog_yyyymmdd.jsonl)
+    :param filter_start_time: output to start date time.
+    :param filter_end_time: output to end date time.
+    :param cpu_labels: cpu labels (%user, %nice, ...).
+    :param times: date time seconds of each row.
+    :param array2d: 2d array (row: date time, column: cpu label). row 0 is date time.
+    :return: void
+    """
+    jsonl_times, jsonl_labels, jsonl_array2d = load_jsonl_array2d(file_paths, JSONL_RECORD_TYPE, JSONL_FIELDS,
+                                                                  filter_start_time, filter_end_time)
+    cpu_labels.extend(jsonl_labels)
+    idle_col = jsonl_labels.index(IDLE_LABEL) + 1
+    for seconds, record in zip(jsonl_times, jsonl_array2d):
+        if '' in record:
+            continue
+        times.append(seconds)
+        array2d.append(record + ['{:.2f}'.format(100.0 - record[idle_col])])
+
+
+def analyze_iostat_cpu_log(file_paths: List[str], filter_start_time: Optional, filter_end_time: Optional,
+                           is_jsonl: bool):
+    cpu_labels: List[str] = []
+    times: List[int] = []
+    array2d: List[List[str]] = []
+    if is_jsonl:
+        analyze_iostat_cpu_jsonl(file_paths, filter_start_time, filter_end_time, cpu_labels, times, array2d)
+    else:
+        analyze_iostat_cpu_log_lines(iterate_log_lines(file_paths), filter_start_time, filter_end_time, cpu_labels,
+                                     times, array2d)
+    header_labels = [''] + cpu_labels + [CPU_USE_LABEL]
+    view_line_graph(GRAPH_TITLE, header_labels, times, array2d)
+    array2d.append(['MAX:'] + create_max_value_row(array2d))
+    array2d.append(['AVG:'] + create_average_value_row(array2d))
+    write_csv_file(OUTPUT_FILE_NAME, header_labels, array2d)
+    plt.show()
+
+
+def main(args: List[str]):
+    """
+
+    :param args: command line arguments
+    :return: void
+    """
+    filter_start_time: Optional = None
+    filter_end_time: Optional = None
+    set_output_options(args)
+    set_profile_options(args)
+    if START_DATETIME_OPTION in args:
+        filter_start_time = convert_option_date_time(START_DATETIME_OPTION, args)
+    if END_DATETIME_OPTION in args:
+        filter_end_time = convert_option_date_time(END_DATETIME_OPTION, args)
+    is_jsonl = JSONL_OPTION in args
+    file_paths: List[str] = find_log_files("../input/statlog_*.jsonl" if is_jsonl else "../input/iostat_cpu_*.log")
+    analyze_iostat_cpu_log(file_paths, filter_start_time, filter_end_time, is_jsonl)
+
+
+if __name__ == '__main__':
+    main(sys.argv)
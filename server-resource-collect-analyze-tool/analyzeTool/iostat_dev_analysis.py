@@ -0,0 +1,185 @@
+import re
+import sys
+from typing import List, Optional, Dict, Iterable, Tuple, Pattern, Iterator
+
+import matplotlib.dates as mdates
+import matplotlib.pyplot as plt
+from analyzeTool.analysis_util import find_log_files, convert_option_date_time, write_csv_file, \
+    create_max_value_row, create_average_value_row, iterate_log_lines, convert_filter_seconds, \
+    is_contain_range_seconds, format_seconds, convert_seconds_to_date_time, get_column_index, \
+    convert_sparse_records_to_array2d, set_output_options, get_option_value, profile_phase, set_profile_options
+from analyzeTool.iostat_util import iterate_iostat_blocks, get_label_index, plot_line_graph, DEVICE_HEADER_LABEL, \
+    iterate_device_values, get_device_columns, iterate_jsonl_iostat_blocks
+
+TPS_INDEX = 1  # tps index (when not found in header)
+KB_READ_PER_S_INDEX = 2  # kB_read/s index (when not found in header)
+KB_WRITE_PER_S_INDEX = 3  # kB_wrtn/s index (when not found in header)
+TPS_LABEL = 'tps'
+KB_READ_PER_S_LABEL = 'kB_read/s'
+KB_WRITE_PER_S_LABEL = 'kB_wrtn/s'
+IOSTAT_TPS_FILE_NAME = 'iostat_dev_tps_result'
+IOSTAT_READ_KB_FILE_NAME = 'iostat_dev_read_kb_result'
+IOSTAT_WRITE_KB_FILE_NAME = 'iostat_dev_write_kb_result'
+START_DATETIME_OPTION = '--startTime'
+END_DATETIME_OPTION = '--endTime'
+GROUP_BY_DISK_OPTION = '--groupByDisk'
+DEVICE_FILTER_OPTION = '--deviceFilter'
+JSONL_OPTION = '--jsonl'
+JSONL_RECORD_TYPE = 'iostat_dev'
+JSONL_LABELS = [TPS_LABEL, KB_READ_PER_S_LABEL, KB_WRITE_PER_S_LABEL]
+
+
+@profile_phase('render')
+def view_line_graph(dev_partition_names: List[str], times: List[int], tps_array2d: List[List[str]],
+                    read_kb_array2d: List[List[str]], write_kb_array2d: List[List[str]]):
+    """
+    Description:
+        create and view line graph by matplotlib.
+    :param dev_partition_names: top line of output file. top line is '' and device partition name.
+    :param times: date time seconds of each row.
+    :param tps_array2d: 2d array (row: date time, column: device). row 0 is date time.
+    :param read_kb_array2d: 2d array (row: date time, column: device). row 0 is date time.
+    :param write_kb_array2d: 2d array (row: date time, column: device). row 0 is date time.
+    :return: void
+    """
+    times = [convert_seconds_to_date_time(seconds) for seconds in times]
+    fig, (ax_top, ax_middle, ax_under) = plt.subplots(nrows=3, ncols=1, sharex=True)
+    fig.subplots_adjust(bottom=0.2, top=0.95)
+    plot_line_graph(ax_top, 'IO transfer (tps)', 'tps', times, dev_partition_names, tps_array2d)
+    plot_line_graph(ax_middle, 'IO read (kB_read/s)', 'kB/s', times, dev_partition_names, read_kb_array2d)
+    plot_line_graph(ax_under, 'IO write (kB_wrtn/s)', 'kB/s', times, dev_partition_names, write_kb_array2d)
+    ax_under.xaxis.set_major_locator(mdates.DayLocator(bymonthday=None, interval=1, tz=None))
+    ax_under.xaxis.set_major_formatter(mdates.DateFormatter('%Y/%m/%d'))
+    plt.xticks(rotation=30)
+    plt.subplots_adjust(hspace=0.3)
+
+
+@profile_phase('parse')
+def analyze_iostat_dev_log_lines(lines: Iterable[str], filter_start_time: Optional, filter_end_time: Optional,
+                                 dev_partition_names: List[str], times: List[int],
+                                 tps_records: List[Tuple[str, Dict[int, str]]],
+                                 read_kb_records: List[Tuple[str, Dict[int, str]]],
+                                 write_kb_records: List[Tuple[str, Dict[int, str]]], is_group_by_disk: bool):
+    """
+    Description:
+        analyze iostat device log lines (iostat -dyt -p ALL) in one pass.
+    :param lines: log lines.
+    :param filter_start_time: output to start date time.
+    :param filter_end_time: output to end date time.
+    :param dev_partition_names: device partition names in order of appearance.
+    :param times: date time seconds of each row.
+    :param tps_records: list of (date time, map of column index and tps).
+    :param read_kb_records: list of (date time, map of column index and kB_read/s).
+    :param write_kb_records: list of (date time, map of column index and kB_wrtn/s).
+    :param is_group_by_disk: output per disk (partitions are rolled up) and dm/md group instead of per partition.
+    :return: void
+    """
+    analyze_iostat_dev_blocks(iterate_iostat_blocks(lines), filter_start_time, filter_end_time, dev_partition_names,
+                              times, tps_records, read_kb_records, write_kb_records, is_group_by_disk)
+
+
+@profile_phase('parse')
+def analyze_iostat_dev_jsonl(file_paths: List[str], filter_start_time: Optional, filter_end_time: Optional,
+                             dev_partition_names: List[str], times: List[int],
+                             tps_records: List[Tuple[str, Dict[int, str]]],
+                             read_kb_records: List[Tuple[str, Dict[int, str]]],
+                             write_kb_records: List[Tuple[str, Dict[int, str]]], is_group_by_disk: bool):
+    """
+    Description:
+        analyze iostat_dev records of JSON lines logs (getstatlog.py --format jsonl).
+        parameters are the same as analyze_iostat_dev_log_lines except file paths.
+    :param file_paths: log file paths (statlog_yyyymmdd.jsonl)
+    :return: void
+    """
+    blocks = iterate_jsonl_iostat_blocks(file_paths, JSONL_RECORD_TYPE, JSONL_LABELS)
+    analyze_iostat_dev_blocks(blocks, filter_start_time, filter_end_time, dev_partition_names, times, tps_records,
+                              read_kb_records, write_kb_records, is_group_by_disk)
+
+
+def analyze_iostat_dev_blocks(blocks: Iterator[Tuple[int, List[str], List[List[str]]]], filter_start_time: Optional,
+                              filter_end_time: Optional, dev_partition_names: List[str], times: List[int],
+                              tps_records: List[Tuple[str, Dict[int, str]]],
+                              read_kb_records: List[Tuple[str, Dict[int, str]]],
+                              write_kb_records: List[Tuple[str, Dict[int, str]]], is_group_by_disk: bool):
+    dev_partition_indexes: Dict[str, int] = {}
+    filter_start_seconds = convert_filter_seconds(filter_start_time)
+    filter_end_seconds = convert_filter_seconds(filter_end_time)
+    for seconds, header, rows in blocks:
+        if header[0] != DEVICE_HEADER_LABEL:
+            continue
+        if not is_contain_range_seconds(seconds, filter_start_seconds, filter_end_seconds):
+            continue
+        tps_index = get_label_index(header, TPS_LABEL, TPS_INDEX)
+        kb_read_index = get_label_index(header, KB_READ_PER_S_LABEL, KB_READ_PER_S_INDEX)
+        kb_write_index = get_label_index(header, KB_WRITE_PER_S_LABEL, KB_WRITE_PER_S_INDEX)
+        tps_dict: Dict[int, str] = {}
+        read_kb_dict: Dict[int, str] = {}
+        write_kb_dict: Dict[int, str] = {}
+        value_indexes = [tps_index, kb_read_index, kb_write_index]
+        for name, values in iterate_device_values(rows, value_indexes, is_group_by_disk):
+            index = get_column_index(name, dev_partition_names, dev_partition_indexes)
+            tps_dict[index] = values[0]
+            read_kb_dict[index] = values[1]
+            write_kb_dict[index] = values[2]
+        times.append(seconds)
+        date_time = format_seconds(seconds)
+        tps_records.append((date_time, tps_dict))
+        read_kb_records.append((date_time, read_kb_dict))
+        write_kb_records.append((date_time, write_kb_dict))
+
+
+def write_result(filename: str, header: List[str], array2d: List[List[str]], device_filter: Optional[Pattern]):
+    array2d.append(['MAX:'] + create_max_value_row(array2d))
+    array2d.append(['AVG:'] + create_average_value_row(array2d))
+    write_csv_file(filename, header, array2d, get_device_columns(header, device_filter))
+
+
+def analyze_iostat_dev_log(file_paths: List[str], filter_start_time: Optional, filter_end_time: Optional,
+                           is_group_by_disk: bool, device_filter: Optional[Pattern], is_jsonl: bool = False):
+    dev_partition_names: List[str] = []
+    times: List[int] = []
+    tps_records: List[Tuple[str, Dict[int, str]]] = []
+    read_kb_records: List[Tuple[str, Dict[int, str]]] = []
+    write_kb_records: List[Tuple[str, Dict[int, str]]] = []
+    if is_jsonl:
+        analyze_iostat_dev_jsonl(file_paths, filter_start_time, filter_end_time, dev_partition_names, times,
+                                 tps_records, read_kb_records, write_kb_records, is_group_by_disk)
+    else:
+        analyze_iostat_dev_log_lines(iterate_log_lines(file_paths), filter_start_time, filter_end_time,
+                                     dev_partition_names, times, tps_records, read_kb_records, write_kb_records,
+                                     is_group_by_disk)
+    tps_array2d = convert_sparse_records_to_array2d(tps_records, len(dev_partition_names))
+    read_kb_array2d = convert_sparse_records_to_array2d(read_kb_records, len(dev_partition_names))
+    write_kb_array2d = convert_sparse_records_to_array2d(write_kb_records, len(dev_partition_names))
+    dev_partition_names = [''] + dev_partition_names
+    view_line_graph(dev_partition_names, times, tps_array2d, read_kb_array2d, write_kb_array2d)
+    write_result(IOSTAT_TPS_FILE_NAME, dev_partition_names, tps_array2d, device_filter)
+    write_result(IOSTAT_READ_KB_FILE_NAME, dev_partition_names, read_kb_array2d, device_filter)
+    write_result(IOSTAT_WRITE_KB_FILE_NAME, dev_partition_names, write_kb_array2d, device_filter)
+    plt.show()
+
+
+def main(args: List[str]):
+    """
+
+    :param args: command line arguments
+    :return: void
+    """
+    is_group_by_disk = GROUP_BY_DISK_OPTION in args
+    device_filter_value = get_option_value(DEVICE_FILTER_OPTION, args)
+    device_filter = re.compile(device_filter_value) if device_filter_value is not None else None
+    set_output_options(args)
+    set_profile_options(args)
+    filter_start_time: Optional = None
+    filter_end_time: Optional = None
+    if START_DATETIME_OPTION in args:
+        filter_start_time = convert_option_date_time(START_DATETIME_OPTION, args)
+    if END_DATETIME_OPTION in args:
+        filter_end_time = convert_option_date_time(END_DATETIME_OPTION, args)
+    is_jsonl = JSONL_OPTION in args
+    file_paths: List[str] = find_log_files("../input/statlog_*.jsonl" if is_jsonl else "../input/iostat_dev_*.log")
+    analyze_iostat_dev_log(file_paths, filter_start_time, filter_end_time, is_group_by_disk, device_filter, is_jsonl)
+
+
+if __name__ == '__main__':
+    main(sys.argv)
@@ -0,0 +1,307 @@
+"""
+common functions of iostat log (iostat -t) analysis.
+    one block of iostat log is date time line, header line and value lines.
+    ex)
+        2021年01月01日 10時00分05秒
+        avg-cpu:  %user   %nice %system %iowait  %steal   %idle
+                   0.50    0.00    0.25    0.00    0.00   99.25
+
+        Device             tps    kB_read/s    kB_wrtn/s    kB_read    kB_wrtn
+        sda               1.00         0.00         8.00          0         40
+"""
+import re
+from typing import List, Iterable, Iterator, Tuple, Optional, Dict, Pattern
+
+from analyzeTool.analysis_util import convert_to_seconds, iterate_jsonl_samples
+
+CPU_HEADER_LABEL = 'avg-cpu:'
+DEVICE_HEADER_LABEL = 'Device'
+ISO_DATE_TIME_SEPARATORS = ['T', ' ']
+MIN_DATE_TIME_LENGTH = 17  # 01/01/21 10:00:05
+MAX_DATE_TIME_LENGTH = 25  # 2021-01-01T10:00:05+09:00
+date_seconds_cache: Dict[str, int] = {}  # key: date part of date time line, value: seconds of the day start
+# sda1 -> sda, vda1 -> vda, xvda1 -> xvda, nvme0n1p1 -> nvme0n1, mmcblk0p1 -> mmcblk0
+PARTITION_PATTERN = re.compile(r'^((?:sd|hd|vd|xvd)[a-z]+)\d+$|^((?:nvme\d+n|mmcblk|loop)\d+)p\d+$')
+STACKED_DEVICE_GROUPS = {'dm-': 'dm', 'md': 'md'}  # device name prefix: group name
+GROUP_VALUE_FORMAT = '{:.2f}'
+device_group_cache: Dict[str, Tuple[str, bool]] = {}  # key: device name, value: (group name, is whole device)
+
+
+def get_date_seconds(date: str, year: str, month: str, day: str) -> int:
+    """
+    Description:
+        get seconds of the day start. the result is cached per date part (one date per day).
+    :param date: date part of date time line (cache key).
+    :param year: year (4 digits, or 2 digits of 20xx).
+    :param month: month.
+    :param day: day.
+    :return: seconds
+    """
+    seconds = date_seconds_cache.get(date)
+    if seconds is None:
+        seconds = convert_to_seconds(int(year) if len(year) == 4 else 2000 + int(year), int(month), int(day), 0, 0, 0)
+        date_seconds_cache[date] = seconds
+    return seconds
+
+
+def parse_japanese_date_time(line: str) -> Optional[int]:
+    # 2021年01月01日 10時00分05秒
+    if line[4] != '年' or line[14:15] != '時' or line[20:21] != '秒':
+        return None
+    return get_date_seconds(line[0:11], line[0:4], line[5:7], line[8:10]) \
+        + int(line[12:14]) * 3600 + int(line[15:17]) * 60 + int(line[18:20])
+
+
+def parse_iso_date_time(line: str) -> Optional[int]:
+    # 2021-01-01T10:00:05+0900 (S_TIME_FORMAT=ISO) or 2021-01-01 10:00:05. time zone is ignored like other logs.
+    if line[4] != '-' or line[10:11] not in ISO_DATE_TIME_SEPARATORS or line[13:14] != ':':
+        return None
+    return get_date_seconds(line[0:10], line[0:4], line[5:7], line[8:10]) \
+        + int(line[11:13]) * 3600 + int(line[14:16]) * 60 + int(line[17:19])
+
+
+def parse_c_locale_date_time(line: str) -> Optional[int]:
+    # 01/01/21 10:00:05 (C locale) or 01/01/2021 10:00:05 AM (en_US locale)
+    if line[2] != '/' or line[5:6] != '/':
+        return None
+    time_start = 9 if line[8:9] == ' ' else 11
+    if line[time_start + 2:time_start + 3] != ':':
+        return None
+    hour = int(line[time_start:time_start + 2])
+    meridiem = line[time_start + 8:].strip().upper()
+    if meridiem == 'AM' and hour == 12:
+        hour = 0
+    elif meridiem == 'PM' and hour != 12:
+        hour += 12
+    elif meridiem not in ['', 'AM', 'PM']:
+        return None
+    date = line[0:time_start - 1]
+    return get_date_seconds(date, date[6:], date[0:2], date[3:5]) \
+        + hour * 3600 + int(line[time_start + 3:time_start + 5]) * 60 + int(line[time_start + 6:time_start + 8])
+
+
+DATE_TIME_PARSERS = [parse_japanese_date_time, parse_iso_date_time, parse_c_locale_date_time]
+
+
+def parse_date_time_line(line: str) -> Optional[int]:
+    """
+    Description:
+        parse date time line of 'iostat -t' to seconds from 1970/01/01 00:00:00.
+        supported formats: japanese locale, C/en_US locale (include AM/PM) and ISO.
+        seconds of the day start are cached per date, and time part is added to it.
+    :param line: log line.
+    :return: seconds. None when the line is not date time line.
+    """
+    if not line[:1].isdigit():
+        # value lines start with space or device name
+        return None
+    line = line.rstrip()
+    if len(line) < MIN_DATE_TIME_LENGTH or len(line) > MAX_DATE_TIME_LENGTH:
+        return None
+    try:
+        for parse in DATE_TIME_PARSERS:
+            seconds = parse(line)
+            if seconds is not None:
+                return seconds
+    except ValueError:
+        return None
+    return None
+
+
+def get_header_labels(line_columns: List[str]) -> List[str]:
+    """
+    Description:
+        get header labels aligned with the columns of value lines.
+        'avg-cpu:' has no value column, and 'Device:' (old sysstat) is normalized to 'Device'.
+    :param line_columns: header line columns.
+    :return: header labels.
+    """
+    if line_columns[0] == CPU_HEADER_LABEL:
+        return line_columns[1:]
+    return [DEVICE_HEADER_LABEL] + line_columns[1:]
+
+
+def is_header_line(line_columns: List[str]) -> bool:
+    return line_columns[0] == CPU_HEADER_LABEL or line_columns[0].rstrip(':') == DEVICE_HEADER_LABEL
+
+
+def iterate_iostat_blocks(lines: Iterable[str]) -> Iterator[Tuple[int, List[str], List[List[str]]]]:
+    """
+    Description:
+        split iostat log lines into blocks in one pass.
+        one block is yielded per header (avg-cpu or Device), so 'iostat -x' with cpu yields two blocks per date time.
+        value lines that don't match the header column count (truncated write) are skipped.
+    :param lines: iostat log lines (list or file object).
+    :return: iterator of (date time seconds, header labels, value line columns list)
+    """
+    date_time: Optional[int] = None
+    header: List[str] = []
+    rows: List[List[str]] = []
+    for line in lines:
+        seconds = parse_date_time_line(line)
+        if seconds is not None:
+            if header:
+                yield date_time, header, rows
+            date_time = seconds
+            header = []
+            rows = []
+            continue
+        line_columns = line.split()
+        if not line_columns:
+            # blank line is end of block
+            if header:
+                yield date_time, header, rows
+            header = []
+            rows = []
+            continue
+        if date_time is None:
+            # skip the first line of log (kernel version and host name)
+            continue
+        if is_header_line(line_columns):
+            if header:
+                yield date_time, header, rows
+            header = get_header_labels(line_columns)
+            rows = []
+            continue
+        if header and len(line_columns) == len(header):
+            rows.append(line_columns)
+    if header:
+        yield date_time, header, rows
+
+
+def iterate_jsonl_iostat_blocks(file_paths: List[str], record_type: str,
+                                labels: List[str]) -> Iterator[Tuple[int, List[str], List[List[str]]]]:
+    """
+    Description:
+        iterate device records of JSON lines logs (getstatlog.py --format jsonl) as blocks of iostat log,
+        so that the same block analysis is used for text and JSON lines logs.
+    :param file_paths: log file paths (statlog_yyyymmdd.jsonl)
+    :param record_type: iostat_dev or iostat_x_dev
+    :param labels: value labels of the block.
+    :return: iterator of (date time seconds, header labels, value line columns list)
+    """
+    header = [DEVICE_HEADER_LABEL] + labels
+    for seconds, sample in iterate_jsonl_samples(file_paths, record_type, 'device'):
+        rows = [[device] + [str(record.get(label, '')) for label in labels] for device, record in sample.items()]
+        yield seconds, header, rows
+
+
+def get_device_group(name: str) -> Tuple[str, bool]:
+    """
+    Description:
+        get device group of device name. partition belongs to the parent disk,
+        and stacked devices (dm-*, md*) are grouped into one group per kind.
+    :param name: device name in iostat log.
+    :return: (group name, true if the device is not partition)
+    """
+    group = device_group_cache.get(name)
+    if group is not None:
+        return group
+    group = (name, True)
+    for prefix, group_name in STACKED_DEVICE_GROUPS.items():
+        if name.startswith(prefix):
+            group = (group_name, 'p' not in name[len(prefix):])
+            break
+    else:
+        result = PARTITION_PATTERN.match(name)
+        if result:
+            group = (result.group(1) or result.group(2), False)
+    device_group_cache[name] = group
+    return group
+
+
+def aggregate_device_rows(rows: List[List[str]], value_indexes: List[int]) -> Dict[str, List[float]]:
+    """
+    Description:
+        aggregate value lines of one block per device group.
+        the disk line already includes its partitions, so partitions are summed only when the disk line is missing.
+    :param rows: value line columns list of one block. column 0 is device name.
+    :param value_indexes: column indexes of values to aggregate.
+    :return: map of group name and total values (same order as value_indexes).
+    """
+    device_totals: Dict[str, List[float]] = {}
+    partition_totals: Dict[str, List[float]] = {}
+    for line_columns in rows:
+        group_name, is_whole_device = get_device_group(line_columns[0])
+        totals = device_totals if is_whole_device else partition_totals
+        values = totals.get(group_name)
+        if values is None:
+            totals[group_name] = [float(line_columns[index]) for index in value_indexes]
+            continue
+        for i, index in enumerate(value_indexes):
+            values[i] += float(line_columns[index])
+    for group_name, values in partition_totals.items():
+        device_totals.setdefault(group_name, values)
+    return device_totals
+
+
+def iterate_device_values(rows: List[List[str]], value_indexes: List[int],
+                          is_group_by_disk: bool) -> Iterator[Tuple[str, List[str]]]:
+    """
+    Description:
+        get values per device (or per device group) of one block.
+    :param rows: value line columns list of one block. column 0 is device name.
+    :param value_indexes: column indexes of target values.
+    :param is_group_by_disk: aggregate partitions to disk and dm/md devices to one group.
+    :return: iterator of (device or group name, values)
+    """
+    if not is_group_by_disk:
+        for line_columns in rows:
+            yield line_columns[0], [line_columns[index] for index in value_indexes]
+        return
+    for group_name, values in aggregate_device_rows(rows, value_indexes).items():
+        yield group_name, [GROUP_VALUE_FORMAT.format(value) for value in values]
+
+
+def get_label_index(header: List[str], label: str, default_index: int) -> int:
+    """
+    Description:
+        get column index of label. the index differs by sysstat version, so find it in header.
+    :param header: header labels.
+    :param label: target label.
+    :param default_index: index when label is not found in header.
+    :return: column index.
+    """
+    if label in header:
+        return header.index(label)
+    return default_index
+
+
+def get_device_columns(header: List[str], device_filter: Optional[Pattern]) -> Optional[List[int]]:
+    """
+    Description:
+        get output column indexes of devices which match the filter (column 0 is date time).
+    :param header: top line of output file. top line is '' and device partition name.
+    :param device_filter: device name pattern. None is all devices.
+    :return: column indexes. None when device filter is not specified.
+    """
+    if device_filter is None:
+        return None
+    return [0] + [col for col in range(1, len(header)) if device_filter.search(header[col])]
+
+
+def plot_line_graph(ax, graph_title: str, y_label: str, times: List, header: List[str], array2d: List[List[str]]):
+    """
+    Description:
+        plot all columns of 2d array to axes.
+    :param ax: matplotlib axes.
+    :param graph_title: graph title.
+    :param y_label: y axis label.
+    :param times: x axis values.
+    :param header: top line of output file. top line is '' and column names.
+    :param array2d: 2d array (row: date time, column: device or cpu). row 0 is date time.
+    :return: void
+    """
+    for col in range(len(header)):
+        if col == 0:
+            # skip because column 0 is time
+            continue
+        y_values = []
+        for row in range(len(array2d)):
+            y_values.append(float(array2d[row][col]) if array2d[row][col] != '' else None)
+        ax.plot(times, y_values, label=header[col])
+    ax.set_title(graph_title)
+    ax.set_xlabel('Time')
+    ax.set_ylabel(y_label)
+    ax.legend()
+    ax.grid()
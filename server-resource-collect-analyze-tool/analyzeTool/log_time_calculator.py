@@ -1,45 +1,247 @@
 import datetime as dt
-import glob
+import io
+import os
 import re
 import sys
-from typing import List, Optional
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Tuple, Pattern, Iterable, Callable
 
-from analyzeTool.analysis_util import write_csv_file
+from analyzeTool.analysis_util import write_csv_file, find_log_files, is_compressed_file, open_binary_log_file, \
+    get_option_value, set_output_options, set_profile_options, profile_phase, DATETIME_FORMAT
 
+# Changeable values
+# (format name, regex of date time in line, strptime format of the matched string). first match is used.
+DATE_TIME_FORMATS = [
+    ('jp', r'\d{4}年\d{2}月\d{2}日 \d{2}時\d{2}分\d{2}秒', '%Y年%m月%d日 %H時%M分%S秒'),
+    ('slash', r'\d{4}/\d{2}/\d{2} \d{2}:\d{2}:\d{2}', '%Y/%m/%d %H:%M:%S'),
+    ('iso', r'\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}:\d{2}', '%Y-%m-%d{}%H:%M:%S'),
+    ('dmy', r'\d{2}/\d{2}/\d{2} \d{2}:\d{2}:\d{2}\.\d{1,6}', '%d/%m/%y %H:%M:%S.%f'),
+    ('apache', r'\d{2}/[A-Z][a-z]{2}/\d{4}:\d{2}:\d{2}:\d{2}', '%d/%b/%Y:%H:%M:%S'),
+]
+# Constant Value
 OUTPUT_FILE_NAME = 'log_wrap_result'
+INPUT_FILE_PATTERN = '../input/*.log'
+BLOCK_SIZE = 64 * 1024  # 64KB
+MAX_SCAN_SIZE = 16 * 1024 * 1024  # 16MB. give up when date time is not found within this size from head/tail.
+COMPRESSED_TAIL_BLOCKS = 16  # compressed file can not seek, so last blocks (1MB) are kept while reading
+DEFAULT_PARALLEL_COUNT = 16
+FORMAT_OPTION = '--format'
+PARALLEL_OPTION = '--parallel'
+ENCODING = 'utf-8'
 
 
-def get_date_time(line: str, format_num: int) -> Optional[dt]:
-    time = None
-    try:
-        if format_num == 1:
-            m = re.match(r'\d{4}年\d{2}月\d{2}日 \d{2}時\d{2}分\d{2}秒', line)
-            time = dt.datetime.strptime(m.group(), '%Y年%m月%d日 %H時%M分%S秒')
-        else:
-            return None
-    except Exception:
-        print('Fail get date time')
-        return None
-    return time
+def compile_date_time_formats(format_name: Optional[str]) -> List[Tuple[Pattern, str]]:
+    """
+    Description:
+        compile date time regex of DATE_TIME_FORMATS.
+    :param format_name: format name (--format). all formats are tried when None.
+    :return: list of (compiled regex, strptime format)
+    """
+    formats = [(re.compile(regex), date_time_format) for name, regex, date_time_format in DATE_TIME_FORMATS
+               if format_name is None or name == format_name]
+    if not formats:
+        names = ', '.join(name for name, _, _ in DATE_TIME_FORMATS)
+        raise ValueError('unknown format: {} (format: {})'.format(format_name, names))
+    return formats
 
 
-def analyze_time_logs(lines: List[str], result: List, format_num: int):
-    last_row = len(lines)
-    startTime: Optional[dt] = get_date_time(lines[0], format_num)
-    endTime: Optional[dt] = get_date_time(lines[last_row], format_num)
-    if startTime is not None or endTime is not None:
-        td = endTime - startTime
-        result.append([startTime, endTime, td.total_seconds()])
+def get_date_time(line: str, formats: List[Tuple[Pattern, str]]) -> Optional[Tuple[dt.datetime, int]]:
+    """
+    Description:
+        get the first date time in the line.
+    :param line: log line
+    :param formats: list of (compiled regex, strptime format)
+    :return: (date time, index of matched format). None when no date time.
+    """
+    for index, (pattern, date_time_format) in enumerate(formats):
+        m = pattern.search(line)
+        if m is None:
+            continue
+        matched = m.group()
+        if '{}' in date_time_format:
+            date_time_format = date_time_format.format(matched[10])  # 'T' or ' ' of iso format
+        try:
+            return dt.datetime.strptime(matched, date_time_format), index
+        except ValueError:
+            continue
+    return None
+
+
+def find_first_date_time(lines: Iterable[str], formats: List[Tuple[Pattern, str]]) \
+        -> Optional[Tuple[dt.datetime, int]]:
+    for line in lines:
+        date_time = get_date_time(line, formats)
+        if date_time is not None:
+            return date_time
+    return None
+
+
+def read_head_date_time(read: Callable[[int], bytes], formats: List[Tuple[Pattern, str]]) \
+        -> Optional[Tuple[dt.datetime, int]]:
+    """
+    Description:
+        read file from head by block until a line with date time is found.
+    :param read: read function of binary file
+    :param formats: list of (compiled regex, strptime format)
+    :return: (date time, index of matched format). None when not found within MAX_SCAN_SIZE.
+    """
+    remainder = b''
+    read_size = 0
+    while read_size < MAX_SCAN_SIZE:
+        block = read(BLOCK_SIZE)
+        if not block:
+            return find_first_date_time([remainder.decode(ENCODING, 'replace')], formats)
+        read_size += len(block)
+        lines = (remainder + block).split(b'\n')
+        remainder = lines.pop()
+        date_time = find_first_date_time((line.decode(ENCODING, 'replace') for line in lines), formats)
+        if date_time is not None:
+            return date_time
+    return None
+
+
+def read_tail_date_time(f, formats: List[Tuple[Pattern, str]]) -> Optional[Tuple[dt.datetime, int]]:
+    """
+    Description:
+        read file from tail by block (seek backward) until a line with date time is found.
+    :param f: binary file (seekable)
+    :param formats: list of (compiled regex, strptime format)
+    :return: (date time, index of matched format). None when not found within MAX_SCAN_SIZE.
+    """
+    file_size = f.seek(0, os.SEEK_END)
+    position = file_size
+    remainder = b''
+    while position > 0 and file_size - position < MAX_SCAN_SIZE:
+        read_size = min(BLOCK_SIZE, position)
+        position -= read_size
+        f.seek(position)
+        lines = (f.read(read_size) + remainder).split(b'\n')
+        # first line may continue to the previous block (except the file head)
+        remainder = lines.pop(0) if position > 0 else b''
+        date_time = find_first_date_time((line.decode(ENCODING, 'replace') for line in reversed(lines)), formats)
+        if date_time is not None:
+            return date_time
+    return None
+
+
+def read_compressed_date_times(file_path: str, formats: List[Tuple[Pattern, str]]) \
+        -> Tuple[Optional[Tuple[dt.datetime, int]], Optional[Tuple[dt.datetime, int]]]:
+    """
+    Description:
+        get the first and last date time of compressed log file. the file is decompressed to the end,
+        and only the last blocks are kept for the tail.
+    :param file_path: log file path (.gz, .zst)
+    :param formats: list of (compiled regex, strptime format)
+    :return: (date time, index of matched format) of head and tail. None when not found.
+    """
+    tail_blocks = deque(maxlen=COMPRESSED_TAIL_BLOCKS)
+    block_count = 0
+
+    def read_block(size: int) -> bytes:
+        nonlocal block_count
+        block = f.read(size)
+        if block:
+            tail_blocks.append(block)
+            block_count += 1
+        return block
+
+    with open_binary_log_file(file_path) as f:
+        head_date_time = read_head_date_time(read_block, formats)
+        if head_date_time is None:
+            return None, None
+        deque(iter(lambda: read_block(BLOCK_SIZE), b''), maxlen=0)  # decompress to the end
+    tail = b''.join(tail_blocks)
+    if block_count > len(tail_blocks):
+        tail = tail[tail.find(b'\n') + 1:]  # first line is cut by the dropped block
+    return head_date_time, read_tail_date_time(io.BytesIO(tail), [formats[head_date_time[1]]])
+
+
+def read_file_date_times(file_path: str, formats: List[Tuple[Pattern, str]]) \
+        -> Tuple[Optional[dt.datetime], Optional[dt.datetime]]:
+    """
+    Description:
+        get the first and last date time of log file. only head and tail blocks are read.
+    :param file_path: log file path (.gz and .zst files are decompressed and read to the end)
+    :param formats: list of (compiled regex, strptime format)
+    :return: first and last date time (None when not found)
+    """
+    if is_compressed_file(file_path):
+        head_date_time, tail_date_time = read_compressed_date_times(file_path, formats)
+    else:
+        with open(file_path, 'rb') as f:
+            head_date_time = read_head_date_time(f.read, formats)
+            # only the format of head is tried in tail
+            tail_date_time = None if head_date_time is None \
+                else read_tail_date_time(f, [formats[head_date_time[1]]])
+    if head_date_time is None:
+        print('Fail get date time: ' + file_path)
+        return None, None
+    return head_date_time[0], tail_date_time[0] if tail_date_time is not None else head_date_time[0]
+
+
+@profile_phase('read')
+def read_files_date_times(file_paths: List[str], formats: List[Tuple[Pattern, str]], parallel_count: int) \
+        -> List[Tuple[Optional[dt.datetime], Optional[dt.datetime]]]:
+    """
+    Description:
+        get the first and last date time of log files concurrently (reading is I/O bound, so threads are used).
+    :param file_paths: log file paths
+    :param formats: list of (compiled regex, strptime format)
+    :param parallel_count: thread count
+    :return: first and last date time per file (same order as file_paths)
+    """
+    with ThreadPoolExecutor(max_workers=parallel_count) as executor:
+        return list(executor.map(lambda file_path: read_file_date_times(file_path, formats), file_paths))
+
+
+def format_date_time(date_time: dt.datetime) -> str:
+    return date_time.strftime(DATETIME_FORMAT)
+
+
+@profile_phase('summarize')
+def create_result_rows(file_paths: List[str],
+                       date_times: List[Tuple[Optional[dt.datetime], Optional[dt.datetime]]]) -> List[List]:
+    """
+    Description:
+        create rows of start, end and duration per file, and the span of all files.
+    :param file_paths: log file paths
+    :param date_times: first and last date time per file
+    :return: 2d array (row: file, column: start, end, duration [sec]). row 0 is file name.
+    """
+    array2d = []
+    for file_path, (start_time, end_time) in zip(file_paths, date_times):
+        if start_time is None:
+            array2d.append([os.path.basename(file_path), '', '', ''])
+            continue
+        array2d.append([os.path.basename(file_path), format_date_time(start_time), format_date_time(end_time),
+                        (end_time - start_time).total_seconds()])
+    start_times = [start_time for start_time, _ in date_times if start_time is not None]
+    end_times = [end_time for _, end_time in date_times if end_time is not None]
+    if start_times:
+        start_time = min(start_times)
+        end_time = max(end_times)
+        array2d.append(['ALL:', format_date_time(start_time), format_date_time(end_time),
+                        (end_time - start_time).total_seconds()])
+    return array2d
 
 
 def main(args: List[str]):
-    file_paths: List[str] = glob.glob("../input/*.log")
-    result = ['start', 'end', 'diff']
-    for file_path in file_paths:
-        with open(file_path, 'r', encoding="utf-8_sig") as f:
-            lines = f.readlines()
-            analyze_time_logs(lines, result, int(args[0]))
-    write_csv_file(result)
+    """
+    Description:
+        calculate time span (first and last date time) of each log file in input folder.
+    :param args: command line arguments
+    :return: void
+    """
+    set_output_options(args)
+    set_profile_options(args)
+    formats = compile_date_time_formats(get_option_value(FORMAT_OPTION, args))
+    parallel_count = int(get_option_value(PARALLEL_OPTION, args) or DEFAULT_PARALLEL_COUNT)
+    file_paths: List[str] = find_log_files(INPUT_FILE_PATTERN)
+    date_times = read_files_date_times(file_paths, formats, parallel_count)
+    header = ['file', 'start', 'end', 'duration [sec]']
+    write_csv_file(OUTPUT_FILE_NAME, header, create_result_rows(file_paths, date_times))
 
 
-main(sys.argv)
+if __name__ == '__main__':
+    main(sys.argv)
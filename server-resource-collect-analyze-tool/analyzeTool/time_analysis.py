@@ -1,103 +1,287 @@
-import glob
+import math
+import re
 import sys
-from typing import List
-import datetime as dt
-import matplotlib.ticker as ticker
+from typing import List, Optional, Tuple, Dict, Iterable, Pattern
 import matplotlib.pyplot as plt
 
-from analyzeTool.analysis_util import convert_date_time, create_max_value_row, create_average_value_row, write_csv_file
+from analyzeTool.analysis_util import convert_date_time, convert_to_seconds, convert_date_time_to_seconds, \
+    write_csv_file, find_log_files, iterate_log_lines, get_option_value, set_output_options, profile_phase, \
+    set_profile_options
 
-START_PREFIXES = ['start::']
-END_PREFIXES = ['end::']
+# Changeable values
+# (case name, start marker regex, end marker regex). marker is matched at the beginning of line,
+# and date time (DATE_TIME_FORMAT) follows the marker. ex) 'start::01/02/21 10:00:00.123456'
+MARKERS = [('case0', r'start::', r'end::')]
 DATE_TIME_FORMAT = '%d/%m/%y %H:%M:%S.%f'
-GRAPH_TITLE = 'TOTAL TIME per CASE [sec]'
+PERCENTILES = [50, 90, 95, 99]
+# Constant Value
+GRAPH_TITLE = 'TIME DISTRIBUTION per CASE'
 OUTPUT_FILE_NAME = 'total_time_result'
-HEADER_PREFIX = 'case'
+HISTOGRAM_OUTPUT_FILE_NAME = 'total_time_histogram'
+HISTOGRAM_MIN_SECONDS = 0.001  # durations less than this are counted in bucket 0
+HISTOGRAM_BUCKETS_PER_DECADE = 50  # bucket width is about 4.7% (percentile error is half of it)
+MARKER_FILE_OPTION = '--markerFile'
+START_GROUP_PREFIX = 's'
+END_GROUP_PREFIX = 'e'
 
+marker_date_cache: Dict[str, int] = {}  # 'dd/mm/yy' -> seconds of the day start
 
-def view_line_graph(title: str, header: List[str], array2d: List[List[str]]):
+
+class DurationHistogram:
+    """
+    Description:
+        streaming duration statistics of a case. durations are counted in log scale buckets and not held,
+        so memory does not grow with the number of runs. count, total, min and max are exact.
+    """
+
+    def __init__(self):
+        self.buckets: Dict[int, int] = {}
+        self.count = 0
+        self.total = 0.0
+        self.min: Optional[float] = None
+        self.max: Optional[float] = None
+
+    def add(self, duration: float):
+        bucket = get_bucket_index(duration)
+        self.buckets[bucket] = self.buckets.get(bucket, 0) + 1
+        self.count += 1
+        self.total += duration
+        if self.min is None or duration < self.min:
+            self.min = duration
+        if self.max is None or duration > self.max:
+            self.max = duration
+
+    def get_percentile(self, percentile: float) -> Optional[float]:
+        """
+        Description:
+            estimate percentile from buckets (geometric middle of the bucket, clamped to min and max).
+        :param percentile: 0-100
+        :return: duration [sec]. None when no duration.
+        """
+        if self.count == 0:
+            return None
+        rank = max(1, math.ceil(self.count * percentile / 100))
+        cumulative = 0
+        for bucket in sorted(self.buckets):
+            cumulative += self.buckets[bucket]
+            if cumulative >= rank:
+                return min(max(get_bucket_middle(bucket), self.min), self.max)
+        return self.max
+
+
+def get_bucket_index(duration: float) -> int:
+    if duration < HISTOGRAM_MIN_SECONDS:
+        return 0
+    return int(math.log10(duration / HISTOGRAM_MIN_SECONDS) * HISTOGRAM_BUCKETS_PER_DECADE) + 1
+
+
+def get_bucket_upper(bucket: int) -> float:
+    return HISTOGRAM_MIN_SECONDS * 10 ** (bucket / HISTOGRAM_BUCKETS_PER_DECADE)
+
+
+def get_bucket_middle(bucket: int) -> float:
+    if bucket == 0:
+        return HISTOGRAM_MIN_SECONDS / 2
+    return HISTOGRAM_MIN_SECONDS * 10 ** ((bucket - 0.5) / HISTOGRAM_BUCKETS_PER_DECADE)
+
+
+def load_markers(args: List[str]) -> List[Tuple[str, str, str]]:
+    """
+    Description:
+        get markers from marker file (--markerFile). MARKERS is used when not specified.
+        marker file line: 'case name<TAB>start marker regex<TAB>end marker regex' (line starts with '#' is comment)
+    :param args: command line arguments
+    :return: list of (case name, start marker regex, end marker regex)
+    """
+    marker_file = get_option_value(MARKER_FILE_OPTION, args)
+    if marker_file is None:
+        return MARKERS
+    markers = []
+    with open(marker_file, encoding='utf-8') as f:
+        for line in f:
+            line = line.rstrip('\r\n')
+            if line.strip() == '' or line.startswith('#'):
+                continue
+            fields = line.split('\t')
+            if len(fields) != 3:
+                raise ValueError('invalid marker line (case<TAB>start regex<TAB>end regex): ' + line)
+            markers.append((fields[0], fields[1], fields[2]))
+    if not markers:
+        raise ValueError('no marker in ' + marker_file)
+    return markers
+
+
+def compile_markers(markers: List[Tuple[str, str, str]]) -> Tuple[Pattern, Dict[int, Tuple[int, bool]]]:
+    """
+    Description:
+        compile all start/end markers into one alternation, so each line is matched once.
+        the marker group is the outermost group of its alternative, so it is lastindex of the match.
+    :param markers: list of (case name, start marker regex, end marker regex)
+    :return: compiled pattern, and map of group index to (case index, is start marker)
+    """
+    alternatives = []
+    for index, (_, start_regex, end_regex) in enumerate(markers):
+        alternatives.append('(?P<{}{}>{})'.format(START_GROUP_PREFIX, index, start_regex))
+        alternatives.append('(?P<{}{}>{})'.format(END_GROUP_PREFIX, index, end_regex))
+    pattern = re.compile('|'.join(alternatives))
+    group_markers = {}
+    for name, group_index in pattern.groupindex.items():
+        if name[0] in (START_GROUP_PREFIX, END_GROUP_PREFIX) and name[1:].isdigit():
+            group_markers[group_index] = (int(name[1:]), name[0] == START_GROUP_PREFIX)
+    return pattern, group_markers
+
+
+def convert_marker_time_to_seconds(date_time: str) -> Optional[float]:
+    """
+    Description:
+        convert date time after marker ('dd/mm/yy HH:MM:SS.ffffff') to seconds without strptime.
+        date part is cached per day. strptime (DATE_TIME_FORMAT) is used when the format is different.
+    :param date_time: date time string
+    :return: seconds (with fraction). None when the format is invalid.
+    """
+    date_time = date_time.strip()
+    try:
+        if len(date_time) >= 17 and date_time[2] == '/' and date_time[5] == '/' and date_time[8] == ' ' \
+                and date_time[11] == ':' and date_time[14] == ':' and date_time[17:18] in ('', '.'):
+            date = date_time[0:8]
+            day_seconds = marker_date_cache.get(date)
+            if day_seconds is None:
+                day_seconds = convert_to_seconds(2000 + int(date[6:8]), int(date[3:5]), int(date[0:2]), 0, 0, 0)
+                marker_date_cache[date] = day_seconds
+            seconds = day_seconds + int(date_time[9:11]) * 3600 + int(date_time[12:14]) * 60 + int(date_time[15:17])
+            return seconds + float('0' + date_time[17:]) if len(date_time) > 18 else seconds
+        parsed = convert_date_time(date_time, DATE_TIME_FORMAT)
+        return convert_date_time_to_seconds(parsed) + parsed.microsecond / 1000000
+    except ValueError:
+        return None
+
+
+@profile_phase('parse')
+def analyze_time_log_lines(lines: Iterable[str], pattern: Pattern, group_markers: Dict[int, Tuple[int, bool]],
+                           histograms: List[DurationHistogram], unpaired_counts: List[int]):
+    """
+    Description:
+        pair start and end marker of each case, and add the duration to the histogram of the case.
+        cases may overlap each other. start without end (restarted) and end without start are counted as unpaired.
+    :param lines: log lines
+    :param pattern: compiled marker pattern (compile_markers)
+    :param group_markers: map of group index to (case index, is start marker)
+    :param histograms: histogram per case
+    :param unpaired_counts: unpaired marker count per case
+    :return: void
+    """
+    start_times: List[Optional[float]] = [None] * len(histograms)
+    match = pattern.match
+    for line in lines:
+        matched = match(line)
+        if matched is None:
+            continue
+        case_index, is_start = group_markers[matched.lastindex]
+        seconds = convert_marker_time_to_seconds(line[matched.end():])
+        if seconds is None:
+            continue
+        if is_start:
+            if start_times[case_index] is not None:
+                unpaired_counts[case_index] += 1
+            start_times[case_index] = seconds
+        elif start_times[case_index] is None:
+            unpaired_counts[case_index] += 1
+        else:
+            histograms[case_index].add(seconds - start_times[case_index])
+            start_times[case_index] = None
+    for case_index, start_time in enumerate(start_times):
+        if start_time is not None:
+            unpaired_counts[case_index] += 1
+
+
+@profile_phase('summarize')
+def create_summary_rows(case_names: List[str], histograms: List[DurationHistogram],
+                        unpaired_counts: List[int]) -> List[List]:
+    array2d = []
+    for name, histogram, unpaired_count in zip(case_names, histograms, unpaired_counts):
+        if histogram.count == 0:
+            array2d.append([name, 0, '', '', ''] + ['' for _ in PERCENTILES] + ['', unpaired_count])
+            continue
+        array2d.append([name, histogram.count, histogram.min, histogram.total / histogram.count, histogram.max]
+                       + [histogram.get_percentile(percentile) for percentile in PERCENTILES]
+                       + [histogram.total, unpaired_count])
+    return array2d
+
+
+@profile_phase('summarize')
+def create_histogram_rows(histograms: List[DurationHistogram]) -> List[List]:
+    """
+    Description:
+        create histogram rows from the smallest to the largest used bucket (empty buckets between are 0).
+    :param histograms: histogram per case
+    :return: 2d array (row: bucket, column: case). row 0 is bucket upper bound [sec].
+    """
+    buckets = [bucket for histogram in histograms for bucket in histogram.buckets]
+    if not buckets:
+        return []
+    return [[get_bucket_upper(bucket)] + [histogram.buckets.get(bucket, 0) for histogram in histograms]
+            for bucket in range(min(buckets), max(buckets) + 1)]
+
+
+@profile_phase('render')
+def view_histogram_graph(title: str, header: List[str], array2d: List[List]):
     """
     Description:
-        create and view line graph by matplotlib.
+        create and view histogram (step line per case, log scale x axis) by matplotlib.
+        points are buckets, so graph size does not depend on the number of runs.
     :param title: graph title.
-    :param header: top line of output file. top line is '' and process id.
-    :param array2d: 2d array (row: date time, column: process). row 0 is date time.
+    :param header: top line of histogram file. top line is bucket upper bound and case names.
+    :param array2d: 2d array (row: bucket, column: case). row 0 is bucket upper bound [sec].
     :return: void
     """
-    times = [convert_date_time(array2d[i][0]) for i in range(len(array2d)) if i < len(array2d)]
     fig, axes = plt.subplots()
     fig.subplots_adjust(bottom=0.2, top=0.95)
-    for col in range(len(array2d[0])):
-        y_values = []
-        for row in range(len(array2d)):
-            y_values.append(array2d[row][col] if array2d[row][col] != '' else None)
-        axes.plot(times, y_values, label=header[col])
-    axes.xaxis.set_major_locator(ticker.AutoLocator())
+    upper_bounds = [row[0] for row in array2d]
+    for col in range(1, len(header)):
+        axes.step(upper_bounds, [row[col] for row in array2d], where='pre', label=header[col])
+    axes.set_xscale('log')
     axes.set_title(title)
-    axes.set_xlabel('Count')
-    axes.set_ylabel('Total Time [sec]')
+    axes.set_xlabel('Time [sec]')
+    axes.set_ylabel('Count')
     axes.set_ylim(bottom=0)
     axes.legend()
     axes.grid()
-    plt.xticks(rotation=30)
 
 
-def calculate_time(start_time: dt, end_time: dt):
-    if not start_time or not end_time:
-        return 0
-    td = end_time - start_time
-    return td.total_seconds()
-
-
-def analyze_time_log_lines(lines: List[str], array_2d: List[List]):
-    start_time: dt = None
-    start_prefix_index: int = -1
-    end_time: dt = None
-    record: List[int] = []
-    row_num: int = 1
-    for line in lines:
-        for index, prefix in enumerate(START_PREFIXES):
-            if line.startswith(prefix):
-                length: int = len(prefix)
-                start_time: dt = convert_date_time(line[length:], DATE_TIME_FORMAT)
-                start_prefix_index = index
-        for index, prefix in enumerate(END_PREFIXES):
-            if line.startswith(prefix) and index == start_prefix_index:
-                length: int = len(prefix)
-                end_time: dt = convert_date_time(line[length:], DATE_TIME_FORMAT)
-                record += [calculate_time(start_time, end_time)]
-        if len(record) >= len(START_PREFIXES):
-            array_2d.append([row_num] + record)
-            row_num += 1
-            start_time = None
-            start_prefix_index = -1
-            end_time = None
-
-
-def analyze_time_logs(lines: List[str]):
-    array2d: List[List] = []
-    analyze_time_log_lines(lines, array2d)
-    header: List[str] = ['count'] + [HEADER_PREFIX + str(i) for i in range(len(array2d[0])) if i != 0]
-    view_line_graph(GRAPH_TITLE, header, array2d)
-    array2d.append(['MAX:'] + create_max_value_row(array2d))
-    array2d.append(['AVG:'] + create_average_value_row(array2d))
-    write_csv_file(OUTPUT_FILE_NAME, header, array2d)
-    plt.show()
+def analyze_time_logs(file_paths: List[str], markers: List[Tuple[str, str, str]], is_view_graph: bool):
+    pattern, group_markers = compile_markers(markers)
+    case_names = [name for name, _, _ in markers]
+    histograms = [DurationHistogram() for _ in markers]
+    unpaired_counts = [0 for _ in markers]
+    analyze_time_log_lines(iterate_log_lines(file_paths), pattern, group_markers, histograms, unpaired_counts)
+    for name, unpaired_count in zip(case_names, unpaired_counts):
+        if unpaired_count > 0:
+            print('{}: {} unpaired marker(s) are ignored'.format(name, unpaired_count))
+    header = ['case', 'count', 'min [sec]', 'avg [sec]', 'max [sec]'] \
+        + ['p{} [sec]'.format(percentile) for percentile in PERCENTILES] + ['total [sec]', 'unpaired']
+    write_csv_file(OUTPUT_FILE_NAME, header, create_summary_rows(case_names, histograms, unpaired_counts))
+    histogram_header = ['upper [sec]'] + case_names
+    histogram_rows = create_histogram_rows(histograms)
+    write_csv_file(HISTOGRAM_OUTPUT_FILE_NAME, histogram_header, histogram_rows)
+    if is_view_graph and histogram_rows:
+        view_histogram_graph(GRAPH_TITLE, histogram_header, histogram_rows)
+        plt.show()
 
 
 def main(args: List[str]):
     """
-
+    Description:
+        analyze durations between start and end markers of each case in test*.log.
     :param args: command line arguments
     :return: void
     """
     is_view_graph = True
-    file_paths: List[str] = glob.glob("../input/test*.log")
-    lines = []
-    for file_path in file_paths:
-        with open(file_path, 'r', encoding="utf-8_sig") as f:
-            lines += f.readlines()
-    analyze_time_logs(lines)
+    set_output_options(args)
+    set_profile_options(args)
+    markers = load_markers(args)
+    file_paths: List[str] = find_log_files("../input/test*.log")
+    analyze_time_logs(file_paths, markers, is_view_graph)
 
 
-main(sys.argv)
+if __name__ == '__main__':
+    main(sys.argv)
@@ -1,35 +1,62 @@
 """
 analyze top log and output csv file (row: time, column: process Id and command name)
     option:
-        --withExcel : Output Excel File(include line graph) and csv file
+        --withExcel : Output Excel File (CPU, MEM and summary sheet with line graph of top processes) and csv file
+        --proc : analyze proc log of getstatlog.py --process (proc_yyyymmdd.log) instead of top log
+        --jsonl : with --proc, analyze proc records of getstatlog.py --format jsonl (statlog_yyyymmdd.jsonl)
+        --topN N : output only N processes in order of max value (default all processes)
         --startTime "YYYY-mm-dd" : output start date time filter
         --endTime "YYYY-mm-dd" : output end date time filter
 """
 
-import csv
 import datetime as dt
-import glob
+import os
 import re
 import sys
-from typing import List, Dict, Optional
+from itertools import islice
+from typing import List, Dict, Optional, Iterable, Tuple
 
 import matplotlib.dates as mdates
 import matplotlib.pyplot as plt
-import openpyxl
+try:
+    import openpyxl  # optional: needed only for --withExcel
+    from openpyxl.chart import LineChart, Reference
+except ImportError:
+    openpyxl = None
 # Fixed value
 from analyzeTool.analysis_util import create_max_value_row, convert_option_date_time, create_average_value_row, \
-    is_contain_rage_from_start_to_end, convert_date_time
-from openpyxl.chart import LineChart, Reference
+    find_log_files, iterate_log_lines, convert_filter_seconds, \
+    convert_log_date_time_to_seconds, convert_seconds_to_date_time, write_csv_file, set_output_options, \
+    convert_to_seconds, is_contain_range_seconds, format_seconds, SECONDS_PER_DAY, \
+    get_output_file_path, get_option_value, profile_phase, set_profile_options, iterate_jsonl_samples
 
 PID_INDEX = 0
 CPU_INDEX = 8
 MEM_INDEX = 9
 COMMAND_INDEX = 11
 PID_VALUE_COLUMN_COUNT = 12
+TOP_TIME_INDEX = 2  # top - HH:MM:SS up ...
+TOP_TIME_LENGTH = 8
+FILE_NAME_DATE_PATTERN = re.compile(r'(\d{4})(\d{2})(\d{2})')  # top_yyyymmdd-.log
+ROLLOVER_MIN_BACKWARD_SECONDS = 3600  # backward step up to this is clock adjustment (ex. DST), not next day
+# 'up 3 days,  2:03,' 'up 2:03,' 'up 45 min,' 'up 1 day, 45 min,' (uptime without hours and minutes is not used)
+UPTIME_PATTERN = re.compile(r' up\s+(?:(\d+) days?,\s+)?(?:(\d+):(\d{2})|(\d+) min),')
 EXCEL_OPTION = '--withExcel'
 VIEW_GRAPH_OPTION = '--viewGraph'
 START_DATETIME_OPTION = '--startTime'
 END_DATETIME_OPTION = '--endTime'
+PROC_OPTION = '--proc'
+TOP_N_OPTION = '--topN'
+JSONL_OPTION = '--jsonl'
+JSONL_RECORD_TYPE = 'proc'
+# proc log (getstatlog.py --process): date time pid %CPU %MEM RSS SWAP command
+PROC_DATE_INDEX = 0
+PROC_TIME_INDEX = 1
+PROC_PID_INDEX = 2
+PROC_CPU_INDEX = 3
+PROC_MEM_INDEX = 4
+PROC_COMMAND_INDEX = 7
+PROC_COLUMN_COUNT = 8
 
 # Changeable values
 FILTER_VALUE = 1.0  # Output only values more than this value
@@ -38,19 +65,29 @@ OUTPUT_TOP_MEM_FILENAME = 'top_memory_result'  # Output file name
 OUTPUT_TOP_MEM_GRAPHTITLE = 'memory use rate'
 OUTPUT_TOP_CPU_FILENAME = 'top_cpu_result'  # Output file name
 OUTPUT_TOP_CPU_GRAPHTITLE = 'cpu use rate'
-
-
-def view_line_graph(name: str, header: List[str], big_order_indexes: List[int], array2d: List[List[str]]):
+OUTPUT_TOP_EXCEL_FILENAME = 'top_result'  # Output file name (--withExcel)
+EXCEL_MEM_SHEET = 'MEM'
+EXCEL_CPU_SHEET = 'CPU'
+EXCEL_SUMMARY_SHEET = 'summary'
+EXCEL_SUMMARY_HEADER = ['sheet', 'rank', 'process', 'max [%]', 'avg [%]']
+EXCEL_CHART_ANCHOR_COLUMN = 'G'  # charts are placed on the right of summary table
+EXCEL_CHART_ROW_SPAN = 34  # rows per chart on summary sheet
+
+
+@profile_phase('render')
+def view_line_graph(name: str, header: List[str], big_order_indexes: List[int], times: List[int],
+                    array2d: List[List[str]]):
     """
     Description:
         create and view line graph by matplotlib.
     :param name: graph name.
     :param header: top line of output file. top line is '' and process id.
     :param big_order_indexes: column(process id) index list in big order of max value per process id.
+    :param times: date time seconds of each row.
     :param array2d: 2d array (row: date time, column: process). row 0 is date time.
     :return: void
     """
-    times = [convert_date_time(array2d[i][0]) for i in range(len(array2d)) if i < len(array2d)]
+    times = [convert_seconds_to_date_time(seconds) for seconds in times]
     fig, axes = plt.subplots()
     fig.subplots_adjust(bottom=0.2, top=0.95)
     for col in range(len(big_order_indexes)):
@@ -65,7 +102,7 @@ def view_line_graph(name: str, header: List[str], big_order_indexes: List[int],
                 break
             y_values.append(
                 float(array2d[row][big_order_indexes[col]]) if array2d[row][big_order_indexes[col]] != '' else None)
-        axes.plot(times, y_values, label=header[col])
+        axes.plot(times, y_values, label=header[big_order_indexes[col]])
     axes.set_title(name)
     axes.set_xlabel('Time')
     axes.xaxis.set_major_locator(mdates.DayLocator(bymonthday=None, interval=1, tz=None))
@@ -77,71 +114,87 @@ def view_line_graph(name: str, header: List[str], big_order_indexes: List[int],
     plt.xticks(rotation=30)
 
 
-def create_excel_line_graph(sheet, rows_num: int):
+def create_excel_line_graph(sheet, sheet_name: str, process_count: int, rows_num: int):
     """
     Description:
-        Undone Function (Because can't check the operation in the developer environment).
-        create line graph in excel file.
-    :param sheet: excel sheet object.
-    :param rows_num: row count.
-    :return: void
+        create line graph of top processes (RANK_TOP_LIMIT) in excel file.
+    :param sheet: excel sheet object of values (column 1: date time, column 2~: process in big order).
+    :param sheet_name: sheet name (graph title).
+    :param process_count: process count of the sheet.
+    :param rows_num: row count of values (without header).
+    :return: line chart
     """
-    chart = openpyxl.chart.LineChart()
-    chart.title = 'プロセス毎の使用率'
-    chart.x_axis.title = "時刻"
+    chart = LineChart()
+    chart.title = sheet_name + ' プロセス毎の使用率'
+    chart.x_axis.title = '時刻'
+    chart.x_axis.number_format = 'mm/dd hh:mm'
     chart.y_axis.title = '使用量 [%]'
     chart.height = 16
     chart.width = 24
     chart.y_axis.scaling.min = 0
-    chart.y_axis.scaling.max = 100
-    time_refs = Reference(sheet, min_col=1, max_col=1, min_row=2, max_row=rows_num - 1)
-    pid_refs = Reference(sheet, min_col=2, max_col=RANK_TOP_LIMIT, min_row=1, max_row=rows_num - 1)
+    time_refs = Reference(sheet, min_col=1, max_col=1, min_row=2, max_row=rows_num + 1)
+    pid_refs = Reference(sheet, min_col=2, max_col=min(process_count, RANK_TOP_LIMIT) + 1, min_row=1,
+                         max_row=rows_num + 1)
     chart.add_data(pid_refs, titles_from_data=True)
     chart.set_categories(time_refs)
-    sheet.add_chart(chart, "A" + str(rows_num + 3))
+    return chart
 
 
-def write_excel_file(filename, header, big_order_indexes, array2d):
+def write_excel_value_sheet(workbook, sheet_name: str, header: List[str], big_order_indexes: List[int],
+                            times: List[int], array2d: List[List[str]], rows_num: int) -> object:
     """
     Description:
-        output excel file (row: date time, column: process)
-    :param filename: output file name.
+        write values to write-only sheet row by row (row: date time, column: process in big order).
+        date time is written as date time and values are written as numbers (empty is blank cell).
+    :param workbook: write-only workbook.
+    :param sheet_name: sheet name.
     :param header: top line of output file. top line is '' and process id.
     :param big_order_indexes: column(process id) index list in big order of max value per process id.
+    :param times: date time seconds of each row.
     :param array2d: 2d array (row: date time, column: process). row 0 is date time.
-    :return: void
+    :param rows_num: row count of values (rows after this are MAX and AVG)
+    :return: sheet object.
     """
-    wb = openpyxl.Workbook()
-    sheet = wb.active
-    sheet.title = 'result'
-    sheet = wb['result']
-    for i in range(len(header)):
-        sheet.cell(row=1, column=i + 1).value = header[i]
-    for row in range(len(array2d)):
-        for col in range(len(big_order_indexes)):
-            sheet.cell(row=row + 2, column=col + 1).value = array2d[row][big_order_indexes[col]]
-    create_excel_line_graph(sheet, len(array2d))
-    wb.save('../output/' + filename + '.xlsx')
-
-
-def write_csv_file(filename: str, header: List[str], big_order_indexes: List[int], array2d: List[List[str]]):
+    sheet = workbook.create_sheet(sheet_name)
+    sheet.append(['date time'] + [header[index] for index in big_order_indexes[1:]])
+    for seconds, record in zip(times, islice(array2d, rows_num)):
+        row: List = [convert_seconds_to_date_time(seconds)]
+        row += [float(record[index]) if record[index] != '' else None for index in big_order_indexes[1:]]
+        sheet.append(row)
+    return sheet
+
+
+@profile_phase('write')
+def write_excel_file(filename: str, times: List[int],
+                     sheet_results: List[Tuple[str, List[str], List[int], List[List[str]]]]):
     """
     Description:
-        output csv file (row: date time, column: process)
+        output excel file by write-only workbook (rows are streamed to the file, cells are not held in memory).
+        one sheet per metric (row: date time, column: process) and summary sheet (max and avg per process,
+        and line graph of top processes of each metric).
     :param filename: output file name.
-    :param header: top line of output file. top line is '' and process id.
-    :param big_order_indexes: column(process id) index list in big order of max value per process id.
-    :param array2d: 2d array (row: date time, column: process). row 0 is date time.
+    :param times: date time seconds of each row (same for all sheets).
+    :param sheet_results: list of (sheet name, header, big_order_indexes, array2d). last 2 rows of array2d are
+                          MAX and AVG.
     :return: void
     """
-    with open('../output/' + filename + '.csv', 'w', newline='') as csvfile:
-        writer = csv.writer(csvfile, lineterminator='\n')
-        writer.writerow(header)
-        # writer.writerows(array2d)
-        for row in range(len(array2d)):
-            writer.writerow([array2d[row][index] for index in big_order_indexes])
-
-
+    wb = openpyxl.Workbook(write_only=True)
+    summary_sheet = wb.create_sheet(EXCEL_SUMMARY_SHEET)
+    summary_sheet.append(EXCEL_SUMMARY_HEADER)
+    for index, (sheet_name, header, big_order_indexes, array2d) in enumerate(sheet_results):
+        rows_num = len(array2d) - 2
+        max_row = array2d[-2]
+        average_row = array2d[-1]
+        for rank, col in enumerate(big_order_indexes[1:], start=1):
+            summary_sheet.append([sheet_name, rank, header[col], float(max_row[col]), float(average_row[col])])
+        sheet = write_excel_value_sheet(wb, sheet_name, header, big_order_indexes, times, array2d, rows_num)
+        if rows_num > 0 and len(big_order_indexes) > 1:
+            chart = create_excel_line_graph(sheet, sheet_name, len(big_order_indexes) - 1, rows_num)
+            summary_sheet.add_chart(chart, EXCEL_CHART_ANCHOR_COLUMN + str(2 + index * EXCEL_CHART_ROW_SPAN))
+    wb.save(get_output_file_path(filename, '.xlsx'))
+
+
+@profile_phase('summarize')
 def create_max_value_order(max_values_per_pid: List[str]) -> List[int]:
     """
     Description:
@@ -174,27 +227,30 @@ def fill_empty_string(pid_count: int, array2d: List[List[str]]):
         record.extend([''] * diff)
 
 
-def write_file_and_view_graph(filename: str, graph_title: str, pids_header: List[str], array2d: List[List[str]],
-                              is_output_excel: bool, is_view_graph: bool):
+def write_file_and_view_graph(filename: str, graph_title: str, pids_header: List[str], times: List[int],
+                              array2d: List[List[str]], is_view_graph: bool, top_n: Optional[int]) -> List[int]:
     """
     Description:
-        output file and view graph.
+        output csv file and view graph. MAX and AVG rows are added to the end of array2d.
+        columns of csv file are in big order of max value (top N processes only when top_n is specified).
     :param filename: file name
     :param graph_title: graph title
     :param pids_header: list of process id. index 0 is ''.
+    :param times: date time seconds of each row.
     :param array2d: 2d array (row: date time, column: process). 0 row is date time.
-    :param is_output_excel: output excel file flag.
     :param is_view_graph: view line graph flag.
-    :return: void
+    :param top_n: number of processes to output. None is all processes.
+    :return: column(process id) index list in big order of max value per process id (top N only).
     """
     max_values_per_pid: List[str] = create_max_value_row(array2d)
     big_order_indexes: List[int] = create_max_value_order(max_values_per_pid)
-    view_line_graph(graph_title, pids_header, big_order_indexes, array2d)
+    view_line_graph(graph_title, pids_header, big_order_indexes, times, array2d)
     array2d.append(['MAX:'] + max_values_per_pid)
     array2d.append(['AVG:'] + create_average_value_row(array2d))
-    write_csv_file(filename, pids_header, big_order_indexes, array2d)
-    if is_output_excel:
-        write_excel_file(filename, pids_header, big_order_indexes, array2d)
+    if top_n is not None:
+        big_order_indexes = big_order_indexes[:top_n + 1]
+    write_csv_file(filename, pids_header, array2d, big_order_indexes)
+    return big_order_indexes
 
 
 def add_time_and_value_array2d(datetime: str, pids: List[str], value_dict: Dict, array2d: List[List[str]]):
@@ -216,20 +272,25 @@ def add_time_and_value_array2d(datetime: str, pids: List[str], value_dict: Dict,
     array2d.append(record)  # array2d record : datetime + pids
 
 
-def add_time_and_mem_cpu_array2d(datetime: str, mem_pids: List[str], cpu_pids: List[str], mem_dict: Dict,
-                                 cpu_dict: Dict, time_mem_array2d: List[List[str]], time_cpu_array2d: List[List[str]]):
+def add_time_and_mem_cpu_array2d(seconds: int, mem_pids: List[str], cpu_pids: List[str], mem_dict: Dict,
+                                 cpu_dict: Dict, times: List[int], time_mem_array2d: List[List[str]],
+                                 time_cpu_array2d: List[List[str]]):
     """
     Description:
         add date time and value (memory use rate or cpu use rate) to 2d array.
-    :param datetime: current date and time of log one line.
+        seconds are added to times before the rows (rows of memory and cpu have the same times).
+    :param seconds: date time seconds of the sample.
     :param mem_pids: list of process id (for memory use rate).
     :param cpu_pids: list of process id (for cpu use rate).
     :param mem_dict: map of process id and memory use rate.
     :param cpu_dict:  map of process id and cpu use rate.
+    :param times: date time seconds of each row.
     :param time_mem_array2d: 2d array of memory use rate (row: date time, column: process). 0 row is date time.
     :param time_cpu_array2d: 2d array of cpu use rate (row: date time, column: process). 0 row is date time.
     :return: void
     """
+    times.append(seconds)
+    datetime = format_seconds(seconds)
     add_time_and_value_array2d(datetime, mem_pids, mem_dict, time_mem_array2d)
     add_time_and_value_array2d(datetime, cpu_pids, cpu_dict, time_cpu_array2d)
 
@@ -253,58 +314,117 @@ def analyze_pid_value_line(line: str, pids: List[str], value_dict: Dict, target_
         value_dict[pid] = value
 
 
-current_date: str = ''  # format is 'YYYY-mm-dd'
-is_zero_hour: bool = False
-
+class TopDateTimeReconstructor:
+    """
+    Description:
+        reconstruct date time seconds of top frames of one log file ('top - HH:MM:SS ...' line has time only).
+        when the frame has uptime ('up 3 days,  2:03,') and the previous frame too, elapsed time is got from uptime,
+        so the date is right for any gap (ex. collector stopped at 10:00 and resumed at 09:00 on the next day).
+        otherwise date goes to the next day when time goes backward by more than ROLLOVER_MIN_BACKWARD_SECONDS
+        (midnight rollover), which is right only for gap less than 23 hours between frames.
+        state is per file, so files can be parsed independently.
+    """
 
-def get_current_date_time(start_date: str, current_time: str) -> str:
+    def __init__(self, seed_seconds: int):
+        """
+        :param seed_seconds: date time seconds not after the first frame. 00:00:00 of the date in file name,
+                             or the last frame of the previous file.
+        """
+        self.date_seconds = seed_seconds - seed_seconds % SECONDS_PER_DAY
+        self.last_time_seconds = seed_seconds % SECONDS_PER_DAY
+        self.last_uptime_minutes: Optional[int] = None
+
+    def reconstruct(self, time: str, uptime_minutes: Optional[int] = None) -> Optional[int]:
+        """
+        Description:
+            get date time seconds of frame.
+        :param time: time of frame. format is 'HH:MM:SS'
+        :param uptime_minutes: uptime of frame [min] (get_uptime_minutes). None when not in the frame.
+        :return: date time seconds. None when the format is invalid.
+        """
+        if len(time) != TOP_TIME_LENGTH or time[2] != ':' or time[5] != ':':
+            return None
+        try:
+            time_seconds = int(time[0:2]) * 3600 + int(time[3:5]) * 60 + int(time[6:8])
+        except ValueError:
+            return None
+        last_uptime_minutes = self.last_uptime_minutes
+        self.last_uptime_minutes = uptime_minutes
+        if uptime_minutes is not None and last_uptime_minutes is not None and uptime_minutes >= last_uptime_minutes:
+            # days of elapsed time (uptime is minutes, so it is rounded to the nearest time of the day)
+            forward_seconds = (time_seconds - self.last_time_seconds) % SECONDS_PER_DAY
+            elapsed_seconds = (uptime_minutes - last_uptime_minutes) * 60
+            days = round((elapsed_seconds - forward_seconds) / SECONDS_PER_DAY)
+            last_seconds = self.date_seconds + self.last_time_seconds
+            self.date_seconds = last_seconds + forward_seconds + days * SECONDS_PER_DAY - time_seconds
+        elif self.last_time_seconds - time_seconds > ROLLOVER_MIN_BACKWARD_SECONDS:
+            self.date_seconds += SECONDS_PER_DAY
+        self.last_time_seconds = time_seconds
+        return self.date_seconds + time_seconds
+
+    def get_last_seconds(self) -> int:
+        return self.date_seconds + self.last_time_seconds
+
+
+def get_uptime_minutes(line: str) -> Optional[int]:
     """
     Description:
-        create current date time of target log line
-    :param start_date: log start date. format is 'YYYYmmdd'
-    :param current_time: current time of target log line. format is 'HH:MM:ss'
-    :return: current date and time
-    """
-    global current_date, is_zero_hour
-    if current_date == '':
-        current_date = dt.datetime.strptime(start_date, '%Y%m%d').strftime('%Y/%m/%d')
-        is_zero_hour = current_time.startswith('00:')
-    if is_zero_hour and current_time.startswith('01:'):
-        is_zero_hour = False
-    if not is_zero_hour and current_time.startswith('00:'):
-        is_zero_hour = True
-        dt_current_date = dt.datetime.strptime(current_date, '%Y/%m/%d') + dt.timedelta(days=1)
-        current_date = dt_current_date.strftime('%Y/%m/%d')
-    return current_date + ' ' + current_time
-
-
-def analyze_top_log_lines(start_date: str, lines: List[str], filter_start_time: Optional, filter_end_time: Optional,
-                          mem_pids: List[str], cpu_pids: List[str], time_mem_array2d: List[List[str]],
-                          time_cpu_array2d: List[List[str]]):
+        get uptime of 'top - ' line.
+    :param line: 'top - HH:MM:SS up 3 days,  2:03,  1 user, ...'
+    :return: uptime [min]. None when not found.
+    """
+    match = UPTIME_PATTERN.search(line)
+    if match is None:
+        return None
+    days, hours, minutes, only_minutes = match.groups()
+    uptime_minutes = int(days) * 1440 if days else 0
+    if only_minutes is not None:
+        return uptime_minutes + int(only_minutes)
+    return uptime_minutes + int(hours) * 60 + int(minutes)
+
+
+def get_file_name_date_seconds(file_path: str) -> Optional[int]:
+    match = FILE_NAME_DATE_PATTERN.search(os.path.basename(file_path))
+    if match is None:
+        return None
+    return convert_to_seconds(int(match.group(1)), int(match.group(2)), int(match.group(3)), 0, 0, 0)
+
+
+@profile_phase('parse')
+def analyze_top_log_lines(reconstructor: TopDateTimeReconstructor, lines: Iterable[str], filter_start_time: Optional,
+                          filter_end_time: Optional, mem_pids: List[str], cpu_pids: List[str], times: List[int],
+                          time_mem_array2d: List[List[str]], time_cpu_array2d: List[List[str]]):
     """
     Description:
-        analyze top log lines. create 2d array memory use rate and cpu use rate.
-    :param start_date: log start date.
+        analyze top log lines of one file. create 2d array memory use rate and cpu use rate.
+    :param reconstructor: date time reconstructor of the file.
     :param lines: log file lines.
     :param filter_start_time:
     :param filter_end_time:
     :param mem_pids: list of memory use rate per process.
     :param cpu_pids: list of cpu use rate per process.
+    :param times: date time seconds of each row.
     :param time_mem_array2d: 2d array (row: date time, column: process). 0 row is date time.
     :param time_cpu_array2d: 2d array (row: date time, column: process). 0 row is date time.
     :return: void
     """
+    filter_start_seconds = convert_filter_seconds(filter_start_time)
+    filter_end_seconds = convert_filter_seconds(filter_end_time)
     is_pid_value_block = False
     mem_dict: Dict = {}
     cpu_dict: Dict = {}
-    datetime = ''
+    seconds: Optional[int] = None
+    is_contain = False
     for line in lines:
         line_columns = line.split()
         if line.startswith('top -'):
-            if is_contain_rage_from_start_to_end(datetime, filter_start_time, filter_end_time):
-                add_time_and_mem_cpu_array2d(datetime, mem_pids, cpu_pids, mem_dict, cpu_dict, time_mem_array2d,
-                                             time_cpu_array2d)
-            datetime = get_current_date_time(start_date, line_columns[2])
+            if is_contain:
+                add_time_and_mem_cpu_array2d(seconds, mem_pids, cpu_pids, mem_dict, cpu_dict, times,
+                                             time_mem_array2d, time_cpu_array2d)
+            seconds = reconstructor.reconstruct(line_columns[TOP_TIME_INDEX], get_uptime_minutes(line)) \
+                if len(line_columns) > TOP_TIME_INDEX else None
+            is_contain = seconds is not None and is_contain_range_seconds(seconds, filter_start_seconds,
+                                                                          filter_end_seconds)
             is_pid_value_block = False
             mem_dict = {}
             cpu_dict = {}
@@ -312,42 +432,197 @@ def analyze_top_log_lines(start_date: str, lines: List[str], filter_start_time:
         if line.startswith('    PID'):
             is_pid_value_block = True
             continue
-        if is_pid_value_block and len(line_columns) == PID_VALUE_COLUMN_COUNT:
+        if is_pid_value_block and is_contain and len(line_columns) == PID_VALUE_COLUMN_COUNT:
             analyze_pid_value_line(line, mem_pids, mem_dict, MEM_INDEX)
             analyze_pid_value_line(line, cpu_pids, cpu_dict, CPU_INDEX)
-    if is_contain_rage_from_start_to_end(datetime, filter_start_time, filter_end_time):
-        add_time_and_mem_cpu_array2d(datetime, mem_pids, cpu_pids, mem_dict, cpu_dict, time_mem_array2d,
-                                 time_cpu_array2d)
+    if is_contain:
+        add_time_and_mem_cpu_array2d(seconds, mem_pids, cpu_pids, mem_dict, cpu_dict, times, time_mem_array2d,
+                                     time_cpu_array2d)
 
 
-def analyze_top_log(file_path: str, lines: List[str], is_output_excel: bool, is_view_graph: bool, filter_start_time: dt,
-                    filter_end_time: dt):
+def analyze_top_log_files(file_paths: List[str], filter_start_time: Optional, filter_end_time: Optional,
+                          mem_pids: List[str], cpu_pids: List[str], times: List[int],
+                          time_mem_array2d: List[List[str]], time_cpu_array2d: List[List[str]]):
+    """
+    Description:
+        analyze top log files (top_yyyymmdd-.log) in date order. date of frames is reconstructed per file from
+        the date in file name. file without date in name continues from the last frame of the previous file.
+    :param file_paths: log file paths sorted by date.
+    :param filter_start_time:
+    :param filter_end_time:
+    :param mem_pids: list of memory use rate per process.
+    :param cpu_pids: list of cpu use rate per process.
+    :param times: date time seconds of each row.
+    :param time_mem_array2d: 2d array (row: date time, column: process). 0 row is date time.
+    :param time_cpu_array2d: 2d array (row: date time, column: process). 0 row is date time.
+    :return: void
     """
+    last_seconds: Optional[int] = None
+    for file_path in file_paths:
+        seed_seconds = get_file_name_date_seconds(file_path)
+        if seed_seconds is None:
+            seed_seconds = last_seconds
+        if seed_seconds is None:
+            raise ValueError('Not Found date (yyyymmdd) in top log file name: ' + file_path)
+        reconstructor = TopDateTimeReconstructor(seed_seconds)
+        analyze_top_log_lines(reconstructor, iterate_log_lines([file_path], 'utf-8'), filter_start_time,
+                              filter_end_time, mem_pids, cpu_pids, times, time_mem_array2d, time_cpu_array2d)
+        last_seconds = reconstructor.get_last_seconds()
+
+
+def add_proc_value(pid: str, value: str, pids: List[str], value_dict: Dict):
+    if float(value) >= FILTER_VALUE:
+        if pid not in pids:
+            pids.append(pid)
+        value_dict[pid] = value
+
 
-    :param file_path:
-    :param lines:
+@profile_phase('parse')
+def analyze_proc_log_lines(lines: Iterable[str], filter_start_time: Optional, filter_end_time: Optional,
+                           mem_pids: List[str], cpu_pids: List[str], times: List[int],
+                           time_mem_array2d: List[List[str]], time_cpu_array2d: List[List[str]]):
+    """
+    Description:
+        analyze proc log lines (getstatlog.py --process). one line is one process of one sample,
+        and lines of one sample have the same date time. create 2d array memory use rate and cpu use rate.
+    :param lines: log lines.
+    :param filter_start_time:
+    :param filter_end_time:
+    :param mem_pids: list of memory use rate per process.
+    :param cpu_pids: list of cpu use rate per process.
+    :param times: date time seconds of each row.
+    :param time_mem_array2d: 2d array (row: date time, column: process). 0 row is date time.
+    :param time_cpu_array2d: 2d array (row: date time, column: process). 0 row is date time.
+    :return: void
+    """
+    filter_start_seconds = convert_filter_seconds(filter_start_time)
+    filter_end_seconds = convert_filter_seconds(filter_end_time)
+    mem_dict: Dict = {}
+    cpu_dict: Dict = {}
+    datetime = ''
+    seconds: Optional[int] = None
+    is_contain = False
+    for line in lines:
+        line_columns = line.split()
+        if len(line_columns) != PROC_COLUMN_COUNT:
+            continue
+        line_datetime = line_columns[PROC_DATE_INDEX] + ' ' + line_columns[PROC_TIME_INDEX]
+        if line_datetime != datetime:
+            # lines of one sample have the same date time, so date time is parsed once per sample
+            if is_contain:
+                add_time_and_mem_cpu_array2d(seconds, mem_pids, cpu_pids, mem_dict, cpu_dict, times,
+                                             time_mem_array2d, time_cpu_array2d)
+            datetime = line_datetime
+            seconds = convert_log_date_time_to_seconds(line_columns[PROC_DATE_INDEX], line_columns[PROC_TIME_INDEX])
+            is_contain = seconds is not None and is_contain_range_seconds(seconds, filter_start_seconds,
+                                                                          filter_end_seconds)
+            mem_dict = {}
+            cpu_dict = {}
+        if not is_contain:
+            continue
+        pid = line_columns[PROC_PID_INDEX] + '(' + line_columns[PROC_COMMAND_INDEX] + ')'
+        add_proc_value(pid, line_columns[PROC_MEM_INDEX], mem_pids, mem_dict)
+        add_proc_value(pid, line_columns[PROC_CPU_INDEX], cpu_pids, cpu_dict)
+    if is_contain:
+        add_time_and_mem_cpu_array2d(seconds, mem_pids, cpu_pids, mem_dict, cpu_dict, times, time_mem_array2d,
+                                     time_cpu_array2d)
+
+
+@profile_phase('parse')
+def analyze_proc_jsonl(file_paths: List[str], filter_start_time: Optional, filter_end_time: Optional,
+                       mem_pids: List[str], cpu_pids: List[str], times: List[int], time_mem_array2d: List[List[str]],
+                       time_cpu_array2d: List[List[str]]):
+    """
+    Description:
+        analyze proc records of JSON lines logs (getstatlog.py --format jsonl).
+        parameters are the same as analyze_proc_log_lines except file paths.
+    :param file_paths: log file paths (statlog_yyyymmdd.jsonl)
+    :return: void
+    """
+    filter_start_seconds = convert_filter_seconds(filter_start_time)
+    filter_end_seconds = convert_filter_seconds(filter_end_time)
+    for seconds, sample in iterate_jsonl_samples(file_paths, JSONL_RECORD_TYPE, 'pid'):
+        if not is_contain_range_seconds(seconds, filter_start_seconds, filter_end_seconds):
+            continue
+        mem_dict: Dict = {}
+        cpu_dict: Dict = {}
+        for pid, record in sample.items():
+            pid = pid + '(' + record.get('command', '') + ')'
+            add_proc_value(pid, str(record.get('%MEM', 0)), mem_pids, mem_dict)
+            add_proc_value(pid, str(record.get('%CPU', 0)), cpu_pids, cpu_dict)
+        add_time_and_mem_cpu_array2d(seconds, mem_pids, cpu_pids, mem_dict, cpu_dict, times, time_mem_array2d,
+                                     time_cpu_array2d)
+
+
+def write_top_result(mem_pids: List[str], cpu_pids: List[str], times: List[int], time_mem_array2d: List[List[str]],
+                     time_cpu_array2d: List[List[str]], is_output_excel: bool, is_view_graph: bool,
+                     top_n: Optional[int]):
+    """
+    Description:
+        write memory use rate and cpu use rate per process to file, and view graph.
+    :param mem_pids: list of memory use rate per process.
+    :param cpu_pids: list of cpu use rate per process.
+    :param times: date time seconds of each row.
+    :param time_mem_array2d: 2d array (row: date time, column: process). 0 row is date time.
+    :param time_cpu_array2d: 2d array (row: date time, column: process). 0 row is date time.
+    :param is_output_excel:
+    :param is_view_graph:
+    :param top_n: number of processes to output. None is all processes.
+    :return: void
+    """
+    mem_pids = [''] + mem_pids
+    cpu_pids = [''] + cpu_pids
+    fill_empty_string(len(mem_pids), time_mem_array2d)
+    fill_empty_string(len(cpu_pids), time_cpu_array2d)
+    mem_order_indexes = write_file_and_view_graph(OUTPUT_TOP_MEM_FILENAME, OUTPUT_TOP_MEM_GRAPHTITLE, mem_pids,
+                                                  times, time_mem_array2d, is_view_graph, top_n)
+    cpu_order_indexes = write_file_and_view_graph(OUTPUT_TOP_CPU_FILENAME, OUTPUT_TOP_CPU_GRAPHTITLE, cpu_pids,
+                                                  times, time_cpu_array2d, is_view_graph, top_n)
+    if is_output_excel:
+        write_excel_file(OUTPUT_TOP_EXCEL_FILENAME, times, [
+            (EXCEL_CPU_SHEET, cpu_pids, cpu_order_indexes, time_cpu_array2d),
+            (EXCEL_MEM_SHEET, mem_pids, mem_order_indexes, time_mem_array2d)])
+    plt.show()
+
+
+def analyze_top_log(file_paths: List[str], is_output_excel: bool, is_view_graph: bool, filter_start_time: dt,
+                    filter_end_time: dt, top_n: Optional[int]):
+    """
+
+    :param file_paths:
     :param is_output_excel:
     :param is_view_graph:
     :param filter_end_time:
     :param filter_start_time:
+    :param top_n: number of processes to output. None is all processes.
     :return: void
     """
     mem_pids: List[str] = []
     cpu_pids: List[str] = []
+    times: List[int] = []
     time_mem_array2d: List[List[str]] = []
     time_cpu_array2d: List[List[str]] = []
-    start_date = re.search(r'\d+', file_path).group()
-    analyze_top_log_lines(start_date, lines, filter_start_time, filter_end_time, mem_pids, cpu_pids, time_mem_array2d,
+    analyze_top_log_files(file_paths, filter_start_time, filter_end_time, mem_pids, cpu_pids, times, time_mem_array2d,
                           time_cpu_array2d)
-    mem_pids = [''] + mem_pids
-    cpu_pids = [''] + cpu_pids
-    fill_empty_string(len(mem_pids), time_mem_array2d)
-    fill_empty_string(len(cpu_pids), time_cpu_array2d)
-    write_file_and_view_graph(OUTPUT_TOP_MEM_FILENAME, OUTPUT_TOP_MEM_GRAPHTITLE, mem_pids, time_mem_array2d,
-                              is_output_excel, is_view_graph)
-    write_file_and_view_graph(OUTPUT_TOP_CPU_FILENAME, OUTPUT_TOP_CPU_GRAPHTITLE, cpu_pids, time_cpu_array2d,
-                              is_output_excel, is_view_graph)
-    plt.show()
+    write_top_result(mem_pids, cpu_pids, times, time_mem_array2d, time_cpu_array2d, is_output_excel, is_view_graph,
+                     top_n)
+
+
+def analyze_proc_log(file_paths: List[str], is_output_excel: bool, is_view_graph: bool, filter_start_time: dt,
+                     filter_end_time: dt, top_n: Optional[int], is_jsonl: bool = False):
+    mem_pids: List[str] = []
+    cpu_pids: List[str] = []
+    times: List[int] = []
+    time_mem_array2d: List[List[str]] = []
+    time_cpu_array2d: List[List[str]] = []
+    if is_jsonl:
+        analyze_proc_jsonl(file_paths, filter_start_time, filter_end_time, mem_pids, cpu_pids, times,
+                           time_mem_array2d, time_cpu_array2d)
+    else:
+        analyze_proc_log_lines(iterate_log_lines(file_paths), filter_start_time, filter_end_time, mem_pids,
+                               cpu_pids, times, time_mem_array2d, time_cpu_array2d)
+    write_top_result(mem_pids, cpu_pids, times, time_mem_array2d, time_cpu_array2d, is_output_excel, is_view_graph,
+                     top_n)
 
 
 def main(args: List[str]):
@@ -360,18 +635,28 @@ def main(args: List[str]):
     is_view_graph = False
     filter_start_time: Optional = None
     filter_end_time: Optional = None
+    top_n_value = get_option_value(TOP_N_OPTION, args)
+    top_n: Optional[int] = int(top_n_value) if top_n_value is not None else None
+    set_output_options(args)
+    set_profile_options(args)
     if EXCEL_OPTION in args:
-        is_output_excel = True
+        if openpyxl is None:
+            print('openpyxl package is not installed. {} is ignored.'.format(EXCEL_OPTION))
+        else:
+            is_output_excel = True
     if START_DATETIME_OPTION in args:
         filter_start_time = convert_option_date_time(START_DATETIME_OPTION, args)
     if END_DATETIME_OPTION in args:
         filter_end_time = convert_option_date_time(END_DATETIME_OPTION, args)
-    file_paths: List[str] = glob.glob("../input/top_*.log")
-    lines = []
-    for file_path in file_paths:
-        with open(file_path, 'r') as f:
-            lines += f.readlines()
-    analyze_top_log(file_paths[0], lines, is_output_excel, is_view_graph, filter_start_time, filter_end_time)
+    if PROC_OPTION in args:
+        is_jsonl = JSONL_OPTION in args
+        file_paths = find_log_files("../input/statlog_*.jsonl" if is_jsonl else "../input/proc_*.log")
+        analyze_proc_log(file_paths, is_output_excel, is_view_graph, filter_start_time, filter_end_time, top_n,
+                         is_jsonl)
+        return
+    file_paths: List[str] = find_log_files("../input/top_*.log")
+    analyze_top_log(file_paths, is_output_excel, is_view_graph, filter_start_time, filter_end_time, top_n)
 
 
-main(sys.argv)
+if __name__ == '__main__':
+    main(sys.argv)
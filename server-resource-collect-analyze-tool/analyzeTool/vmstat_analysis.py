@@ -1,82 +1,268 @@
-import glob
 import sys
-from typing import Optional, List
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from typing import Optional, List, Dict, Iterable, Tuple
 
 import matplotlib.dates as mdates
 import matplotlib.pyplot as plt
 
-from analyzeTool.analysis_util import convert_option_date_time, write_csv_file, \
-    create_max_value_row, create_average_value_row, is_contain_rage_from_start_to_end, convert_date_time
+from analyzeTool.analysis_util import find_log_files, convert_option_date_time, write_csv_file, \
+    create_max_value_row, create_average_value_row, iterate_log_lines, convert_filter_seconds, \
+    convert_log_date_time_to_seconds, is_contain_range_seconds, format_seconds, convert_seconds_to_date_time, \
+    get_column_index, split_file_chunks, iterate_file_chunk_lines, get_option_value, load_jsonl_array2d, \
+    set_output_options, profile_phase, set_profile_options
 
 # Constant Value
 DATE_INDEX = 0
 TIME_INDEX = 1
-PROCESS_RUN_INDEX = 2
-MEMORY_FREE_INDEX = 5
-IO_BLOCK_IN_INDEX = 10
-IO_BLOCK_OUT_INDEX = 11
-CPU_USE_INDEX = 14
-LOG_START_LINE = 2
-LOG_LINE_INCREMENT = 3
+VALUE_START_INDEX = 2  # vmstat columns start after date and time added by collector
+GROUP_HEADER_LABEL = 'procs'  # procs -----------memory---------- ---swap-- -----io---- -system-- ------cpu-----
+FIRST_LABEL = 'r'  # r  b   swpd   free   buff  cache   si   so    bi    bo   in   cs us sy id wa st
+IDLE_LABEL = 'id'
+CPU_USE_LABEL = 'cpu_use'
+DEFAULT_LABELS = ['r', 'b', 'swpd', 'free', 'buff', 'cache', 'si', 'so', 'bi', 'bo', 'in', 'cs',
+                  'us', 'sy', 'id', 'wa', 'st']  # used when chunk starts after the label line
+MIN_LABEL_COUNT = 16  # label line shorter than this is truncated
+LINE_TYPE_INVALID = 0
+LINE_TYPE_GROUP_HEADER = 1
+LINE_TYPE_LABEL = 2
+LINE_TYPE_VALUE = 3
 
 # Variables
 START_DATETIME_OPTION = '--startTime'
 END_DATETIME_OPTION = '--endTime'
+PARALLEL_OPTION = '--parallel'
+JSONL_OPTION = '--jsonl'
+JSONL_RECORD_TYPE = 'vmstat'
 OUTPUT_FILE_NAME = 'vmstat_result'
-HEADER_LABELS = ['proc_run', 'mem_free', 'io_bi', 'io_bo', 'cpu_use']
-CPU_USE_INDEX = 4
-GRAPH_TITLE = 'CPU Usage'
+CPU_GRAPH_TITLE = 'CPU Usage'
+CPU_GRAPH_LABELS = ['us', 'sy', 'wa', 'st']
+SYSTEM_GRAPH_TITLE = 'System (interrupts, context switches)'
+SYSTEM_GRAPH_LABELS = ['in', 'cs']
+SWAP_GRAPH_TITLE = 'Swap (si, so)'
+SWAP_GRAPH_LABELS = ['si', 'so']
 
 
-def view_line_graph_cpu_use(title: str, array2d: List[List[str]]):
+def plot_labels(ax, title: str, y_label: str, times: List, header: List[str], array2d: List[List],
+                target_labels: List[str]):
     """
     Description:
-        create and view line graph by matplotlib.
+        plot columns of target labels to axes.
+    :param ax: matplotlib axes.
     :param title: graph title.
-    :param array2d: 2d array (row: date time, column: process). row 0 is date time.
+    :param y_label: y axis label.
+    :param times: x axis values.
+    :param header: top line of output file. top line is '' and vmstat labels.
+    :param array2d: 2d array (row: date time, column: vmstat label). row 0 is date time.
+    :param target_labels: labels to plot.
     :return: void
     """
-    times = [convert_date_time(array2d[i][0]) for i in range(len(array2d)) if i < len(array2d)]
-    fig, axes = plt.subplots()
-    fig.subplots_adjust(bottom=0.2, top=0.95)
-    for col in range(len(array2d[0])):
-        if col != CPU_USE_INDEX:
-            # skip because column 0 is time and view memory usage only
+    for label in target_labels:
+        if label not in header:
             continue
-        y_values = []
-        for row in range(len(array2d)):
-            y_values.append(int(array2d[row][col]) if array2d[row][col] != '' else None)
-        axes.plot(times, y_values, label=HEADER_LABELS[CPU_USE_INDEX])
-    axes.xaxis.set_major_locator(mdates.DayLocator(bymonthday=None, interval=1, tz=None))
-    axes.xaxis.set_major_formatter(mdates.DateFormatter('%Y/%m/%d'))
-    axes.set_title(title)
-    axes.set_xlabel('Time')
-    axes.set_ylabel('CPU Usage [%]')
-    axes.set_ylim(0, 100)
-    axes.legend()
-    axes.grid()
+        col = header.index(label)
+        ax.plot(times, [array2d[row][col] if array2d[row][col] != '' else None for row in range(len(array2d))],
+                label=label)
+    ax.set_title(title)
+    ax.set_xlabel('Time')
+    ax.set_ylabel(y_label)
+    ax.legend()
+    ax.grid()
+
+
+@profile_phase('render')
+def view_line_graph(header: List[str], times: List[int], array2d: List[List]):
+    """
+    Description:
+        create and view line graph (cpu breakdown, interrupts/context switches, swap) by matplotlib.
+    :param header: top line of output file. top line is '' and vmstat labels.
+    :param times: date time seconds of each row.
+    :param array2d: 2d array (row: date time, column: vmstat label). row 0 is date time.
+    :return: void
+    """
+    times = [convert_seconds_to_date_time(seconds) for seconds in times]
+    fig, (ax_top, ax_middle, ax_under) = plt.subplots(nrows=3, ncols=1, sharex=True)
+    fig.subplots_adjust(bottom=0.2, top=0.95)
+    plot_labels(ax_top, CPU_GRAPH_TITLE, 'CPU Usage [%]', times, header, array2d, CPU_GRAPH_LABELS)
+    ax_top.set_ylim(0, 100)
+    plot_labels(ax_middle, SYSTEM_GRAPH_TITLE, 'count/s', times, header, array2d, SYSTEM_GRAPH_LABELS)
+    plot_labels(ax_under, SWAP_GRAPH_TITLE, 'KB/s', times, header, array2d, SWAP_GRAPH_LABELS)
+    ax_under.xaxis.set_major_locator(mdates.DayLocator(bymonthday=None, interval=1, tz=None))
+    ax_under.xaxis.set_major_formatter(mdates.DateFormatter('%Y/%m/%d'))
     plt.xticks(rotation=30)
+    plt.subplots_adjust(hspace=0.3)
+
+
+def classify_vmstat_line(line_columns: List[str]) -> int:
+    """
+    Description:
+        classify vmstat log line by content. value line must be all numbers,
+        so partial line written by collector and lines mixed with other lines are invalid.
+    :param line_columns: log line columns (date, time and vmstat columns).
+    :return: line type
+    """
+    if len(line_columns) <= VALUE_START_INDEX:
+        return LINE_TYPE_INVALID
+    first_column = line_columns[VALUE_START_INDEX]
+    if first_column == GROUP_HEADER_LABEL:
+        return LINE_TYPE_GROUP_HEADER
+    if first_column == FIRST_LABEL:
+        if len(line_columns) - VALUE_START_INDEX < MIN_LABEL_COUNT:
+            return LINE_TYPE_INVALID
+        return LINE_TYPE_LABEL
+    for value in line_columns[VALUE_START_INDEX:]:
+        if not value.isdigit():
+            return LINE_TYPE_INVALID
+    return LINE_TYPE_VALUE
+
+
+@profile_phase('parse')
+def analyze_vmstat_log_lines(lines: Iterable[str], filter_start_time: Optional, filter_end_time: Optional,
+                             labels: List[str], times: List[int], array2d: List[List]):
+    """
+    Description:
+        analyze vmstat log lines in one pass. columns are mapped by the label line of vmstat header,
+        and all columns are stored as numeric values. lines are classified one by one (not by line position),
+        so lines can start from any line of the log.
+    :param lines: log lines.
+    :param filter_start_time: output to start date time.
+    :param filter_end_time: output to end date time.
+    :param labels: vmstat labels (r, b, swpd, ...) in order of appearance.
+    :param times: date time seconds of each row.
+    :param array2d: 2d array (row: date time, column: vmstat label). row 0 is date time.
+    :return: void
+    """
+    label_indexes: Dict[str, int] = {}
+    column_indexes: List[int] = []  # output column index of each vmstat column
+    filter_start_seconds = convert_filter_seconds(filter_start_time)
+    filter_end_seconds = convert_filter_seconds(filter_end_time)
+    for line in lines:
+        line_columns: List[str] = line.split()
+        line_type = classify_vmstat_line(line_columns)
+        if line_type == LINE_TYPE_LABEL:
+            column_indexes = [get_column_index(label, labels, label_indexes)
+                              for label in line_columns[VALUE_START_INDEX:]]
+            continue
+        if line_type != LINE_TYPE_VALUE:
+            continue
+        values = line_columns[VALUE_START_INDEX:]
+        if not column_indexes and len(values) == len(DEFAULT_LABELS):
+            column_indexes = [get_column_index(label, labels, label_indexes) for label in DEFAULT_LABELS]
+        if len(values) != len(column_indexes):
+            continue
+        seconds = convert_log_date_time_to_seconds(line_columns[DATE_INDEX], line_columns[TIME_INDEX])
+        if seconds is None or not is_contain_range_seconds(seconds, filter_start_seconds, filter_end_seconds):
+            continue
+        record: List = [''] * (len(labels) + 1)
+        record[0] = format_seconds(seconds)
+        for index, value in zip(column_indexes, values):
+            record[index + 1] = int(value)
+        times.append(seconds)
+        array2d.append(record)
+
+
+def analyze_vmstat_log_chunk(chunk: Tuple[str, int, int], filter_start_time: Optional,
+                             filter_end_time: Optional) -> Tuple[List[str], List[int], List[List]]:
+    """
+    Description:
+        analyze byte range of vmstat log (executed in worker process).
+    :param chunk: (file path, start offset, end offset)
+    :param filter_start_time: output to start date time.
+    :param filter_end_time: output to end date time.
+    :return: (labels, times, 2d array) of the chunk
+    """
+    labels: List[str] = []
+    times: List[int] = []
+    array2d: List[List] = []
+    analyze_vmstat_log_lines(iterate_file_chunk_lines(*chunk), filter_start_time, filter_end_time, labels, times,
+                             array2d)
+    return labels, times, array2d
+
+
+@profile_phase('parse')
+def analyze_vmstat_log_chunks(file_paths: List[str], parallel_count: int, filter_start_time: Optional,
+                              filter_end_time: Optional, labels: List[str], times: List[int], array2d: List[List]):
+    """
+    Description:
+        analyze vmstat log files in parallel. each file is split into byte ranges and results are merged in order.
+    :param file_paths: log file paths.
+    :param parallel_count: worker process count.
+    :param filter_start_time: output to start date time.
+    :param filter_end_time: output to end date time.
+    :param labels: vmstat labels (r, b, swpd, ...) in order of appearance.
+    :param times: date time seconds of each row.
+    :param array2d: 2d array (row: date time, column: vmstat label). row 0 is date time.
+    :return: void
+    """
+    label_indexes: Dict[str, int] = {}
+    chunks = split_file_chunks(file_paths, parallel_count)
+    with ProcessPoolExecutor(max_workers=parallel_count) as executor:
+        results = executor.map(analyze_vmstat_log_chunk, chunks, repeat(filter_start_time), repeat(filter_end_time))
+        for chunk_labels, chunk_times, chunk_array2d in results:
+            column_indexes = [get_column_index(label, labels, label_indexes) for label in chunk_labels]
+            times.extend(chunk_times)
+            if column_indexes == list(range(len(chunk_labels))):
+                array2d.extend(chunk_array2d)
+                continue
+            for chunk_record in chunk_array2d:
+                record: List = [''] * (len(labels) + 1)
+                record[0] = chunk_record[0]
+                for index, value in zip(column_indexes, chunk_record[1:]):
+                    record[index + 1] = value
+                array2d.append(record)
+
+
+def add_cpu_use_column(labels: List[str], array2d: List[List]):
+    """
+    Description:
+        add cpu use rate (100 - id) column to the end of each row. rows are filled to the same length.
+    :param labels: vmstat labels.
+    :param array2d: 2d array (row: date time, column: vmstat label). row 0 is date time.
+    :return: void
+    """
+    idle_col = labels.index(IDLE_LABEL) + 1 if IDLE_LABEL in labels else -1
+    for record in array2d:
+        record.extend([''] * (len(labels) + 1 - len(record)))
+        record.append(100 - record[idle_col] if idle_col > 0 and record[idle_col] != '' else '')
+
+
+@profile_phase('parse')
+def analyze_vmstat_jsonl(file_paths: List[str], filter_start_time: Optional, filter_end_time: Optional,
+                         labels: List[str], times: List[int], array2d: List[List]):
+    """
+    Description:
+        analyze vmstat records of JSON lines logs (getstatlog.py --format jsonl). values are numbers.
+    :param file_paths: log file paths (statlog_yyyymmdd.jsonl)
+    :param filter_start_time: output to start date time.
+    :param filter_end_time: output to end date time.
+    :param labels: vmstat labels.
+    :param times: date time seconds of each row.
+    :param array2d: 2d array (row: date time, column: vmstat label). row 0 is date time.
+    :return: void
+    """
+    jsonl_times, jsonl_labels, jsonl_array2d = load_jsonl_array2d(file_paths, JSONL_RECORD_TYPE, DEFAULT_LABELS,
+                                                                  filter_start_time, filter_end_time)
+    labels.extend(jsonl_labels)
+    times.extend(jsonl_times)
+    array2d.extend(jsonl_array2d)
 
 
-def analyze_vmstat_log_lines(lines: List[str], filter_start_time: Optional, filter_end_time: Optional,
-                             array2d: List[List[str]]):
-    line_counter: int = LOG_START_LINE
-    while line_counter < len(lines):
-        line_columns: List[str] = lines[line_counter].split()
-        datetime = line_columns[0] + ' ' + line_columns[1]
-        if is_contain_rage_from_start_to_end(datetime, filter_start_time, filter_end_time):
-            array2d.append(
-                [line_columns[DATE_INDEX] + ' ' + line_columns[TIME_INDEX]] + [line_columns[PROCESS_RUN_INDEX]] + [
-                    line_columns[MEMORY_FREE_INDEX]] + [line_columns[IO_BLOCK_IN_INDEX]] + [
-                    line_columns[IO_BLOCK_OUT_INDEX]] + [line_columns[CPU_USE_INDEX]])
-        line_counter += LOG_LINE_INCREMENT
-
-
-def analyze_vmstat_log(lines: List[str], is_output_excel: bool, filter_start_time: Optional, filter_end_time: Optional):
-    vmstat_array2d: List[List[str]] = []
-    analyze_vmstat_log_lines(lines, filter_start_time, filter_end_time, vmstat_array2d)
-    header_labels = [''] + HEADER_LABELS
-    view_line_graph_cpu_use(GRAPH_TITLE, vmstat_array2d)
+def analyze_vmstat_log(file_paths: List[str], parallel_count: int, is_output_excel: bool,
+                       filter_start_time: Optional, filter_end_time: Optional, is_jsonl: bool):
+    labels: List[str] = []
+    times: List[int] = []
+    vmstat_array2d: List[List] = []
+    if is_jsonl:
+        analyze_vmstat_jsonl(file_paths, filter_start_time, filter_end_time, labels, times, vmstat_array2d)
+    elif parallel_count > 1:
+        analyze_vmstat_log_chunks(file_paths, parallel_count, filter_start_time, filter_end_time, labels, times,
+                                  vmstat_array2d)
+    else:
+        analyze_vmstat_log_lines(iterate_log_lines(file_paths), filter_start_time, filter_end_time, labels, times,
+                                 vmstat_array2d)
+    add_cpu_use_column(labels, vmstat_array2d)
+    header_labels = [''] + labels + [CPU_USE_LABEL]
+    view_line_graph(header_labels, times, vmstat_array2d)
     vmstat_array2d.append(['MAX:'] + create_max_value_row(vmstat_array2d))
     vmstat_array2d.append(['AVG:'] + create_average_value_row(vmstat_array2d))
     write_csv_file(OUTPUT_FILE_NAME, header_labels, vmstat_array2d)
@@ -93,16 +279,18 @@ def main(args: List[str]):
     is_view_graph = False
     filter_start_time: Optional = None
     filter_end_time: Optional = None
+    parallel_count = int(get_option_value(PARALLEL_OPTION, args) or 1)
+    set_output_options(args)
+    set_profile_options(args)
     if START_DATETIME_OPTION in args:
         filter_start_time = convert_option_date_time(START_DATETIME_OPTION, args)
     if END_DATETIME_OPTION in args:
         filter_end_time = convert_option_date_time(END_DATETIME_OPTION, args)
-    file_paths: List[str] = glob.glob("../input/vmstat_*.log")
-    lines: List[str] = []
-    for file_path in file_paths:
-        with open(file_path, 'r', encoding="utf-8_sig") as f:
-            lines += f.readlines()
-    analyze_vmstat_log(lines, is_output_excel, filter_start_time, filter_end_time)
+    is_jsonl = JSONL_OPTION in args
+    file_paths: List[str] = find_log_files("../input/statlog_*.jsonl" if is_jsonl else "../input/vmstat_*.log")
+    analyze_vmstat_log(file_paths, parallel_count, is_output_excel, filter_start_time, filter_end_time,
+                       is_jsonl)
 
 
-main(sys.argv)
+if __name__ == '__main__':
+    main(sys.argv)
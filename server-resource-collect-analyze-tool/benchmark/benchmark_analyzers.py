@@ -0,0 +1,281 @@
+"""
+benchmark analyzers with synthetic logs (log_generator.py).
+    parse, summary (MAX/AVG rows, ordering, forecast) and output (csv) phases of each analyzer are timed
+    in a new process per analyzer (graph view by matplotlib is not included), and throughput (lines/s, MB/s of
+    input logs) and peak RSS of the process are reported. single host analyzers are run for each host.
+    result is output to benchmark_result.csv too.
+    option:
+        --analyzers vmstat,free,top,... : analyzers to run (default all: BENCHMARK_ANALYZERS)
+        --workDir PATH : folder of generated logs and analyzer outputs (default temporary folder, removed at end)
+        --outputDir DIR : output folder of benchmark_result.csv (default ../output/)
+        and options of log_generator.py (--hours, --interval, --hosts, --processes, --churn, --devices, --seed)
+"""
+import os
+import re
+import resource
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from typing import List, Dict, Tuple, Callable
+
+from analyzeTool.analysis_util import find_log_files, iterate_log_lines, write_csv_file, create_max_value_row, \
+    create_average_value_row, convert_sparse_records_to_array2d, get_option_value, set_output_options, \
+    OUTPUT_DIR_OPTION
+from analyzeTool import vmstat_analysis, free_analysis, top_analysis, iostat_analysis, iostat_dev_analysis, \
+    iostat_cpu_analysis, df_analysis
+from analyzeTool.df_forecast import DEFAULT_WINDOWS, parse_windows, create_forecast_rows
+from benchmark.log_generator import create_generator_config, generate_logs
+
+# Constant Value
+BYTES_PER_MB = 1024 * 1024
+RESULT_HEADER = ['analyzer', 'files', 'lines', 'MB', 'parse [s]', 'summary [s]', 'output [s]', 'total [s]',
+                 'lines/s', 'MB/s', 'peak RSS [MB]']
+LOG_FILE_PATTERNS = {'vmstat': 'vmstat_*.log', 'free': 'free_*.log', 'top': 'top_*.log',
+                     'iostat': 'iostat_x_dev_*.log', 'iostat_dev': 'iostat_dev_*.log',
+                     'iostat_cpu': 'iostat_cpu_*.log', 'df': 'df_2*.log', 'df_fleet': 'df_2*.log'}
+
+# Variables
+ANALYZERS_OPTION = '--analyzers'
+WORK_DIR_OPTION = '--workDir'
+OUTPUT_FILE_NAME = 'benchmark_result'
+
+
+def benchmark_vmstat(file_paths: List[str], output_dir: str) -> List[float]:
+    start = time.perf_counter()
+    labels: List[str] = []
+    times: List[int] = []
+    array2d: List[List] = []
+    vmstat_analysis.analyze_vmstat_log_lines(iterate_log_lines(file_paths), None, None, labels, times, array2d)
+    parsed = time.perf_counter()
+    vmstat_analysis.add_cpu_use_column(labels, array2d)
+    array2d.append(['MAX:'] + create_max_value_row(array2d))
+    array2d.append(['AVG:'] + create_average_value_row(array2d))
+    summarized = time.perf_counter()
+    write_csv_file(vmstat_analysis.OUTPUT_FILE_NAME, [''] + labels + [vmstat_analysis.CPU_USE_LABEL], array2d,
+                   output_dir=output_dir)
+    return [parsed - start, summarized - parsed, time.perf_counter() - summarized]
+
+
+def benchmark_free(file_paths: List[str], output_dir: str) -> List[float]:
+    start = time.perf_counter()
+    array2d: List[List[str]] = []
+    free_analysis.analyze_free_log_lines(iterate_log_lines(file_paths), None, None, [], array2d, {})
+    parsed = time.perf_counter()
+    free_analysis.get_total_memory_changes(array2d)
+    array2d.append(['MAX:'] + create_max_value_row(array2d))
+    array2d.append(['AVG:'] + create_average_value_row(array2d))
+    summarized = time.perf_counter()
+    write_csv_file(free_analysis.OUTPUT_FILE_NAME, [''] + free_analysis.analyze_free_params(''), array2d,
+                   output_dir=output_dir)
+    return [parsed - start, summarized - parsed, time.perf_counter() - summarized]
+
+
+def benchmark_top(file_paths: List[str], output_dir: str) -> List[float]:
+    start = time.perf_counter()
+    mem_pids: List[str] = []
+    cpu_pids: List[str] = []
+    times: List[int] = []
+    mem_array2d: List[List[str]] = []
+    cpu_array2d: List[List[str]] = []
+    top_analysis.analyze_top_log_files(file_paths, None, None, mem_pids, cpu_pids, times, mem_array2d, cpu_array2d)
+    parsed = time.perf_counter()
+    results: List[Tuple[str, List[str], List[int], List[List[str]]]] = []
+    for filename, pids, array2d in [(top_analysis.OUTPUT_TOP_MEM_FILENAME, mem_pids, mem_array2d),
+                                    (top_analysis.OUTPUT_TOP_CPU_FILENAME, cpu_pids, cpu_array2d)]:
+        header = [''] + pids
+        top_analysis.fill_empty_string(len(header), array2d)
+        max_values = create_max_value_row(array2d)
+        big_order_indexes = top_analysis.create_max_value_order(max_values)
+        array2d.append(['MAX:'] + max_values)
+        array2d.append(['AVG:'] + create_average_value_row(array2d))
+        results.append((filename, header, big_order_indexes, array2d))
+    summarized = time.perf_counter()
+    for filename, header, big_order_indexes, array2d in results:
+        write_csv_file(filename, header, array2d, big_order_indexes, output_dir)
+    return [parsed - start, summarized - parsed, time.perf_counter() - summarized]
+
+
+def write_sparse_results(results: List[Tuple[str, List[List[str]]]], names: List[str], output_dir: str) -> float:
+    """
+    Description:
+        add MAX/AVG rows to 2d arrays of device (or filesystem) analyzers and output csv files.
+    :param results: list of (output file name, 2d array converted from sparse records).
+    :param names: device names.
+    :param output_dir: output folder.
+    :return: seconds of output phase
+    """
+    for _, array2d in results:
+        array2d.append(['MAX:'] + create_max_value_row(array2d))
+        array2d.append(['AVG:'] + create_average_value_row(array2d))
+    summarized = time.perf_counter()
+    for filename, array2d in results:
+        write_csv_file(filename, [''] + names, array2d, output_dir=output_dir)
+    return time.perf_counter() - summarized
+
+
+def benchmark_iostat(file_paths: List[str], output_dir: str) -> List[float]:
+    start = time.perf_counter()
+    names: List[str] = []
+    read_records: List[Tuple[str, Dict[int, str]]] = []
+    write_records: List[Tuple[str, Dict[int, str]]] = []
+    iostat_analysis.analyze_iostat_log_lines(iterate_log_lines(file_paths), None, None, names, [], read_records,
+                                             write_records, False)
+    parsed = time.perf_counter()
+    output_seconds = write_sparse_results(
+        [(iostat_analysis.IOSTAT_READ_IO_FILE_NAME, convert_sparse_records_to_array2d(read_records, len(names))),
+         (iostat_analysis.IOSTAT_WRITE_IO_FILE_NAME, convert_sparse_records_to_array2d(write_records, len(names)))],
+        names, output_dir)
+    return [parsed - start, time.perf_counter() - parsed - output_seconds, output_seconds]
+
+
+def benchmark_iostat_dev(file_paths: List[str], output_dir: str) -> List[float]:
+    start = time.perf_counter()
+    names: List[str] = []
+    tps_records: List[Tuple[str, Dict[int, str]]] = []
+    read_records: List[Tuple[str, Dict[int, str]]] = []
+    write_records: List[Tuple[str, Dict[int, str]]] = []
+    iostat_dev_analysis.analyze_iostat_dev_log_lines(iterate_log_lines(file_paths), None, None, names, [],
+                                                     tps_records, read_records, write_records, False)
+    parsed = time.perf_counter()
+    output_seconds = write_sparse_results(
+        [(iostat_dev_analysis.IOSTAT_TPS_FILE_NAME, convert_sparse_records_to_array2d(tps_records, len(names))),
+         (iostat_dev_analysis.IOSTAT_READ_KB_FILE_NAME, convert_sparse_records_to_array2d(read_records, len(names))),
+         (iostat_dev_analysis.IOSTAT_WRITE_KB_FILE_NAME,
+          convert_sparse_records_to_array2d(write_records, len(names)))], names, output_dir)
+    return [parsed - start, time.perf_counter() - parsed - output_seconds, output_seconds]
+
+
+def benchmark_iostat_cpu(file_paths: List[str], output_dir: str) -> List[float]:
+    start = time.perf_counter()
+    labels: List[str] = []
+    array2d: List[List[str]] = []
+    iostat_cpu_analysis.analyze_iostat_cpu_log_lines(iterate_log_lines(file_paths), None, None, labels, [], array2d)
+    parsed = time.perf_counter()
+    array2d.append(['MAX:'] + create_max_value_row(array2d))
+    array2d.append(['AVG:'] + create_average_value_row(array2d))
+    summarized = time.perf_counter()
+    write_csv_file(iostat_cpu_analysis.OUTPUT_FILE_NAME, [''] + labels + [iostat_cpu_analysis.CPU_USE_LABEL],
+                   array2d, output_dir=output_dir)
+    return [parsed - start, summarized - parsed, time.perf_counter() - summarized]
+
+
+def benchmark_df(file_paths: List[str], output_dir: str) -> List[float]:
+    start = time.perf_counter()
+    filesystems: List[str] = []
+    available_dict: Dict[str, str] = {}
+    times: List[int] = []
+    records: List[Tuple[str, Dict[int, str]]] = []
+    df_analysis.analyze_df_log_lines(iterate_log_lines(file_paths), None, None,
+                                     re.compile(df_analysis.DEFAULT_FILESYSTEM_FILTER), filesystems, {},
+                                     available_dict, times, records)
+    parsed = time.perf_counter()
+    df_array2d = convert_sparse_records_to_array2d(records, len(filesystems))
+    create_forecast_rows('', filesystems, available_dict, times, df_array2d, parse_windows(DEFAULT_WINDOWS))
+    output_seconds = write_sparse_results([(df_analysis.OUTPUT_FILE_NAME, df_array2d)], filesystems, output_dir)
+    return [parsed - start, time.perf_counter() - parsed - output_seconds, output_seconds]
+
+
+def benchmark_df_fleet(host_dirs: List[str], output_dir: str) -> List[float]:
+    start = time.perf_counter()
+    set_output_options([OUTPUT_DIR_OPTION, output_dir])
+    df_analysis.analyze_fleet_df_logs(host_dirs, None, None, re.compile(df_analysis.DEFAULT_FILESYSTEM_FILTER),
+                                      parse_windows(DEFAULT_WINDOWS), False)
+    return [time.perf_counter() - start, 0.0, 0.0]
+
+
+BENCHMARK_ANALYZERS: Dict[str, Callable[[List[str], str], List[float]]] = {
+    'vmstat': benchmark_vmstat, 'free': benchmark_free, 'top': benchmark_top, 'iostat': benchmark_iostat,
+    'iostat_dev': benchmark_iostat_dev, 'iostat_cpu': benchmark_iostat_cpu, 'df': benchmark_df,
+    'df_fleet': benchmark_df_fleet}
+
+
+def run_benchmark(analyzer: str, host_dirs: List[str], output_dir: str) -> Tuple[List[float], int]:
+    """
+    Description:
+        run benchmark of one analyzer (executed in a new worker process, so peak RSS is of the analyzer only).
+        df_fleet is run once for all hosts, and other analyzers are run for each host.
+    :param analyzer: analyzer name (key of BENCHMARK_ANALYZERS).
+    :param host_dirs: log folders of hosts.
+    :param output_dir: output folder of analyzer.
+    :return: (seconds of parse, summary and output phases, peak RSS [KB])
+    """
+    phase_seconds = [0.0, 0.0, 0.0]
+    if analyzer == 'df_fleet':
+        phase_seconds = benchmark_df_fleet(host_dirs, output_dir)
+    else:
+        for host_dir in host_dirs:
+            file_paths = find_log_files(os.path.join(host_dir, LOG_FILE_PATTERNS[analyzer]))
+            host_seconds = BENCHMARK_ANALYZERS[analyzer](file_paths, output_dir)
+            phase_seconds = [total + seconds for total, seconds in zip(phase_seconds, host_seconds)]
+    return phase_seconds, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def count_input(analyzer: str, host_dirs: List[str]) -> Tuple[int, int, int]:
+    """
+    Description:
+        count input log files, lines and bytes of analyzer.
+    :param analyzer: analyzer name.
+    :param host_dirs: log folders of hosts.
+    :return: (file count, line count, byte count)
+    """
+    file_paths: List[str] = []
+    for host_dir in host_dirs:
+        file_paths += find_log_files(os.path.join(host_dir, LOG_FILE_PATTERNS[analyzer]))
+    line_count = 0
+    for file_path in file_paths:
+        with open(file_path, 'rb') as f:
+            line_count += sum(chunk.count(b'\n') for chunk in iter(lambda: f.read(BYTES_PER_MB), b''))
+    return len(file_paths), line_count, sum(os.path.getsize(file_path) for file_path in file_paths)
+
+
+def create_result_row(analyzer: str, input_counts: Tuple[int, int, int], phase_seconds: List[float],
+                      peak_rss_kb: int) -> List:
+    file_count, line_count, byte_count = input_counts
+    total_seconds = sum(phase_seconds)
+    megabytes = byte_count / BYTES_PER_MB
+    return [analyzer, file_count, line_count, round(megabytes, 2)] + [round(seconds, 3) for seconds in phase_seconds] \
+        + [round(total_seconds, 3), int(line_count / total_seconds) if total_seconds > 0 else '',
+           round(megabytes / total_seconds, 2) if total_seconds > 0 else '', round(peak_rss_kb / 1024, 1)]
+
+
+def print_results(rows: List[List]):
+    widths = [max(len(str(row[col])) for row in [RESULT_HEADER] + rows) for col in range(len(RESULT_HEADER))]
+    for row in [RESULT_HEADER] + rows:
+        print('  '.join(str(value).rjust(width) if col > 0 else str(value).ljust(width)
+                        for col, (value, width) in enumerate(zip(row, widths))))
+
+
+def main(args: List[str]):
+    """
+
+    :param args: command line arguments
+    :return: void
+    """
+    set_output_options(args)
+    analyzers = (get_option_value(ANALYZERS_OPTION, args) or ','.join(BENCHMARK_ANALYZERS.keys())).split(',')
+    work_dir = get_option_value(WORK_DIR_OPTION, args) or tempfile.mkdtemp(prefix='analyzer_benchmark_')
+    config = create_generator_config(args)
+    config['output_path'] = os.path.join(work_dir, 'input')
+    output_dir = os.path.join(work_dir, 'output')
+    os.makedirs(output_dir, exist_ok=True)
+    start = time.perf_counter()
+    host_dirs = generate_logs(config)
+    print('generated logs: {} hosts, {} hours ({:.1f} s)'.format(len(host_dirs), config['hours'],
+                                                                time.perf_counter() - start))
+    rows: List[List] = []
+    for analyzer in analyzers:
+        # spawn: worker process doesn't inherit memory of this process, so peak RSS is of the analyzer
+        with ProcessPoolExecutor(max_workers=1, mp_context=get_context('spawn')) as executor:
+            phase_seconds, peak_rss_kb = executor.submit(run_benchmark, analyzer, host_dirs, output_dir).result()
+        rows.append(create_result_row(analyzer, count_input(analyzer, host_dirs), phase_seconds, peak_rss_kb))
+    print_results(rows)
+    write_csv_file(OUTPUT_FILE_NAME, RESULT_HEADER, rows)
+    if get_option_value(WORK_DIR_OPTION, args) is None:
+        shutil.rmtree(work_dir)
+
+
+if __name__ == '__main__':
+    main(sys.argv)
@@ -0,0 +1,267 @@
+"""
+generate synthetic logs in the same format as getstatlog.sh (for benchmark of analyzers).
+    one folder per host (host01, host02, ...) and one file per day of each log.
+    - vmstat, free : awk timestamped lines ('YYYY/mm/dd HH:MM:SS' + command output)
+    - top : top -bi (PID column is 7 characters like procps-ng)
+    - iostat : iostat -cyt, iostat -dyt -p ALL, iostat -xdyt -p ALL (C locale time)
+    - df : df -kP and df -iP blocks (collected every DF_INTERVAL_COUNT samples)
+    option:
+        --outputPath PATH : output folder (default ../input)
+        --hours N : log period (default 24)
+        --interval N : sampling interval seconds (default 5)
+        --hosts N : host count (default 1)
+        --processes N : process count in top of each sample (default 30)
+        --churn RATE : rate of processes replaced by new process id per sample (default 0.01)
+        --devices N : disk count. each disk has 2 partitions (default 2)
+        --seed N : random seed (default 0)
+"""
+import datetime as dt
+import os
+import random
+import sys
+from typing import List, Dict, TextIO
+
+from analyzeTool.analysis_util import get_option_value
+
+# Constant Value
+START_DATE_TIME = dt.datetime(2021, 1, 1)
+DF_INTERVAL_COUNT = 60
+PARTITION_COUNT = 2
+FILESYSTEM_SIZE_KB = 100 * 1024 * 1024
+FILESYSTEM_INODES = 6553600
+MEMORY_TOTAL_KB = 16 * 1024 * 1024
+SWAP_TOTAL_KB = 2 * 1024 * 1024
+COMMANDS = ['java', 'python3', 'postgres', 'nginx', 'node', 'sshd', 'rsyslogd', 'containerd', 'kworker/0:1', 'bash']
+VMSTAT_HEADER = ['procs -----------memory---------- ---swap-- -----io---- -system-- ------cpu-----',
+                 ' r  b   swpd   free   buff  cache   si   so    bi    bo   in   cs us sy id wa st']
+FREE_HEADER = '               total        used        free      shared  buff/cache   available'
+TOP_PID_HEADER = '    PID USER      PR  NI    VIRT    RES    SHR S  %CPU  %MEM     TIME+ COMMAND'
+IOSTAT_CPU_HEADER = 'avg-cpu:  %user   %nice %system %iowait  %steal   %idle'
+IOSTAT_DEV_HEADER = 'Device             tps    kB_read/s    kB_wrtn/s    kB_dscd/s    kB_read    kB_wrtn    kB_dscd'
+IOSTAT_X_DEV_HEADER = 'Device            r/s     rkB/s   rrqm/s  %rrqm r_await rareq-sz     w/s     wkB/s   wrqm/s  ' \
+                      '%wrqm w_await wareq-sz     d/s     dkB/s   drqm/s  %drqm d_await dareq-sz  aqu-sz  %util'
+IOSTAT_X_DEV_VALUE_COUNT = 20
+DF_HEADER = 'Filesystem     1024-blocks      Used Available Capacity Mounted on'
+DF_INODE_HEADER = 'Filesystem      Inodes  IUsed   IFree IUse% Mounted on'
+
+# Variables
+OUTPUT_PATH_OPTION = '--outputPath'
+HOURS_OPTION = '--hours'
+INTERVAL_OPTION = '--interval'
+HOSTS_OPTION = '--hosts'
+PROCESSES_OPTION = '--processes'
+CHURN_OPTION = '--churn'
+DEVICES_OPTION = '--devices'
+SEED_OPTION = '--seed'
+DEFAULT_CONFIG = {'output_path': '../input', 'hours': 24, 'interval': 5, 'hosts': 1, 'processes': 30,
+                  'churn': 0.01, 'devices': 2, 'seed': 0}
+
+
+def create_generator_config(args: List[str]) -> Dict:
+    """
+    Description:
+        create generator config from command line arguments (default values are DEFAULT_CONFIG).
+    :param args: command line arguments
+    :return: config
+    """
+    config = dict(DEFAULT_CONFIG)
+    for option, key, value_type in [(OUTPUT_PATH_OPTION, 'output_path', str), (HOURS_OPTION, 'hours', float),
+                                    (INTERVAL_OPTION, 'interval', int), (HOSTS_OPTION, 'hosts', int),
+                                    (PROCESSES_OPTION, 'processes', int), (CHURN_OPTION, 'churn', float),
+                                    (DEVICES_OPTION, 'devices', int), (SEED_OPTION, 'seed', int)]:
+        value = get_option_value(option, args)
+        if value is not None:
+            config[key] = value_type(value)
+    return config
+
+
+def get_device_names(device_count: int) -> List[str]:
+    names: List[str] = []
+    for index in range(device_count):
+        disk = 'sd' + chr(ord('a') + index % 26) * (index // 26 + 1)
+        names += [disk] + [disk + str(number) for number in range(1, PARTITION_COUNT + 1)]
+    return names
+
+
+def create_processes(count: int, next_pid: int, rand: random.Random) -> List[List]:
+    """
+    Description:
+        create processes of top. process is [pid, command, cpu weight, memory rate, cpu time seconds].
+    :param count: process count.
+    :param next_pid: process id of the first process.
+    :param rand: random generator.
+    :return: processes
+    """
+    return [[next_pid + index, rand.choice(COMMANDS), rand.random() ** 3 * 100, rand.random() ** 4 * 20, 0.0]
+            for index in range(count)]
+
+
+def replace_processes(processes: List[List], churn: float, next_pid: int, rand: random.Random) -> int:
+    """
+    Description:
+        replace processes by new process id (process exited and another started) at churn rate.
+    :param processes: processes of top.
+    :param churn: rate of processes replaced.
+    :param next_pid: process id of next new process.
+    :param rand: random generator.
+    :return: process id of next new process.
+    """
+    for index in range(len(processes)):
+        if rand.random() < churn:
+            processes[index] = create_processes(1, next_pid, rand)[0]
+            next_pid += 1
+    return next_pid
+
+
+def write_top_sample(f: TextIO, sample_time: dt.datetime, processes: List[List], interval: int, rand: random.Random):
+    cpu_values = [process[2] * rand.random() for process in processes]
+    total_cpu = min(sum(cpu_values) / 4, 100.0)
+    f.write('top - {} up 25 days,  1 user,  load average: 0.17, 0.08, 0.02\n'.format(sample_time.strftime('%H:%M:%S')))
+    f.write('Tasks: {:3d} total,   1 running, {:3d} sleeping,   0 stopped,   0 zombie\n'.format(
+        len(processes), len(processes) - 1))
+    f.write('%Cpu(s): {:4.1f} us,  0.5 sy,  0.0 ni, {:4.1f} id,  0.0 wa,  0.0 hi,  0.0 si,  0.0 st\n'.format(
+        total_cpu, 100.0 - total_cpu))
+    f.write('MiB Mem :  16384.0 total,   5140.5 free,   9474.2 used,   1769.3 buff/cache\n')
+    f.write('MiB Swap:   2048.0 total,   2048.0 free,      0.0 used.   6539.6 avail Mem\n\n')
+    f.write(TOP_PID_HEADER + '\n')
+    for process, cpu in sorted(zip(processes, cpu_values), key=lambda item: item[1], reverse=True):
+        process[4] += cpu * interval / 100
+        memory = process[3] * (0.9 + rand.random() * 0.2)
+        rss = int(MEMORY_TOTAL_KB * memory / 100)
+        f.write('{:7d} root      20   0 {:7d} {:6d} {:6d} S {:5.1f} {:5.1f} {:6d}:{:05.2f} {}\n'.format(
+            process[0], rss * 3, rss, rss // 4, cpu, memory, int(process[4] // 60), process[4] % 60, process[1]))
+    f.write('\n')
+
+
+def write_vmstat_free_sample(vmstat: TextIO, free: TextIO, sample_time: dt.datetime, rand: random.Random):
+    date_time = sample_time.strftime('%Y/%m/%d %H:%M:%S')
+    user = rand.randint(0, 60)
+    system = rand.randint(0, 10)
+    wait = rand.randint(0, 5)
+    free_kb = rand.randint(MEMORY_TOTAL_KB // 8, MEMORY_TOTAL_KB // 2)
+    cache_kb = rand.randint(MEMORY_TOTAL_KB // 8, MEMORY_TOTAL_KB // 4)
+    swap_used_kb = rand.randint(0, SWAP_TOTAL_KB // 16)
+    for header in VMSTAT_HEADER:
+        vmstat.write(date_time + '  ' + header + '\n')
+    vmstat.write('{}  {:2d} {:2d} {:6d} {:7d} {:6d} {:6d} {:4d} {:4d} {:5d} {:5d} {:4d} {:4d} {:2d} {:2d} {:2d} {:2d} '
+                 '{:2d}\n'.format(date_time, rand.randint(0, 8), rand.randint(0, 2), swap_used_kb, free_kb, 1234,
+                                  cache_kb, rand.randint(0, 10), rand.randint(0, 10), rand.randint(0, 5000),
+                                  rand.randint(0, 20000), rand.randint(100, 3000), rand.randint(200, 9000), user,
+                                  system, 100 - user - system - wait, wait, 0))
+    used_kb = MEMORY_TOTAL_KB - free_kb - cache_kb
+    free.write(date_time + ' ' + FREE_HEADER + '\n')
+    free.write('{}  Mem:    {:12d} {:11d} {:11d} {:11d} {:11d} {:11d}\n'.format(
+        date_time, MEMORY_TOTAL_KB, used_kb, free_kb, 10000, cache_kb, free_kb + cache_kb))
+    free.write('{}  Swap:   {:12d} {:11d} {:11d}\n'.format(date_time, SWAP_TOTAL_KB, swap_used_kb,
+                                                           SWAP_TOTAL_KB - swap_used_kb))
+
+
+def write_iostat_sample(cpu: TextIO, dev: TextIO, x_dev: TextIO, sample_time: dt.datetime, device_names: List[str],
+                        rand: random.Random):
+    date_time = sample_time.strftime('%m/%d/%y %H:%M:%S') + '\n'
+    user = rand.random() * 60
+    cpu.write(date_time + IOSTAT_CPU_HEADER + '\n')
+    cpu.write('          {:6.2f}    0.00    {:4.2f}    {:4.2f}    0.00   {:6.2f}\n\n'.format(
+        user, 1.5, 0.5, 100 - user - 2.0))
+    dev.write(date_time + IOSTAT_DEV_HEADER + '\n')
+    x_dev.write(date_time + IOSTAT_X_DEV_HEADER + '\n')
+    for name in device_names:
+        dev.write('{:14s} {:8.2f} {:12.2f} {:12.2f} {:12.2f} {:10d} {:10d} {:10d}\n'.format(
+            name, rand.random() * 100, rand.random() * 1000, rand.random() * 4000, 0.0, rand.randint(0, 5000),
+            rand.randint(0, 20000), 0))
+        x_dev.write('{:14s}'.format(name) + ''.join(' {:7.2f}'.format(rand.random() * 100)
+                                                    for _ in range(IOSTAT_X_DEV_VALUE_COUNT)) + '\n')
+    dev.write('\n')
+    x_dev.write('\n')
+
+
+def write_df_sample(df: TextIO, df_inode: TextIO, sample_time: dt.datetime, sample_index: int,
+                    device_names: List[str], rand: random.Random):
+    block_start = '###### start ' + sample_time.strftime('%Y-%m-%d %H%M%S') + '\n'
+    df.write(block_start + DF_HEADER + '\n')
+    df_inode.write(block_start + DF_INODE_HEADER + '\n')
+    for index, name in enumerate([name for name in device_names if name[-1].isdigit()]):
+        used = min(FILESYSTEM_SIZE_KB // 4 + (index + 1) * sample_index * 10 + rand.randint(0, 1000),
+                   FILESYSTEM_SIZE_KB)
+        inode_used = min(FILESYSTEM_INODES // 8 + sample_index + index, FILESYSTEM_INODES)
+        mount = '/' if index == 0 else '/data' + str(index)
+        df.write('/dev/{:10s} {:11d} {:9d} {:9d} {:7d}% {}\n'.format(
+            name, FILESYSTEM_SIZE_KB, used, FILESYSTEM_SIZE_KB - used, used * 100 // FILESYSTEM_SIZE_KB, mount))
+        df_inode.write('/dev/{:10s} {:7d} {:6d} {:7d} {:4d}% {}\n'.format(
+            name, FILESYSTEM_INODES, inode_used, FILESYSTEM_INODES - inode_used,
+            inode_used * 100 // FILESYSTEM_INODES, mount))
+    df.write('tmpfs              8192000         0   8192000       0% /dev/shm\n')
+    df_inode.write('tmpfs          2048000      1 2047999    1% /dev/shm\n')
+
+
+def open_day_files(host_path: str, day: str) -> Dict[str, TextIO]:
+    file_names = {'vmstat': 'vmstat_{}.log', 'free': 'free_{}.log', 'top': 'top_{}-.log',
+                  'iostat_cpu': 'iostat_cpu_{}-.log', 'iostat_dev': 'iostat_dev_{}-.log',
+                  'iostat_x_dev': 'iostat_x_dev_{}-.log', 'df': 'df_{}.log', 'df_inode': 'df_inode_{}.log'}
+    files = {key: open(os.path.join(host_path, file_name.format(day)), 'w') for key, file_name in file_names.items()}
+    for key in ['iostat_cpu', 'iostat_dev', 'iostat_x_dev']:
+        files[key].write('Linux 5.4.0-generic (host) \t{}/{}/{} \t_x86_64_\t(4 CPU)\n\n'.format(day[4:6], day[6:8],
+                                                                                           day[2:4]))
+    return files
+
+
+def generate_host_logs(host_path: str, config: Dict, rand: random.Random):
+    """
+    Description:
+        generate all logs of one host. log file is changed at the day boundary like getstatlog.sh.
+    :param host_path: output folder of host.
+    :param config: generator config.
+    :param rand: random generator.
+    :return: void
+    """
+    os.makedirs(host_path, exist_ok=True)
+    device_names = get_device_names(config['devices'])
+    processes = create_processes(config['processes'], 1000, rand)
+    next_pid = 1000 + config['processes']
+    files: Dict[str, TextIO] = {}
+    day = ''
+    for sample_index in range(int(config['hours'] * 3600 / config['interval'])):
+        sample_time = START_DATE_TIME + dt.timedelta(seconds=sample_index * config['interval'])
+        if sample_time.strftime('%Y%m%d') != day:
+            for f in files.values():
+                f.close()
+            day = sample_time.strftime('%Y%m%d')
+            files = open_day_files(host_path, day)
+        write_vmstat_free_sample(files['vmstat'], files['free'], sample_time, rand)
+        next_pid = replace_processes(processes, config['churn'], next_pid, rand)
+        write_top_sample(files['top'], sample_time, processes, config['interval'], rand)
+        write_iostat_sample(files['iostat_cpu'], files['iostat_dev'], files['iostat_x_dev'], sample_time,
+                            device_names, rand)
+        if sample_index % DF_INTERVAL_COUNT == 0:
+            write_df_sample(files['df'], files['df_inode'], sample_time, sample_index, device_names, rand)
+    for f in files.values():
+        f.close()
+
+
+def generate_logs(config: Dict) -> List[str]:
+    """
+    Description:
+        generate logs of all hosts.
+    :param config: generator config.
+    :return: output folders of hosts.
+    """
+    rand = random.Random(config['seed'])
+    host_paths = [os.path.join(config['output_path'], 'host{:02d}'.format(number))
+                  for number in range(1, config['hosts'] + 1)]
+    for host_path in host_paths:
+        generate_host_logs(host_path, config, rand)
+    return host_paths
+
+
+def main(args: List[str]):
+    """
+
+    :param args: command line arguments
+    :return: void
+    """
+    for host_path in generate_logs(create_generator_config(args)):
+        print('generated: ' + host_path)
+
+
+if __name__ == '__main__':
+    main(sys.argv)
@@ -0,0 +1,869 @@
+"""
+collect linux server resource logs by reading /proc directly (without forking vmstat, free, iostat and df).
+    /proc files are opened once and re-read by seek(0) at each interval, and rates are calculated from
+    the differences of the counters between samples. output logs are the same format as getstatlog.sh,
+    so they can be analyzed by analyzeTool.
+        vmstat_yyyymmdd.log, free_yyyymmdd.log, iostat_cpu_yyyymmdd.log, iostat_dev_yyyymmdd.log,
+        iostat_x_dev_yyyymmdd.log, df_yyyymmdd.log, df_inode_yyyymmdd.log
+    with --process, per process cpu and memory are written to proc_yyyymmdd.log instead of top.
+    cpu usage is calculated from the differences of /proc/[pid]/stat cpu times (not estimated by top),
+    and cpu time of child processes which exited between samples is got from cutime/cstime of the parent.
+        yyyy/mm/dd HH:MM:SS PID %CPU %MEM RSS[KB] SWAP[KB] COMMAND
+    overhead of the collector itself is written to collector_yyyymmdd.log (same format as getstatlog.sh).
+        yyyy/mm/dd HH:MM:SS  cpu[ms] rss[KB] forks written[bytes] interval[ms] jitter[ms]
+    with --format jsonl, samples are written to statlog_yyyymmdd.jsonl instead. one line is one JSON record
+    with epoch time (ts), utc offset (tz), record type and typed values (int: counter and size, float: rate).
+        {"ts":1609459205.0,"tz":32400,"type":"vmstat","r":1,"b":0,...,"st":0}
+        {"ts":1609459205.0,"tz":32400,"type":"iostat_x_dev","device":"sda","r/s":0.0,...}
+    option:
+        --interval N : sampling interval seconds (default 5)
+        --dfIntervalCount N : df is collected once every N samples (default 60)
+        --outputPath PATH : output directory (default /root/statlog)
+        --process : collect per process cpu and memory
+        --format text|jsonl|both : output format (default text)
+        --compress gzip|zstd|none : compression of the log file of previous day (default gzip).
+                                    zstd requires zstandard package.
+"""
+import datetime as dt
+import gzip
+import json
+import math
+import os
+import re
+import shutil
+import sys
+import threading
+import time
+from typing import List, Dict, Optional, IO, Tuple
+
+try:
+    import zstandard  # optional: needed only for --compress zstd
+except ImportError:
+    zstandard = None
+
+# Constant Value
+PROC_STAT_PATH = '/proc/stat'
+PROC_MEMINFO_PATH = '/proc/meminfo'
+PROC_VMSTAT_PATH = '/proc/vmstat'
+PROC_DISKSTATS_PATH = '/proc/diskstats'
+PROC_MOUNTS_PATH = '/proc/mounts'
+PROC_SELF_STATM_PATH = '/proc/self/statm'
+PROC_PATH = '/proc'
+PID_FILE_READ_SIZE = 8192  # /proc/[pid]/stat and status are smaller than this
+CPU_USER = 0
+CPU_NICE = 1
+CPU_SYSTEM = 2
+CPU_IDLE = 3
+CPU_IOWAIT = 4
+CPU_IRQ = 5
+CPU_SOFTIRQ = 6
+CPU_STEAL = 7
+CPU_FIELD_COUNT = 8  # guest and guest_nice are included in user and nice
+DISK_READS = 0
+DISK_READS_MERGED = 1
+DISK_SECTORS_READ = 2
+DISK_READ_MS = 3
+DISK_WRITES = 4
+DISK_WRITES_MERGED = 5
+DISK_SECTORS_WRITTEN = 6
+DISK_WRITE_MS = 7
+DISK_IO_MS = 9
+DISK_WEIGHTED_IO_MS = 10
+DISK_FIELD_COUNT = 11
+SECTOR_KB = 0.5  # sector of /proc/diskstats is always 512 bytes
+PAGE_KB = os.sysconf('SC_PAGE_SIZE') // 1024
+CLOCK_TICKS = os.sysconf('SC_CLK_TCK')
+# index of /proc/[pid]/stat fields after ')' of comm
+PID_STAT_PPID = 1
+PID_STAT_UTIME = 11
+PID_STAT_STIME = 12
+PID_STAT_CUTIME = 13
+PID_STAT_CSTIME = 14
+PID_STAT_START_TIME = 19
+PID_STAT_RSS = 21
+PROCESS_PPID = 0
+PROCESS_COMMAND = 1
+PROCESS_TICKS = 2
+PROCESS_CHILDREN_TICKS = 3
+PROCESS_RSS = 4
+PROCESS_MIN_MEM_RATE = 0.1  # processes which used no cpu are written only when %MEM is this or more
+CHILDREN_COMMAND_SUFFIX = '+children'  # command of cpu usage of exited children
+PROCESS_LABELS = ['%CPU', '%MEM', 'RSS', 'SWAP']
+COLLECTOR_LABELS = ['cpu', 'rss', 'forks', 'written', 'interval', 'jitter']
+STATM_RESIDENT = 1
+COLLECTOR_FORKS = 0  # getstatlog.py reads /proc and doesn't run any command
+LOG_DATE_TIME_FORMAT = '%Y/%m/%d %H:%M:%S'  # vmstat and free (added by awk in getstatlog.sh)
+IOSTAT_DATE_TIME_FORMAT = '%Y-%m-%d %H:%M:%S'  # iostat -t (S_TIME_FORMAT=ISO)
+DF_DATE_TIME_FORMAT = '%Y-%m-%d %H%M%S'  # '###### start ' line
+FILE_DATE_FORMAT = '%Y%m%d'
+VMSTAT_GROUP_HEADER = 'procs -----------memory---------- ---swap-- -----io---- -system-- ------cpu-----'
+VMSTAT_LABELS = ['r', 'b', 'swpd', 'free', 'buff', 'cache', 'si', 'so', 'bi', 'bo', 'in', 'cs',
+                 'us', 'sy', 'id', 'wa', 'st']
+FREE_HEADER = '              total        used        free      shared  buff/cache   available'
+FREE_MEM_LABELS = ['total', 'used', 'free', 'shared', 'buff/cache', 'available']
+FREE_SWAP_LABELS = ['swap total', 'swap used', 'swap free']
+IOSTAT_CPU_HEADER = 'avg-cpu:  %user   %nice %system %iowait  %steal   %idle'
+IOSTAT_CPU_LABELS = ['%user', '%nice', '%system', '%iowait', '%steal', '%idle']
+IOSTAT_DEV_LABELS = ['tps', 'kB_read/s', 'kB_wrtn/s', 'kB_read', 'kB_wrtn']
+IOSTAT_X_DEV_LABELS = ['r/s', 'rkB/s', 'rrqm/s', '%rrqm', 'r_await', 'rareq-sz', 'w/s', 'wkB/s', 'wrqm/s', '%wrqm',
+                       'w_await', 'wareq-sz', 'aqu-sz', '%util']
+DF_HEADER = 'Filesystem     1024-blocks      Used Available Capacity Mounted on'
+DF_INODE_HEADER = 'Filesystem         Inodes     IUsed     IFree IUse% Mounted on'
+DF_LABELS = ['total', 'used', 'available', 'use%']
+LOG_ONE_BLOCK_START_MARK = '###### start '
+JSONL_LOG_NAME = 'statlog'
+JSONL_SEPARATORS = (',', ':')
+TEXT_FORMAT = 'text'
+JSONL_FORMAT = 'jsonl'
+BOTH_FORMAT = 'both'
+GZIP_COMPRESS = 'gzip'
+ZSTD_COMPRESS = 'zstd'
+NO_COMPRESS = 'none'
+COMPRESS_EXTENSIONS = {GZIP_COMPRESS: '.gz', ZSTD_COMPRESS: '.zst'}
+COMPRESS_BUFFER_SIZE = 1024 * 1024  # 1MB
+GZIP_LEVEL = 6
+ZSTD_LEVEL = 10
+LOG_NAMES = ['vmstat', 'free', 'iostat_cpu', 'iostat_dev', 'iostat_x_dev', 'df', 'df_inode', 'proc', 'collector',
+             'statlog']
+LOG_FILE_NAME_PATTERN = re.compile(r'^({})_(\d{{8}})\.(log|jsonl)$'.format('|'.join(LOG_NAMES)))
+
+# Variables
+INTERVAL_SEC = 5
+DF_INTERVAL_COUNT = 60
+OUTPUT_PATH = '/root/statlog'
+INTERVAL_OPTION = '--interval'
+DF_INTERVAL_COUNT_OPTION = '--dfIntervalCount'
+OUTPUT_PATH_OPTION = '--outputPath'
+FORMAT_OPTION = '--format'
+COMPRESS_OPTION = '--compress'
+PROCESS_OPTION = '--process'
+compress_format = GZIP_COMPRESS  # compression of rotated log file (set by --compress)
+
+proc_files: Dict[str, IO] = {}  # key: /proc file path, value: opened file (re-read by seek(0))
+written_bytes = 0  # total size of lines written to all logs
+
+
+def get_option_value(option: str, args: List[str]) -> Optional[str]:
+    if option not in args:
+        return None
+    index = args.index(option)
+    if index + 1 >= len(args):
+        print('{} requires value'.format(option))
+        raise ValueError(option)
+    return args[index + 1]
+
+
+def read_proc_file(path: str) -> str:
+    """
+    Description:
+        read /proc file. the file is opened at first read and kept open, and re-read from the top after that.
+    :param path: /proc file path.
+    :return: file content.
+    """
+    f = proc_files.get(path)
+    if f is None:
+        f = open(path, 'r')
+        proc_files[path] = f
+    f.seek(0)
+    return f.read()
+
+
+def read_stat() -> Tuple[List[int], Dict[str, int]]:
+    """
+    Description:
+        read /proc/stat.
+    :return: (total cpu times [user, nice, system, idle, iowait, irq, softirq, steal],
+              map of counter name (intr, ctxt, procs_running, procs_blocked) and value)
+    """
+    cpu_times: List[int] = []
+    counters: Dict[str, int] = {}
+    for line in read_proc_file(PROC_STAT_PATH).splitlines():
+        columns = line.split()
+        if not columns:
+            continue
+        if columns[0] == 'cpu':
+            cpu_times = [int(value) for value in columns[1:CPU_FIELD_COUNT + 1]]
+            cpu_times += [0] * (CPU_FIELD_COUNT - len(cpu_times))
+        elif columns[0] in ('intr', 'ctxt', 'procs_running', 'procs_blocked'):
+            counters[columns[0]] = int(columns[1])
+    return cpu_times, counters
+
+
+def read_meminfo() -> Dict[str, int]:
+    """
+    Description:
+        read /proc/meminfo.
+    :return: map of name (MemTotal, MemFree, ...) and value [KB]
+    """
+    meminfo: Dict[str, int] = {}
+    for line in read_proc_file(PROC_MEMINFO_PATH).splitlines():
+        columns = line.split()
+        if len(columns) >= 2:
+            meminfo[columns[0].rstrip(':')] = int(columns[1])
+    return meminfo
+
+
+def read_vmstat() -> Dict[str, int]:
+    vmstat: Dict[str, int] = {}
+    for line in read_proc_file(PROC_VMSTAT_PATH).splitlines():
+        columns = line.split()
+        if len(columns) == 2 and columns[0] in ('pswpin', 'pswpout', 'pgpgin', 'pgpgout'):
+            vmstat[columns[0]] = int(columns[1])
+    return vmstat
+
+
+def read_diskstats() -> Dict[str, List[int]]:
+    """
+    Description:
+        read /proc/diskstats. devices which have never done IO (ex. unused loop and ram devices)
+        are excluded like iostat.
+    :return: map of device name and counters (reads completed, reads merged, sectors read, ...)
+    """
+    diskstats: Dict[str, List[int]] = {}
+    for line in read_proc_file(PROC_DISKSTATS_PATH).splitlines():
+        columns = line.split()
+        if len(columns) < DISK_FIELD_COUNT + 3:
+            continue
+        counters = [int(value) for value in columns[3:DISK_FIELD_COUNT + 3]]
+        if counters[DISK_READS] == 0 and counters[DISK_WRITES] == 0:
+            continue
+        diskstats[columns[2]] = counters
+    return diskstats
+
+
+def read_pid_file(pid: int, name: str) -> Optional[str]:
+    """
+    Description:
+        read /proc/[pid]/ file. pid files are not kept open (processes come and go, and fd would be exhausted).
+    :param pid: process id.
+    :param name: file name (stat, status)
+    :return: file content. None when the process has exited.
+    """
+    try:
+        fd = os.open('{}/{}/{}'.format(PROC_PATH, pid, name), os.O_RDONLY)
+    except OSError:
+        return None
+    try:
+        return os.read(fd, PID_FILE_READ_SIZE).decode('utf-8', 'replace')
+    except OSError:
+        return None
+    finally:
+        os.close(fd)
+
+
+def read_processes() -> Dict[Tuple[int, int], List]:
+    """
+    Description:
+        read /proc/[pid]/stat of all processes.
+        command is between the first '(' and the last ')' because it can contain spaces and parentheses.
+        spaces of command are replaced with '_' (columns of proc log are separated by space).
+    :return: map of (pid, start time) and [ppid, command, cpu ticks (utime + stime),
+             cpu ticks of waited children (cutime + cstime), rss [KB]]. start time distinguishes reused pid.
+    """
+    processes: Dict[Tuple[int, int], List] = {}
+    for name in os.listdir(PROC_PATH):
+        if not name.isdigit():
+            continue
+        stat = read_pid_file(int(name), 'stat')
+        if stat is None:
+            continue
+        command_start = stat.find('(')
+        command_end = stat.rfind(')')
+        fields = stat[command_end + 2:].split()
+        if command_start < 0 or len(fields) <= PID_STAT_RSS:
+            continue
+        command = stat[command_start + 1:command_end].replace(' ', '_')
+        processes[(int(name), int(fields[PID_STAT_START_TIME]))] = [
+            int(fields[PID_STAT_PPID]), command, int(fields[PID_STAT_UTIME]) + int(fields[PID_STAT_STIME]),
+            int(fields[PID_STAT_CUTIME]) + int(fields[PID_STAT_CSTIME]), int(fields[PID_STAT_RSS]) * PAGE_KB]
+    return processes
+
+
+def read_swap_kb(pid: int) -> int:
+    status = read_pid_file(pid, 'status')
+    if status is None:
+        return 0
+    for line in status.splitlines():
+        if line.startswith('VmSwap:'):
+            return int(line.split()[1])
+    return 0
+
+
+def read_sample(is_process: bool = False) -> Dict:
+    cpu_times, counters = read_stat()
+    sample = {'time': time.monotonic(), 'cpu': cpu_times, 'stat': counters, 'mem': read_meminfo(),
+              'vm': read_vmstat(), 'disk': read_diskstats()}
+    if is_process:
+        sample['processes'] = read_processes()
+    return sample
+
+
+def get_cpu_rates(prev_cpu: List[int], cpu: List[int]) -> List[float]:
+    """
+    Description:
+        get cpu time rates [%] of each field between samples.
+    :param prev_cpu: cpu times of previous sample.
+    :param cpu: cpu times of current sample.
+    :return: rates of each field (user, nice, system, idle, iowait, irq, softirq, steal)
+    """
+    deltas = [max(value - prev_value, 0) for prev_value, value in zip(prev_cpu, cpu)]
+    total = sum(deltas)
+    if total == 0:
+        return [0.0] * CPU_FIELD_COUNT
+    return [delta * 100.0 / total for delta in deltas]
+
+
+def get_cache_kb(mem: Dict[str, int]) -> int:
+    # same as procps (vmstat, free): page cache and reclaimable slab
+    return mem.get('Cached', 0) + mem.get('SReclaimable', 0)
+
+
+def get_vmstat_values(prev: Dict, cur: Dict, seconds: float) -> List[int]:
+    """
+    Description:
+        get vmstat values between samples.
+    :param prev: previous sample.
+    :param cur: current sample.
+    :param seconds: seconds between samples.
+    :return: values in order of VMSTAT_LABELS.
+    """
+    mem = cur['mem']
+    rates = get_cpu_rates(prev['cpu'], cur['cpu'])
+
+    def per_second(group: str, name: str, scale: float = 1.0) -> int:
+        return int(max(cur[group].get(name, 0) - prev[group].get(name, 0), 0) * scale / seconds)
+
+    values = [cur['stat'].get('procs_running', 0), cur['stat'].get('procs_blocked', 0),
+              mem.get('SwapTotal', 0) - mem.get('SwapFree', 0), mem.get('MemFree', 0), mem.get('Buffers', 0),
+              get_cache_kb(mem), per_second('vm', 'pswpin', PAGE_KB), per_second('vm', 'pswpout', PAGE_KB),
+              per_second('vm', 'pgpgin'), per_second('vm', 'pgpgout'), per_second('stat', 'intr'),
+              per_second('stat', 'ctxt'), round(rates[CPU_USER] + rates[CPU_NICE]),
+              round(rates[CPU_SYSTEM] + rates[CPU_IRQ] + rates[CPU_SOFTIRQ]), round(rates[CPU_IDLE]),
+              round(rates[CPU_IOWAIT]), round(rates[CPU_STEAL])]
+    return values
+
+
+def create_vmstat_line(date_time: str, values: List[int]) -> str:
+    return '{}  {}\n'.format(date_time, ' '.join(str(value) for value in values))
+
+
+def get_free_values(mem: Dict[str, int]) -> Tuple[List[int], List[int]]:
+    """
+    Description:
+        get free values from /proc/meminfo (same calculation as procps free).
+    :param mem: /proc/meminfo values.
+    :return: (values in order of FREE_MEM_LABELS, values in order of FREE_SWAP_LABELS)
+    """
+    total = mem.get('MemTotal', 0)
+    free = mem.get('MemFree', 0)
+    buff_cache = mem.get('Buffers', 0) + get_cache_kb(mem)
+    used = max(total - free - buff_cache, 0)
+    swap_total = mem.get('SwapTotal', 0)
+    swap_free = mem.get('SwapFree', 0)
+    return ([total, used, free, mem.get('Shmem', 0), buff_cache, mem.get('MemAvailable', free)],
+            [swap_total, swap_total - swap_free, swap_free])
+
+
+def create_free_lines(date_time: str, mem_values: List[int], swap_values: List[int]) -> List[str]:
+    return ['{}  Mem: {:>14} {:>11} {:>11} {:>11} {:>11} {:>11}\n'.format(date_time, *mem_values),
+            '{}  Swap: {:>13} {:>11} {:>11}\n'.format(date_time, *swap_values)]
+
+
+def get_iostat_cpu_values(prev: Dict, cur: Dict) -> List[float]:
+    rates = get_cpu_rates(prev['cpu'], cur['cpu'])
+    return [rates[CPU_USER], rates[CPU_NICE], rates[CPU_SYSTEM] + rates[CPU_IRQ] + rates[CPU_SOFTIRQ],
+            rates[CPU_IOWAIT], rates[CPU_STEAL], rates[CPU_IDLE]]
+
+
+def create_iostat_cpu_lines(date_time: str, values: List[float]) -> List[str]:
+    return [date_time + '\n', IOSTAT_CPU_HEADER + '\n',
+            '        ' + ' '.join('{:>7.2f}'.format(value) for value in values) + '\n', '\n']
+
+
+def get_disk_deltas(prev: Dict, cur: Dict) -> List[Tuple[str, List[int]]]:
+    deltas: List[Tuple[str, List[int]]] = []
+    for device, counters in cur['disk'].items():
+        prev_counters = prev['disk'].get(device, [0] * DISK_FIELD_COUNT)
+        deltas.append((device, [max(value - prev_value, 0) for prev_value, value in zip(prev_counters, counters)]))
+    return deltas
+
+
+def get_iostat_dev_values(delta: List[int], seconds: float) -> List:
+    """
+    Description:
+        get iostat -d values of one device.
+    :param delta: diskstats counter differences between samples.
+    :param seconds: seconds between samples.
+    :return: values in order of IOSTAT_DEV_LABELS.
+    """
+    read_kb = delta[DISK_SECTORS_READ] * SECTOR_KB
+    write_kb = delta[DISK_SECTORS_WRITTEN] * SECTOR_KB
+    return [(delta[DISK_READS] + delta[DISK_WRITES]) / seconds, read_kb / seconds, write_kb / seconds,
+            int(read_kb), int(write_kb)]
+
+
+def get_iostat_x_dev_values(delta: List[int], seconds: float) -> List[float]:
+    """
+    Description:
+        get iostat -x values of one device.
+    :param delta: diskstats counter differences between samples.
+    :param seconds: seconds between samples.
+    :return: values in order of IOSTAT_X_DEV_LABELS.
+    """
+    values: List[float] = []
+    for ios, merged, sectors, io_ms in [
+            (delta[DISK_READS], delta[DISK_READS_MERGED], delta[DISK_SECTORS_READ], delta[DISK_READ_MS]),
+            (delta[DISK_WRITES], delta[DISK_WRITES_MERGED], delta[DISK_SECTORS_WRITTEN], delta[DISK_WRITE_MS])]:
+        kb = sectors * SECTOR_KB
+        values += [ios / seconds, kb / seconds, merged / seconds,
+                   merged * 100.0 / (merged + ios) if merged + ios > 0 else 0.0,
+                   io_ms / ios if ios > 0 else 0.0, kb / ios if ios > 0 else 0.0]
+    values += [delta[DISK_WEIGHTED_IO_MS] / (seconds * 1000), min(delta[DISK_IO_MS] / (seconds * 10), 100.0)]
+    return values
+
+
+def create_iostat_dev_lines(date_time: str, device_values: List[Tuple[str, List]]) -> List[str]:
+    lines = [date_time + '\n', '{:<16}'.format('Device') + ''.join('{:>12}'.format(label)
+                                                                   for label in IOSTAT_DEV_LABELS) + '\n']
+    for device, values in device_values:
+        lines.append('{:<16}{:>12.2f}{:>12.2f}{:>12.2f}{:>12}{:>12}\n'.format(device, *values))
+    return lines + ['\n']
+
+
+def create_iostat_x_dev_lines(date_time: str, device_values: List[Tuple[str, List[float]]]) -> List[str]:
+    lines = [date_time + '\n', '{:<16}'.format('Device') + ''.join('{:>9}'.format(label)
+                                                                   for label in IOSTAT_X_DEV_LABELS) + '\n']
+    for device, values in device_values:
+        lines.append('{:<16}'.format(device) + ''.join('{:>9.2f}'.format(value) for value in values) + '\n')
+    return lines + ['\n']
+
+
+def get_mounted_filesystems() -> List[Tuple[str, str]]:
+    """
+    Description:
+        get mounted block device filesystems from /proc/mounts (first mount point of each device).
+    :return: list of (filesystem, mount point)
+    """
+    filesystems: List[Tuple[str, str]] = []
+    devices = set()
+    for line in read_proc_file(PROC_MOUNTS_PATH).splitlines():
+        columns = line.split()
+        if len(columns) < 2 or not columns[0].startswith('/') or columns[0] in devices:
+            continue
+        devices.add(columns[0])
+        filesystems.append((columns[0], columns[1]))
+    return filesystems
+
+
+def get_df_values(is_inode: bool) -> List[Tuple[str, str, List[int]]]:
+    """
+    Description:
+        get df -kP (df -iP when is_inode) values by statvfs.
+        mount point is kept as /proc/mounts (space is escaped to \\040), so one filesystem is always 6 columns.
+    :param is_inode: get inode usage instead of disk usage.
+    :return: list of (filesystem, mount point, values in order of DF_LABELS)
+    """
+    df_values: List[Tuple[str, str, List[int]]] = []
+    for filesystem, mount_point in get_mounted_filesystems():
+        try:
+            stat = os.statvfs(mount_point.replace('\\040', ' '))
+        except OSError:
+            continue
+        if is_inode:
+            total, used, available = stat.f_files, stat.f_files - stat.f_ffree, stat.f_ffree
+        else:
+            total = stat.f_blocks * stat.f_frsize // 1024
+            used = (stat.f_blocks - stat.f_bfree) * stat.f_frsize // 1024
+            available = stat.f_bavail * stat.f_frsize // 1024
+        use_percent = -(-used * 100 // (used + available)) if used + available > 0 else 0
+        df_values.append((filesystem, mount_point, [total, used, available, use_percent]))
+    return df_values
+
+
+def create_df_lines(date_time: str, is_inode: bool, df_values: List[Tuple[str, str, List[int]]]) -> List[str]:
+    lines = [LOG_ONE_BLOCK_START_MARK + date_time + '\n', (DF_INODE_HEADER if is_inode else DF_HEADER) + '\n']
+    for filesystem, mount_point, values in df_values:
+        lines.append('{:<16} {:>12} {:>9} {:>9} {:>7}% {}\n'.format(filesystem, *values, mount_point))
+    return lines
+
+
+def get_exited_children_ticks(prev_processes: Dict[Tuple[int, int], List],
+                               processes: Dict[Tuple[int, int], List]) -> Dict[int, int]:
+    """
+    Description:
+        get cpu ticks of processes which exited after the previous sample per parent.
+        these ticks were already counted in the previous samples (or will be counted as the process itself),
+        and they are subtracted from the increase of cutime/cstime of the parent.
+    :param prev_processes: processes of previous sample.
+    :param processes: processes of current sample.
+    :return: map of parent pid and cpu ticks (until the previous sample) of exited children.
+    """
+    exited_ticks: Dict[int, int] = {}
+    for key, process in prev_processes.items():
+        if key not in processes:
+            ppid = process[PROCESS_PPID]
+            exited_ticks[ppid] = exited_ticks.get(ppid, 0) + process[PROCESS_TICKS] + process[
+                PROCESS_CHILDREN_TICKS]
+    return exited_ticks
+
+
+def get_process_values(prev: Dict, cur: Dict, seconds: float) -> List[Tuple[int, str, List]]:
+    """
+    Description:
+        get per process values between samples. %CPU is cpu time / elapsed time like top (100% is one cpu).
+        processes which didn't use cpu and %MEM is less than PROCESS_MIN_MEM_RATE are skipped.
+        cpu time of children which started and exited between samples (not seen in any sample)
+        is added as the parent pid with command 'command+children'.
+    :param prev: previous sample.
+    :param cur: current sample.
+    :param seconds: seconds between samples.
+    :return: list of (pid, command, values in order of PROCESS_LABELS)
+    """
+    ticks_per_percent = CLOCK_TICKS * seconds / 100.0
+    mem_total = max(cur['mem'].get('MemTotal', 0), 1)
+    prev_processes = prev['processes']
+    exited_ticks = get_exited_children_ticks(prev_processes, cur['processes'])
+    process_values: List[Tuple[int, str, List]] = []
+    for key, process in cur['processes'].items():
+        pid = key[0]
+        prev_process = prev_processes.get(key)
+        # a process not in the previous sample started after it, so all cpu time is in this interval
+        ticks = process[PROCESS_TICKS] - (prev_process[PROCESS_TICKS] if prev_process else 0)
+        mem_rate = process[PROCESS_RSS] * 100.0 / mem_total
+        if ticks > 0 or mem_rate >= PROCESS_MIN_MEM_RATE:
+            process_values.append((pid, process[PROCESS_COMMAND], [
+                ticks / ticks_per_percent, mem_rate, process[PROCESS_RSS], read_swap_kb(pid)]))
+        if prev_process is None:
+            continue
+        unseen_ticks = process[PROCESS_CHILDREN_TICKS] - prev_process[PROCESS_CHILDREN_TICKS] - exited_ticks.get(
+            pid, 0)
+        if unseen_ticks > 0:
+            process_values.append((pid, process[PROCESS_COMMAND] + CHILDREN_COMMAND_SUFFIX,
+                                   [unseen_ticks / ticks_per_percent, 0.0, 0, 0]))
+    return process_values
+
+
+def create_process_lines(date_time: str, process_values: List[Tuple[int, str, List]]) -> List[str]:
+    return ['{} {} {:.1f} {:.1f} {} {} {}\n'.format(date_time, pid, *values, command)
+            for pid, command, values in process_values]
+
+
+def read_collector_counters() -> Tuple[float, int, int]:
+    """
+    Description:
+        read counters of the collector itself.
+    :return: (cpu seconds (user, system and children), rss [KB], total written bytes)
+    """
+    times = os.times()
+    rss_kb = int(read_proc_file(PROC_SELF_STATM_PATH).split()[STATM_RESIDENT]) * PAGE_KB
+    return times.user + times.system + times.children_user + times.children_system, rss_kb, written_bytes
+
+
+def get_collector_values(prev_counters: Tuple[float, int, int], counters: Tuple[float, int, int],
+                         interval_seconds: float, jitter_seconds: float) -> List[int]:
+    """
+    Description:
+        get overhead of the collector in one interval.
+    :param prev_counters: collector counters at the end of previous interval.
+    :param counters: collector counters at the end of this interval.
+    :param interval_seconds: seconds between samples.
+    :param jitter_seconds: delay of the sample from the scheduled time (wall clock boundary).
+    :return: values in order of COLLECTOR_LABELS (cpu [ms], rss [KB], forks, written [bytes],
+             interval [ms], jitter [ms])
+    """
+    return [round((counters[0] - prev_counters[0]) * 1000), counters[1], COLLECTOR_FORKS,
+            counters[2] - prev_counters[2], round(interval_seconds * 1000), round(jitter_seconds * 1000)]
+
+
+def create_collector_line(date_time: str, values: List[int]) -> str:
+    return '{}  {}\n'.format(date_time, ' '.join(str(value) for value in values))
+
+
+def create_jsonl_record(timestamp: float, utc_offset: int, record_type: str, labels: List[str], values: List,
+                        keys: Dict[str, str] = None) -> str:
+    """
+    Description:
+        create one JSON line record.
+    :param timestamp: epoch seconds of the sample.
+    :param utc_offset: utc offset seconds of local time (analyzeTool uses local time).
+    :param record_type: vmstat, free, iostat_cpu, iostat_dev, iostat_x_dev, df, df_inode, proc or collector
+    :param labels: value labels.
+    :param values: values in order of labels (int or float).
+    :param keys: key fields of the record (ex. device, filesystem)
+    :return: JSON line.
+    """
+    record: Dict = {'ts': round(timestamp, 3), 'tz': utc_offset, 'type': record_type}
+    if keys:
+        record.update(keys)
+    for label, value in zip(labels, values):
+        record[label] = round(value, 2) if isinstance(value, float) else value
+    return json.dumps(record, separators=JSONL_SEPARATORS) + '\n'
+
+
+def compress_log_file(file_path: str, compress: str):
+    """
+    Description:
+        compress log file to file_path.gz (or .zst) and remove the original file.
+    :param file_path: log file path.
+    :param compress: gzip or zstd
+    :return: void
+    """
+    compressed_file_path = file_path + COMPRESS_EXTENSIONS[compress]
+    with open(file_path, 'rb') as src:
+        if compress == ZSTD_COMPRESS:
+            with open(compressed_file_path, 'wb') as dst:
+                zstandard.ZstdCompressor(level=ZSTD_LEVEL).copy_stream(src, dst, read_size=COMPRESS_BUFFER_SIZE,
+                                                                       write_size=COMPRESS_BUFFER_SIZE)
+        else:
+            with gzip.open(compressed_file_path, 'wb', compresslevel=GZIP_LEVEL) as dst:
+                shutil.copyfileobj(src, dst, COMPRESS_BUFFER_SIZE)
+    os.remove(file_path)
+
+
+def start_compress_log_file(file_path: str):
+    """
+    Description:
+        compress rotated log file in background thread, so sampling is not delayed.
+    :param file_path: log file path.
+    :return: void
+    """
+    if compress_format == NO_COMPRESS:
+        return
+    threading.Thread(target=compress_log_file, args=(file_path, compress_format)).start()
+
+
+def compress_old_log_files(output_path: str, day: str):
+    """
+    Description:
+        compress log files of previous days which are not compressed (ex. collector was stopped before rotation).
+    :param output_path: output directory.
+    :param day: yyyymmdd of today.
+    :return: void
+    """
+    for file_name in sorted(os.listdir(output_path)):
+        match = LOG_FILE_NAME_PATTERN.match(file_name)
+        if match and match.group(2) < day:
+            start_compress_log_file(os.path.join(output_path, file_name))
+
+
+def get_log_file(log_files: Dict[str, Tuple[str, IO]], output_path: str, name: str, day: str,
+                 header_lines: List[str], file_extension: str = 'log') -> IO:
+    """
+    Description:
+        get output log file of the day. when the day is changed, the file is switched to new file
+        and the file of previous day is compressed.
+    :param log_files: map of log name and (day, opened file)
+    :param output_path: output directory.
+    :param name: log name (vmstat, free, ...)
+    :param day: yyyymmdd
+    :param header_lines: lines written at the top of new file.
+    :param file_extension: log or jsonl
+    :return: opened file.
+    """
+    current = log_files.get(name)
+    if current is not None and current[0] == day:
+        return current[1]
+    if current is not None:
+        current[1].close()
+        start_compress_log_file(current[1].name)
+    f = open(os.path.join(output_path, '{}_{}.{}'.format(name, day, file_extension)), 'a')
+    f.writelines(header_lines)
+    log_files[name] = (day, f)
+    return f
+
+
+def write_log(log_files: Dict[str, Tuple[str, IO]], output_path: str, name: str, day: str, lines: List[str],
+              header_lines: List[str] = None, file_extension: str = 'log'):
+    global written_bytes
+    f = get_log_file(log_files, output_path, name, day, header_lines or [], file_extension)
+    f.writelines(lines)
+    f.flush()
+    written_bytes += sum(len(line) for line in header_lines or []) + sum(len(line) for line in lines)
+
+
+def write_text_sample(log_files: Dict[str, Tuple[str, IO]], output_path: str, now: dt.datetime, values: Dict):
+    """
+    Description:
+        write one sample to each text log (same format as getstatlog.sh).
+    :param log_files: map of log name and (day, opened file)
+    :param output_path: output directory.
+    :param now: date time of the sample.
+    :param values: values of the sample (get_sample_values)
+    :return: void
+    """
+    day = now.strftime(FILE_DATE_FORMAT)
+    log_date_time = now.strftime(LOG_DATE_TIME_FORMAT)
+    iostat_date_time = now.strftime(IOSTAT_DATE_TIME_FORMAT)
+    write_log(log_files, output_path, 'vmstat', day, [create_vmstat_line(log_date_time, values['vmstat'])],
+              ['{}  {}\n'.format(log_date_time, VMSTAT_GROUP_HEADER),
+               '{}  {}\n'.format(log_date_time, ' '.join(VMSTAT_LABELS))])
+    write_log(log_files, output_path, 'free', day, create_free_lines(log_date_time, *values['free']),
+              ['{}  {}\n'.format(log_date_time, FREE_HEADER)])
+    write_log(log_files, output_path, 'iostat_cpu', day, create_iostat_cpu_lines(iostat_date_time,
+                                                                                 values['iostat_cpu']))
+    write_log(log_files, output_path, 'iostat_dev', day, create_iostat_dev_lines(iostat_date_time,
+                                                                                 values['iostat_dev']))
+    write_log(log_files, output_path, 'iostat_x_dev', day, create_iostat_x_dev_lines(iostat_date_time,
+                                                                                     values['iostat_x_dev']))
+    if 'df' in values:
+        df_date_time = now.strftime(DF_DATE_TIME_FORMAT)
+        write_log(log_files, output_path, 'df', day, create_df_lines(df_date_time, False, values['df']))
+        write_log(log_files, output_path, 'df_inode', day, create_df_lines(df_date_time, True, values['df_inode']))
+    if 'proc' in values:
+        write_log(log_files, output_path, 'proc', day, create_process_lines(log_date_time, values['proc']))
+
+
+def write_jsonl_sample(log_files: Dict[str, Tuple[str, IO]], output_path: str, now: dt.datetime, timestamp: float,
+                       values: Dict):
+    """
+    Description:
+        write one sample to JSON lines log (statlog_yyyymmdd.jsonl).
+    :param log_files: map of log name and (day, opened file)
+    :param output_path: output directory.
+    :param now: date time of the sample.
+    :param timestamp: epoch seconds of the sample.
+    :param values: values of the sample (get_sample_values)
+    :return: void
+    """
+    utc_offset = time.localtime(timestamp).tm_gmtoff
+    lines = [create_jsonl_record(timestamp, utc_offset, 'vmstat', VMSTAT_LABELS, values['vmstat']),
+             create_jsonl_record(timestamp, utc_offset, 'free', FREE_MEM_LABELS + FREE_SWAP_LABELS,
+                                 values['free'][0] + values['free'][1]),
+             create_jsonl_record(timestamp, utc_offset, 'iostat_cpu', IOSTAT_CPU_LABELS, values['iostat_cpu'])]
+    for record_type, labels in [('iostat_dev', IOSTAT_DEV_LABELS), ('iostat_x_dev', IOSTAT_X_DEV_LABELS)]:
+        for device, device_values in values[record_type]:
+            lines.append(create_jsonl_record(timestamp, utc_offset, record_type, labels, device_values,
+                                             {'device': device}))
+    for record_type in ['df', 'df_inode']:
+        for filesystem, mount_point, df_values in values.get(record_type, []):
+            lines.append(create_jsonl_record(timestamp, utc_offset, record_type, DF_LABELS, df_values,
+                                             {'filesystem': filesystem, 'mounted on': mount_point}))
+    for pid, command, process_values in values.get('proc', []):
+        lines.append(create_jsonl_record(timestamp, utc_offset, 'proc', PROCESS_LABELS, process_values,
+                                         {'pid': pid, 'command': command}))
+    write_log(log_files, output_path, JSONL_LOG_NAME, now.strftime(FILE_DATE_FORMAT), lines, file_extension='jsonl')
+
+
+def write_collector_sample(log_files: Dict[str, Tuple[str, IO]], output_path: str, now: dt.datetime,
+                           timestamp: float, output_format: str, values: List[int]):
+    day = now.strftime(FILE_DATE_FORMAT)
+    if output_format != JSONL_FORMAT:
+        write_log(log_files, output_path, 'collector', day,
+                  [create_collector_line(now.strftime(LOG_DATE_TIME_FORMAT), values)])
+    if output_format != TEXT_FORMAT:
+        write_log(log_files, output_path, JSONL_LOG_NAME, day, [create_jsonl_record(
+            timestamp, time.localtime(timestamp).tm_gmtoff, 'collector', COLLECTOR_LABELS, values)],
+                  file_extension='jsonl')
+
+
+def get_sample_values(prev: Dict, cur: Dict, is_df_sample: bool) -> Dict:
+    """
+    Description:
+        get values of all logs between samples.
+    :param prev: previous sample.
+    :param cur: current sample.
+    :param is_df_sample: get df values too.
+    :return: map of log name and values.
+    """
+    seconds = max(cur['time'] - prev['time'], 0.001)
+    disk_deltas = get_disk_deltas(prev, cur)
+    values = {'vmstat': get_vmstat_values(prev, cur, seconds), 'free': get_free_values(cur['mem']),
+              'iostat_cpu': get_iostat_cpu_values(prev, cur),
+              'iostat_dev': [(device, get_iostat_dev_values(delta, seconds)) for device, delta in disk_deltas],
+              'iostat_x_dev': [(device, get_iostat_x_dev_values(delta, seconds)) for device, delta in disk_deltas]}
+    if is_df_sample:
+        values['df'] = get_df_values(False)
+        values['df_inode'] = get_df_values(True)
+    if 'processes' in cur:
+        values['proc'] = get_process_values(prev, cur, seconds)
+    return values
+
+
+def wait_next_sample_time(interval: int, previous: Optional[float] = None) -> float:
+    """
+    Description:
+        sleep until the next wall clock boundary of interval (ex. :00, :05, :10 ... with 5 seconds interval).
+        the boundary is got from wall clock at each interval (follows clock adjustment), and the sleep is measured
+        by monotonic clock. when the previous sample overran the boundary, the boundary is skipped (no burst).
+        the boundary is after the previous one, so the same timestamp is not emitted twice when the sleep ended
+        slightly before the previous boundary. when the clock was set back by more than interval, the clock is
+        followed.
+    :param interval: sampling interval seconds.
+    :param previous: epoch seconds of the previous boundary. None at the first sample.
+    :return: epoch seconds of the boundary.
+    """
+    now = time.time()
+    scheduled = (math.floor(now / interval) + 1) * interval
+    if previous is not None and now > previous - interval:
+        scheduled = max(previous + interval, scheduled)
+    deadline = time.monotonic() + (scheduled - now)
+    time.sleep(max(deadline - time.monotonic(), 0))
+    return scheduled
+
+
+def collect(output_path: str, interval: int, df_interval_count: int, output_format: str, is_process: bool):
+    """
+    Description:
+        collect samples at wall clock boundaries of interval. the boundary (not the time of reading) is
+        the timestamp of all logs of the sample, so samples of each log have the same date time and can be
+        joined exactly. df is collected at boundaries of (interval * df_interval_count) seconds and at start.
+    :param output_path: output directory.
+    :param interval: sampling interval seconds.
+    :param df_interval_count: df is collected once every this count.
+    :param output_format: text, jsonl or both.
+    :param is_process: collect per process values too.
+    :return: void
+    """
+    log_files: Dict[str, Tuple[str, IO]] = {}
+    prev = read_sample(is_process)
+    prev_counters = read_collector_counters()
+    count = 0
+    timestamp: Optional[float] = None
+    while True:
+        timestamp = wait_next_sample_time(interval, timestamp)
+        # delay of the start of the sample (same as getstatlog.sh), not including the time of reading /proc
+        jitter = time.time() - timestamp
+        cur = read_sample(is_process)
+        now = dt.datetime.fromtimestamp(timestamp)
+        is_df_sample = count == 0 or round(timestamp / interval) % df_interval_count == 0
+        values = get_sample_values(prev, cur, is_df_sample)
+        if output_format != JSONL_FORMAT:
+            write_text_sample(log_files, output_path, now, values)
+        if output_format != TEXT_FORMAT:
+            write_jsonl_sample(log_files, output_path, now, timestamp, values)
+        counters = read_collector_counters()
+        write_collector_sample(log_files, output_path, now, timestamp, output_format, get_collector_values(
+            prev_counters, counters, cur['time'] - prev['time'], jitter))
+        prev = cur
+        prev_counters = counters
+        count += 1
+
+
+def main(args: List[str]):
+    """
+
+    :param args: command line arguments
+    :return: void
+    """
+    interval = int(get_option_value(INTERVAL_OPTION, args) or INTERVAL_SEC)
+    df_interval_count = int(get_option_value(DF_INTERVAL_COUNT_OPTION, args) or DF_INTERVAL_COUNT)
+    output_path = get_option_value(OUTPUT_PATH_OPTION, args) or OUTPUT_PATH
+    output_format = get_option_value(FORMAT_OPTION, args) or TEXT_FORMAT
+    if output_format not in (TEXT_FORMAT, JSONL_FORMAT, BOTH_FORMAT):
+        print('invalid {} (text, jsonl or both)'.format(FORMAT_OPTION))
+        raise ValueError(output_format)
+    global compress_format
+    compress_format = get_option_value(COMPRESS_OPTION, args) or GZIP_COMPRESS
+    if compress_format not in (GZIP_COMPRESS, ZSTD_COMPRESS, NO_COMPRESS):
+        print('invalid {} (gzip, zstd or none)'.format(COMPRESS_OPTION))
+        raise ValueError(compress_format)
+    if compress_format == ZSTD_COMPRESS and zstandard is None:
+        print('zstandard package is not installed. rotated logs are compressed by gzip.')
+        compress_format = GZIP_COMPRESS
+    os.makedirs(output_path, exist_ok=True)
+    compress_old_log_files(output_path, dt.datetime.now().strftime(FILE_DATE_FORMAT))
+    collect(output_path, interval, df_interval_count, output_format, PROCESS_OPTION in args)
+
+
+if __name__ == '__main__':
+    main(sys.argv)
@@ -1,14 +1,117 @@
 #!/bin/sh
-INTERVAL_SEC=5
+INTERVAL_SEC=5  # samples are taken at wall clock boundaries of this interval (ex. :00, :05, :10 ...)
+INTERVAL_MS=$((INTERVAL_SEC * 1000))
+DF_INTERVAL_COUNT=60  # df is collected every (INTERVAL_SEC * DF_INTERVAL_COUNT) seconds
 OUTPUT_PATH="/root/statlog"
+COMPRESS_COMMAND="gzip"  # logs of previous day are compressed by this command at rotation (ex. "zstd -q --rm")
+CLOCK_TICKS=`getconf CLK_TCK`
 
-top -bi -d ${INTERVAL_SEC} >> ${OUTPUT_PATH}/top_`date "+%Y%m%d"`-.log &
-iostat -cyt ${INTERVAL_SEC} >> ${OUTPUT_PATH}/iostat_cpu_`date "+%Y%m%d"`-.log &
-iostat -dyt -p ALL ${INTERVAL_SEC} >> ${OUTPUT_PATH}/iostat_dev_`date "+%Y%m%d"`-.log &
-iostat -xdyt -p ALL ${INTERVAL_SEC} >> ${OUTPUT_PATH}/iostat_x_dev_`date "+%Y%m%d"`-.log &
+start_background_commands() {
+   DAY=`date "+%Y%m%d"`
+   top -bi -d ${INTERVAL_SEC} >> ${OUTPUT_PATH}/top_${DAY}-.log &
+   TOP_PID=$!
+   iostat -cyt ${INTERVAL_SEC} >> ${OUTPUT_PATH}/iostat_cpu_${DAY}-.log &
+   IOSTAT_CPU_PID=$!
+   iostat -dyt -p ALL ${INTERVAL_SEC} >> ${OUTPUT_PATH}/iostat_dev_${DAY}-.log &
+   IOSTAT_DEV_PID=$!
+   iostat -xdyt -p ALL ${INTERVAL_SEC} >> ${OUTPUT_PATH}/iostat_x_dev_${DAY}-.log &
+   IOSTAT_X_DEV_PID=$!
+}
+
+rotate_logs() {
+   # top and iostat keep writing to the file opened at start, so restart them with the file of new day
+   kill ${TOP_PID} ${IOSTAT_CPU_PID} ${IOSTAT_DEV_PID} ${IOSTAT_X_DEV_PID}
+   wait ${TOP_PID} ${IOSTAT_CPU_PID} ${IOSTAT_DEV_PID} ${IOSTAT_X_DEV_PID} 2> /dev/null
+   PREVIOUS_DAY=${DAY}
+   start_background_commands
+   nice ${COMPRESS_COMMAND} ${OUTPUT_PATH}/*_${PREVIOUS_DAY}.log ${OUTPUT_PATH}/*_${PREVIOUS_DAY}-.log 2> /dev/null &
+   FORKS=$((FORKS + 5))  # top, iostat x 3, compress command (nice execs it)
+}
+
+write_collector_log() {
+   # collector overhead of one interval:
+   #   date time  cpu[ms] rss[KB] forks written[bytes] interval[ms] jitter[ms]
+   # cpu and rss are the total of this shell, commands run by this shell (cutime, cstime) and background commands.
+   # forks is the number of processes started by this shell in the interval (counted in FORKS by the loop,
+   # not host-wide /proc/stat processes), written is increase of today's log file size,
+   # and jitter is the delay of the start of the interval from the scheduled time (wall clock boundary).
+   # /proc files are read by getline, so a background command which has exited doesn't stop awk.
+   FORKS=$((FORKS + 2))  # stat, awk
+   set -- `stat -c %s ${OUTPUT_PATH}/*_${DAY}.log ${OUTPUT_PATH}/*_${DAY}-.log 2> /dev/null | awk \
+      -v pids="$$ ${TOP_PID} ${IOSTAT_CPU_PID} ${IOSTAT_DEV_PID} ${IOSTAT_X_DEV_PID}" '
+      { bytes += $1 }
+      END {
+         count = split(pids, pid_list, " ")
+         for (i = 1; i <= count; i++) {
+            file = "/proc/" pid_list[i] "/stat"
+            if ((getline line < file) > 0) {
+               split(line, fields, " ")
+               ticks += fields[14] + fields[15] + fields[16] + fields[17]
+            }
+            close(file)
+            file = "/proc/" pid_list[i] "/status"
+            while ((getline line < file) > 0) {
+               if (line ~ /^VmRSS:/) {
+                  split(line, fields, " ")
+                  rss += fields[2]
+               }
+            }
+            close(file)
+         }
+         print ticks + 0, rss + 0, bytes + 0
+      }'`
+   if [ -n "${PREV_TICKS}" ]; then
+      WRITTEN_BYTES=$(($3 - PREV_BYTES))
+      if [ ${WRITTEN_BYTES} -lt 0 ]; then
+         WRITTEN_BYTES=$3  # log files were rotated
+      fi
+      echo "${NOW_DATE_TIME}  $((($1 - PREV_TICKS) * 1000 / CLOCK_TICKS)) $2 ${FORKS}" \
+         "${WRITTEN_BYTES} $((NOW_MS - PREV_MS)) $((NOW_MS - SCHEDULED_MS))" >> ${OUTPUT_PATH}/collector_${DAY}.log
+   fi
+   FORKS=0
+   PREV_TICKS=$1
+   PREV_BYTES=$3
+   PREV_MS=${NOW_MS}
+}
+
+wait_next_boundary() {
+   # sleep until the next wall clock boundary of INTERVAL_SEC. the boundary is calculated from the clock each time,
+   # so the time of commands doesn't accumulate. when commands overran the boundary, the boundary is skipped.
+   NOW_MS=`date "+%s%3N"`
+   FORKS=$((FORKS + 2))  # date, sleep
+   SCHEDULED_MS=$(((NOW_MS / INTERVAL_MS + 1) * INTERVAL_MS))
+   WAIT_MS=$((SCHEDULED_MS - NOW_MS))
+   sleep $((WAIT_MS / 1000)).$((WAIT_MS % 1000 / 100))$((WAIT_MS % 100 / 10))$((WAIT_MS % 10))
+}
+
+# top and iostat are started at the boundary, so their samples are aligned with the samples of this loop
+wait_next_boundary
+start_background_commands
+count=0
+FORKS=0  # processes started by this shell since the last collector log (commands are counted where they run)
 while true
 do
-   vmstat | awk '{ "date \"+%Y/%m/%d %H:%M:%S\"" | getline var; print var " ", $0 }' >> ${OUTPUT_PATH}/vmstat_`date "+%Y%m%d"`.log
-   free | awk '{ "date \"+%Y/%m/%d %H:%M:%S\"" | getline var; print var " ", $0 }' >> ${OUTPUT_PATH}/free_`date "+%Y%m%d"`.log
-   sleep ${INTERVAL_SEC}
+   # date time of all logs of this interval (the boundary, same for vmstat, free and df)
+   set -- `date "+%Y/%m/%d %H:%M:%S %Y-%m-%d %H%M%S %Y%m%d %s%3N"`
+   NOW_DATE_TIME="$1 $2"
+   DF_DATE_TIME="$3 $4"
+   NOW_MS=$6
+   FORKS=$((FORKS + 1))  # date
+   if [ "$5" != "${DAY}" ]; then
+      rotate_logs
+   fi
+   vmstat | awk -v date_time="${NOW_DATE_TIME}" '{ print date_time " ", $0 }' >> ${OUTPUT_PATH}/vmstat_${DAY}.log
+   free | awk -v date_time="${NOW_DATE_TIME}" '{ print date_time " ", $0 }' >> ${OUTPUT_PATH}/free_${DAY}.log
+   FORKS=$((FORKS + 4))  # vmstat, free, awk x 2
+   if [ ${count} -eq 0 ] || [ $((SCHEDULED_MS / INTERVAL_MS % DF_INTERVAL_COUNT)) -eq 0 ]; then
+      echo "###### start ${DF_DATE_TIME}" >> ${OUTPUT_PATH}/df_${DAY}.log
+      df -kP >> ${OUTPUT_PATH}/df_${DAY}.log
+      echo "###### start ${DF_DATE_TIME}" >> ${OUTPUT_PATH}/df_inode_${DAY}.log
+      df -iP >> ${OUTPUT_PATH}/df_inode_${DAY}.log
+      FORKS=$((FORKS + 2))  # df x 2
+   fi
+   write_collector_log
+   count=`expr ${count} + 1`
+   FORKS=$((FORKS + 1))  # expr
+   wait_next_boundary
 done
\ No newline at end of file